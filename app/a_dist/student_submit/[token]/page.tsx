@@ -104,6 +104,7 @@ export default function StudentSubmitPage() {
         const feedbackInfo = {
             content: content,
             student_id : studentId,
+            assignment_id: assignmentId,
             guide: assignment?.guide,
             condition: assignment?.condition,
             last_feedbacks: lastHint,
@@ -111,6 +112,13 @@ export default function StudentSubmitPage() {
         try {
             const res = await getMidFeedback(feedbackInfo);
             setAiHint(res.data.result);
+            // AI 장애로 기본 안내를 받은 경우 힌트 횟수/쿨타임을 쓰지 않음
+            if (res.data.status === "degraded") return;
+            // 글이 거의 바뀌지 않아 지난 피드백을 그대로 받은 경우도 횟수를 쓰지 않음
+            if (res.data.reused) {
+                alert("글이 거의 바뀌지 않아 지난번 도움말을 다시 보여드려요. 글을 더 고친 뒤 다시 요청해보세요.");
+                return;
+            }
             seHintCount(hintCount - 1);
             setLastHint(`학생 답변 : ${content} \n 그에 대한 지난 피드백 : ${res.data.result}`)
             setHintCooldown(300); // 5분 쿨타임 시작
@@ -121,6 +129,30 @@ export default function StudentSubmitPage() {
         }
     };
 
+    // 작성 중인 글 자동 저장 (입력이 5초 멈추면 저장, 서버에서 중간 피드백을 미리 준비할 수 있음)
+    useEffect(() => {
+        if (!assignmentId || !studentId || submitted) return;
+        const status = submissionInfo?.status ?? "in_progress";
+        if (status === "first_submitted" || status === "final_submitted") return;
+        const saved = status === "feedback_done" ? submissionInfo?.revised_content : submissionInfo?.content;
+        if (!content.trim() || content === (saved || "")) return;
+
+        const timer = setTimeout(() => {
+            const draft = status === "feedback_done"
+                ? { revised_content: content }
+                : { content: content };
+            updateASubmission({
+                assignment_id: assignmentId,
+                student_id: studentId,
+                ...draft,
+                status: status,
+            }).catch(() => {
+                // 자동 저장 실패는 제출 시 다시 저장되므로 무시
+            });
+        }, 5000);
+        return () => clearTimeout(timer);
+    }, [content, assignmentId, studentId, submitted, submissionInfo]);
+
     // 쿨타임 타이머
     useEffect(() => {
       if (hintCooldown > 0) {
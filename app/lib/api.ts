@@ -73,17 +73,72 @@ export const deleteStudent = (student: {
   class_id: number;
 }) => api.post('/students/delete', student);
 
+// 학생 진행 현황 (제출/피드백 수, 최근 점수, 수정 비율, 정량 지표 추이)
+export const getStudentProgress = (studentId: number) =>
+  api.get(`/students/${studentId}/progress`);
+
 // 학생 분석 관련 함수
 export const getStudentAnalysis = (analysis_data: { student_id: number }) =>
   api.get('/analysis', {
     params: analysis_data,
   });
 
-export const createStudentAnalysis = (analysis_source: {
+type AnalysisSource = {
   level: string;
   grade: string;
   submissions: object;
-}) => api.post('/analysis/', { analysis_source });
+  engine?: "fanout" | "structured";
+  force?: boolean;
+};
+
+export const createStudentAnalysis = (analysis_source: AnalysisSource) =>
+  api.post('/analysis/', { analysis_source });
+
+// 영역별 분석이 끝나는 대로 dimension → comprehensive → done 이벤트 (실패 시 error)
+export const streamStudentAnalysis = (
+  analysis_source: AnalysisSource,
+  onEvent: (event: string, data: any) => void,
+) => postEventStream('/analysis/stream', { analysis_source }, onEvent);
+
+// SSE 스트리밍 요청 (POST 본문과 인증 헤더가 필요해 EventSource 대신 fetch 사용)
+export const postEventStream = async (
+  url: string,
+  body: object,
+  onEvent: (event: string, data: any) => void,
+) => {
+  const token =
+    typeof window !== 'undefined' ? localStorage.getItem('token') : null;
+  const res = await fetch(`${api.defaults.baseURL}${url}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+    body: JSON.stringify(body),
+  });
+  if (!res.ok || !res.body) throw new Error(`요청 실패 (${res.status})`);
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = 'message';
+      let data = '';
+      for (const line of block.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data += line.slice(5).trim();
+      }
+      if (data) onEvent(event, JSON.parse(data));
+    }
+  }
+};
 
 // 과제 관련 함수
 export const getAssignments = (classId: number) =>
@@ -183,6 +238,7 @@ export const getESubmission = (params: {
 }) => api.get('/submission/e', { params });
 
 export const getMidFeedback = (feedback_data: {
+  assignment_id?: number | null;
   condition?: string;
   guide?: string;
   content: string;
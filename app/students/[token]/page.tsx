@@ -2,7 +2,7 @@
 import { useEffect, useState } from "react";
 import { useRouter, useParams } from "next/navigation";
 import useAuth from "../../hooks/auth";
-import { getASubmission, getAssignment, createStudentAnalysis, getStudentAnalysis, getESubmission, getEvaluation } from "../../lib/api";
+import { getASubmission, getAssignment, streamStudentAnalysis, getStudentAnalysis, getESubmission, getEvaluation, getStudentProgress } from "../../lib/api";
 import ReactMarkdown from 'react-markdown';
 import remarkGfm from 'remark-gfm'
 import { useRef } from "react";
@@ -79,6 +79,8 @@ export default function StudentDetailPage() {
   const [revisedCount, setRevisedCount] = useState(0)
   const [analysisLoading, setAnalysisLoading] = useState(false); // 분석 중 로딩 상태
   const [analysisResult, setAnalysisResult] = useState<any | null>(null); // 실제 분석 결과
+  const [analysisStreaming, setAnalysisStreaming] = useState(false); // 영역별 결과 수신 중
+  const [progress, setProgress] = useState<any | null>(null); // 서버에서 집계한 진행 현황
   const [modalOpen, setModalOpen] = useState(false);
   const [modalContent, setModalContent] = useState<{ title: string, content: string } | null>(null);
   const modalRef = useRef<HTMLDivElement>(null);
@@ -215,6 +217,11 @@ export default function StudentDetailPage() {
         }
       })();
 
+      // 진행 현황 (서버 집계 테이블 한 번 조회)
+      getStudentProgress(studentId)
+        .then(({ data }) => setProgress(data))
+        .catch(() => setProgress(null));
+
       // 동시에 데이터를 가져오고 상태 업데이트
       try {
         const [analysisResultData, submissionsData] = await Promise.all([analysisPromise, submissionsPromise, eSubPromise]);
@@ -243,16 +250,35 @@ export default function StudentDetailPage() {
         .map(s => s.revised_content),
     }
     setAnalysisLoading(true);
+    setAnalysisStreaming(true);
     setShowAnalysis(true);
     setLastAnalysisTime(new Date());
+    setAnalysisResult(null);
     try {
-      const result = await createStudentAnalysis(analysis_source);
-      console.log("줘봐라", result.data)
-      setAnalysisResult(result.data); // result.data에 분석 결과가 있다고 가정
+      await streamStudentAnalysis(analysis_source, (event, data) => {
+        if (event === "dimension") {
+          // 먼저 끝난 영역부터 바로 표시
+          setAnalysisLoading(false);
+          setAnalysisResult((prev: any) => ({ ...prev, [`${data.dimension}_result`]: data.result }));
+        } else if (event === "comprehensive") {
+          setAnalysisResult((prev: any) => ({ ...prev, comprehensive_result: data.result }));
+        } else if (event === "done") {
+          setAnalysisResult(data.result);
+          // 제출물이 바뀌지 않아 지난 분석을 그대로 받은 경우 그 분석 시각 표시
+          if (data.result?.analysis_decision?.status === "reused") {
+            setLastAnalysisTime(new Date(data.result.analysis_decision.created_at));
+          }
+        } else if (event === "error") {
+          throw new Error(data.detail);
+        }
+      });
     } catch (e) {
+      console.error("분석 실패:", e);
+      toast.error("분석에 실패했습니다.");
       setAnalysisResult(null);
     } finally {
       setAnalysisLoading(false);
+      setAnalysisStreaming(false);
     }
   }
 
@@ -261,6 +287,23 @@ export default function StudentDetailPage() {
   return (
     <div className="p-8 w-full mx-auto">
       <h1 className="text-2xl font-extrabold mb-6 text-blue-700 tracking-tight">학생 상세</h1>
+      {progress && (
+        <div className="flex flex-wrap gap-3 mb-6 text-sm">
+          {[
+            ["제출한 과제", `${progress.assignment_count}개`],
+            ["최종 제출", `${progress.final_submitted_count}개`],
+            ["제출한 평가", `${progress.evaluation_count}개`],
+            ["받은 피드백", `${progress.feedback_count}개`],
+            ["최근 점수", progress.latest_score ?? "-"],
+            ["평균 수정 비율", progress.revision_ratio != null ? `${Math.round(progress.revision_ratio * 100)}%` : "-"],
+          ].map(([label, value]) => (
+            <div key={label} className="bg-blue-50 rounded-lg px-4 py-2">
+              <span className="text-gray-500 mr-2">{label}</span>
+              <span className="font-bold text-blue-800">{value}</span>
+            </div>
+          ))}
+        </div>
+      )}
       <div className="flex justify-between items-center mb-8">
         <div className="flex gap-4">
           <button
@@ -395,7 +438,9 @@ export default function StudentDetailPage() {
                         const content =
                           analysisResult && analysisResult[`${area.key}_result`]
                             ? analysisResult[`${area.key}_result`]
-                            : DUMMY_ANALYSIS[area.key as keyof typeof DUMMY_ANALYSIS];
+                            : analysisStreaming
+                              ? "분석 중..."
+                              : DUMMY_ANALYSIS[area.key as keyof typeof DUMMY_ANALYSIS];
                         return (
                           <div
                             key={area.key}
@@ -422,7 +467,7 @@ export default function StudentDetailPage() {
                           <div className="text-lg font-bold text-blue-700 mb-2">뛰어난 점</div>
                           <div className="prose max-w-none text-gray-800">
                             <ReactMarkdown remarkPlugins={[remarkGfm]} components={markdownComponents}>
-                              {analysisResult.comprehensive_result?.strength}
+                              {analysisResult?.comprehensive_result?.strength ?? (analysisStreaming ? "종합 분석 중..." : "")}
                             </ReactMarkdown>
                           </div>
                         </div>
@@ -431,7 +476,7 @@ export default function StudentDetailPage() {
                           <div className="text-lg font-bold text-red-700 mb-2">아쉬운 점</div>
                           <div className="prose max-w-none text-gray-800">
                             <ReactMarkdown remarkPlugins={[remarkGfm]} components={markdownComponents}>
-                              {analysisResult.comprehensive_result?.weakness}
+                              {analysisResult?.comprehensive_result?.weakness ?? (analysisStreaming ? "종합 분석 중..." : "")}
                             </ReactMarkdown>
                           </div>
                         </div>
@@ -440,7 +485,7 @@ export default function StudentDetailPage() {
                           <div className="text-xl font-bold text-blue-900 mb-4">총평</div>
                           <div className="prose max-w-none text-gray-800">
                             <ReactMarkdown remarkPlugins={[remarkGfm]} components={markdownComponents}>
-                              {analysisResult.comprehensive_result?.overall}
+                              {analysisResult?.comprehensive_result?.overall ?? (analysisStreaming ? "종합 분석 중..." : "")}
                             </ReactMarkdown>
                           </div>
                         </div>
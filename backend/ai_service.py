@@ -0,0 +1,87 @@
+"""AI 라우터와 일괄 처리에서 공유하는 프롬프트 변수 구성 함수"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from student_context import get_owned_student_context, get_student_context
+
+
+async def build_mid_feedback_variables(feedback_data: dict, db: AsyncSession) -> dict:
+    # 학생 → 학급 → 교사 정보를 한 번에 조회
+    context = await get_student_context(db, feedback_data['student_id'])
+
+    return {
+        "grade" : context.grade,
+        "condition" : feedback_data['condition'],
+        "guide" : feedback_data['guide'],
+        "content" : feedback_data['content'],
+        "feedback_guide" : context.feedback_guide,
+        "additional_instructions" : feedback_data.get('additional_instructions', '')
+    }
+
+
+async def build_final_feedback_variables(
+    feedback_data: dict, db: AsyncSession, user: models.User
+) -> dict:
+    context = await get_owned_student_context(db, feedback_data['studentId'], user.id)
+
+    return {
+        "school_level" : context.school_level,
+        "grade" : context.grade,
+        "condition": feedback_data['condition'],
+        "guide": feedback_data['guide'],
+        "content": feedback_data['content'],
+        "feedback_guide" : context.feedback_guide,
+        "additional_instructions": feedback_data.get('additional_instructions', '')
+    }
+
+
+def fallback_mid_feedback(feedback_data: dict) -> str:
+    """AI를 쓸 수 없을 때(회로 차단기 open) 보여 줄 기본 안내"""
+    lines = [
+        "## 지금 쓴 글이 조건과 안내를 모두 지키고 있나요?",
+        "지금은 AI 피드백을 받을 수 없어서 스스로 점검해 볼 내용을 알려 줄게요.",
+    ]
+    if feedback_data.get('condition'):
+        lines.append(f"- 글쓰기 조건: {feedback_data['condition']}")
+    if feedback_data.get('guide'):
+        lines.append(f"- 선생님 안내: {feedback_data['guide']}")
+    lines.append("내 생각이 분명하게 드러나는지, 그 까닭과 예시를 충분히 썼는지 한 문장씩 다시 읽어 보세요.")
+    lines.append("잠시 후에 AI 피드백을 다시 요청할 수 있어요.")
+    return "\n".join(lines)
+
+
+def clean_final_feedback(result: str) -> str:
+    return result.replace("teacher_feedback :", "")
+
+
+def criteria_dict_to_table(criteria: dict) -> str:
+
+    lines = []
+    for key, value in criteria.items():
+        lines.append(f"{key} | {value}")
+    return "\n".join(lines)
+
+
+async def build_score_variables(score_data: dict, db: AsyncSession) -> dict:
+    print("채점데이터 :", score_data)
+    context = await get_student_context(db, score_data['studentId'])
+
+    criteria = criteria_dict_to_table(score_data['criteria'])
+
+    return {
+        "feedback_guide": context.feedback_guide,
+        "item": score_data.get("guide", ""),
+        "criteria": criteria,
+        "content": score_data.get("content", "")
+    }
+
+
+def match_criteria_level(result: str, criteria: dict):
+    """채점 결과가 평가 기준의 단계명 중 하나인지 확인 (아니면 None)"""
+    level = result.strip().strip("\"'`*.[]() ")
+    if level in criteria:
+        return level
+    # "중입니다" 처럼 단계명 하나만 포함된 경우 허용
+    matched = [key for key in criteria if key in level]
+    return matched[0] if len(matched) == 1 else None
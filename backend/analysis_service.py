@@ -0,0 +1,240 @@
+"""학생 글쓰기 분석 - 라우터와 작업 워커에서 공유"""
+
+import asyncio
+import hashlib
+import json
+import os
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import crud
+from llm_registry import llm_registry
+from prompt_budget import truncate_tokens
+from spell_check import check_submissions, format_findings, spelling_report
+from student_context import get_student_context
+from writing_metrics import compute_metrics, format_metrics
+
+ANALYSIS_DIMENSIONS = ("grammar", "spelling", "sentence", "structure", "vocab")
+ANALYSIS_SUBMISSION_TOKENS = int(os.getenv("ANALYSIS_SUBMISSION_TOKENS", "2500"))
+# 분석 방식: fanout(영역별 5회 + 종합 1회 호출) | structured(JSON 스키마 1회 호출)
+ANALYSIS_ENGINE = os.getenv("ANALYSIS_ENGINE", "fanout")
+# 맞춤법 영역: llm(규칙 검사 결과를 근거로 LLM 분석) | rules(규칙 검사 결과로 직접 작성, fanout의 LLM 호출 1회 절약)
+SPELLING_ANALYSIS = os.getenv("SPELLING_ANALYSIS", "llm")
+
+
+def submission_fingerprint(submissions) -> str:
+    """분석에 쓰인 제출물 id와 내용의 해시 (같으면 새로 분석할 필요 없음)"""
+    payload = json.dumps(
+        [[s.id, s.revised_content or s.content or ""] for s in submissions],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def merge_submission(submissions) :
+    # 제출물 하나가 너무 길면 나머지 제출물이 잘리지 않도록 제출물별로 먼저 자름
+    result = ""
+    for i, s in enumerate(submissions) :
+        s = truncate_tokens(s, ANALYSIS_SUBMISSION_TOKENS)
+        result += f"""
+------------------------------------
+{i} student example :
+{s} 
+
+        """
+
+    return result
+
+
+async def analyze_fanout(analysis_variables: dict, on_result=None) -> dict:
+    """영역별 분석 5개를 병렬 실행한 뒤 그 결과로 종합 분석 생성
+
+    on_result: 영역별/종합 결과가 나올 때마다 (키, 결과)로 호출할 비동기 함수
+    analysis_variables에 spelling_report가 있으면 맞춤법 영역은 LLM 대신 그 결과를 쓴다.
+    """
+    async def branch(dimension):
+        if dimension == "spelling" and analysis_variables.get("spelling_report"):
+            result = analysis_variables["spelling_report"]
+        else:
+            result = await llm_registry.ainvoke(f"{dimension}_analysis", analysis_variables)
+        if on_result is not None:
+            await on_result(f"{dimension}_result", result)
+        return result
+
+    branch_results = await asyncio.gather(*[
+        branch(dimension) for dimension in ANALYSIS_DIMENSIONS
+    ])
+    results = {
+        f"{dimension}_result": result
+        for dimension, result in zip(ANALYSIS_DIMENSIONS, branch_results)
+    }
+    # Generate comprehensive analysis
+    comprehensive_result = await llm_registry.ainvoke("comprehensive_analysis", {
+        "grammar_result": results["grammar_result"],
+        "spelling_result": results["spelling_result"],
+        "sentence_result": results["sentence_result"],
+        "structure_result": results["structure_result"],
+        "vocab_result": results["vocab_result"]
+    })
+    comprehensive_results = comprehensive_result.split("###")
+    comp_dict = {
+        "strength" : comprehensive_results[1].replace("뛰어난 점", ""),
+        "weakness" : comprehensive_results[2].replace("아쉬운 점", ""),
+        "overall" : comprehensive_results[3].replace("총평", "")
+        }
+    results["comprehensive_result"] = comp_dict
+    if on_result is not None:
+        await on_result("comprehensive_result", comp_dict)
+    return results
+
+
+async def analyze_structured(analysis_variables: dict, on_result=None) -> dict:
+    """영역별 + 종합 분석을 JSON 스키마로 고정한 호출 한 번으로 생성 (결과 형식은 fanout과 같음)
+
+    on_result는 호출이 끝난 뒤 영역 순서대로 한꺼번에 호출된다.
+    """
+    result = await llm_registry.ainvoke("structured_analysis", analysis_variables)
+    try:
+        data = json.loads(result)
+        results = {
+            f"{dimension}_result": str(data[dimension])
+            for dimension in ANALYSIS_DIMENSIONS
+        }
+        results["comprehensive_result"] = {
+            key: str(data["comprehensive"][key])
+            for key in ("strength", "weakness", "overall")
+        }
+    except (ValueError, KeyError, TypeError):
+        print(f"❌ 구조화 분석 응답 해석 실패: {result[:200]!r}")
+        raise HTTPException(502, '분석 결과를 해석하지 못했습니다. 다시 시도해주세요.')
+    if on_result is not None:
+        for key, value in results.items():
+            await on_result(key, value)
+    return results
+
+
+ANALYSIS_ENGINES = {
+    "fanout": analyze_fanout,
+    "structured": analyze_structured,
+}
+
+
+def _analysis_engine(source: dict) -> str:
+    engine = source.get('engine') or ANALYSIS_ENGINE
+    if engine not in ANALYSIS_ENGINES:
+        raise HTTPException(400, f"알 수 없는 분석 방식입니다: {engine}")
+    return engine
+
+
+async def _analysis_decision(db: AsyncSession, source: dict, engine: str):
+    """최신 제출물 3개, 지난 분석, 새로 분석할 이유(unchanged면 재사용)"""
+    rows = await crud.get_latest_student_submission_rows(db, source.get('student_id'), n=3)
+    fingerprint = submission_fingerprint(rows)
+    last_result = await crud.get_latest_student_analysis(db, source.get('student_id'))
+    last_source = getattr(last_result, 'analysis_source', None)
+
+    if last_result is None:
+        reason = "first"
+    elif not isinstance(last_source, dict) or last_source.get('fingerprint') != fingerprint:
+        reason = "changed"
+    elif last_source.get('engine', engine) != engine:
+        reason = "engine_changed"
+    elif source.get('force'):
+        reason = "forced"
+    else:
+        reason = "unchanged"
+    return rows, fingerprint, last_result, reason
+
+
+def _reused_result(last_result) -> dict:
+    return {
+        **last_result.analysis_result,
+        "analysis_decision": {
+            "status": "reused",
+            "reason": "unchanged",
+            "analysis_id": last_result.id,
+            "created_at": last_result.created_at.isoformat(),
+        },
+    }
+
+
+async def find_reused_analysis(db: AsyncSession, source: dict):
+    """LLM 호출 없이 지난 분석을 그대로 돌려줄 요청이면 그 결과, 아니면 None (속도 제한 차감 전 확인용)"""
+    _, _, last_result, reason = await _analysis_decision(db, source, _analysis_engine(source))
+    return _reused_result(last_result) if reason == "unchanged" else None
+
+
+async def run_student_analysis(db: AsyncSession, source: dict, on_result=None) -> dict:
+    """학생의 최근 제출물 3개로 영역별/종합 분석을 생성하고 저장
+
+    source['engine']으로 요청마다 분석 방식을 고를 수 있다 (기본 ANALYSIS_ENGINE)
+    지난 분석과 제출물/분석 방식이 같으면 저장된 결과를 돌려주고, source['force']가 참이면 다시 분석한다.
+    결과의 analysis_decision에 재사용/생성 여부와 이유(unchanged/first/changed/engine_changed/forced)를 담는다.
+    on_result는 새로 분석할 때 영역별/종합 결과가 나올 때마다 호출된다 (스트리밍용).
+    """
+    student_id = source.get('student_id')
+    engine = _analysis_engine(source)
+
+    # 1~2. 최신 제출물 3개와 지난 분석 조회, 제출물과 분석 방식이 그대로면 저장된 결과 반환
+    rows, fingerprint, last_result, reason = await _analysis_decision(db, source, engine)
+    if reason == "unchanged":
+        return _reused_result(last_result)
+    # Prefer revised_content if available, else content
+    latest_submissions = [s.revised_content if s.revised_content else s.content for s in rows]
+
+    # 3. 지난 분석 요약(압축본) 준비
+    last_summary = None
+    last_analysis_result = getattr(last_result, 'analysis_result', None) if last_result is not None else None
+    if last_analysis_result is not None and isinstance(last_analysis_result, dict):
+        # 종합 결과의 총평만 요약으로 사용 (전체 결과를 넣으면 토큰이 크게 늘어남)
+        comprehensive = last_analysis_result.get('comprehensive_result') or {}
+        last_summary = (
+            last_analysis_result.get('overall')
+            or comprehensive.get('overall')
+            or str(last_analysis_result)
+        )
+    else:
+        last_summary = "이전 분석 없음"
+
+    # 4. 분석 입력 구성 (정량 지표와 맞춤법 규칙 검사는 LLM 없이 계산해 함께 저장)
+    metrics = compute_metrics(latest_submissions)
+    spelling_findings = check_submissions(latest_submissions)
+    analysis_input = {
+        'last_summary': last_summary,
+        'submissions': latest_submissions,
+        'engine': engine,
+        'fingerprint': fingerprint,
+        'metrics': metrics,
+        'spelling_findings': spelling_findings,
+    }
+    # 요청에 학교급/학년이 없으면 학생 컨텍스트에서 채움
+    context = await get_student_context(db, student_id)
+    level = source.get('level') or context.school_level
+    grade = source.get('grade') or context.grade
+
+    # 5. 기존 merge_submission 함수 활용
+    submissions_merged = merge_submission(latest_submissions)
+
+    analysis_variables = {
+        "level" : level,
+        "grade" : grade,
+        "submissions" : submissions_merged,
+        "last_summary": last_summary,
+        "metrics": format_metrics(metrics),
+        "spelling_findings": format_findings(spelling_findings),
+    }
+    if SPELLING_ANALYSIS == "rules":
+        analysis_variables["spelling_report"] = spelling_report(spelling_findings, latest_submissions)
+    results = await ANALYSIS_ENGINES[engine](analysis_variables, on_result)
+    # 6. DB 저장
+    saved = await crud.create_student_analysis_result(db, student_id, analysis_input, results)
+    return {
+        **results,
+        "analysis_decision": {
+            "status": "generated",
+            "reason": reason,
+            "analysis_id": saved.id,
+            "created_at": saved.created_at.isoformat(),
+        },
+    }
\ No newline at end of file
@@ -0,0 +1,261 @@
+"""학급 단위 AI 일괄 처리
+
+LLM 호출은 세마포어로 동시성을 제한해 병렬로 보내고, 진행 상황은 batch_runs
+테이블에 기록해 여러 워커 프로세스 어디서든 조회할 수 있게 한다.
+"""
+
+import asyncio
+import os
+from datetime import datetime
+
+from sqlalchemy.future import select
+
+import crud, models, student_progress
+from ai_service import (
+    build_final_feedback_variables,
+    clean_final_feedback,
+    criteria_dict_to_table,
+    match_criteria_level,
+)
+from analysis_service import run_student_analysis
+from database import AsyncSessionLocal
+from llm_registry import llm_registry
+from prompts import merge_feedback_guide
+
+BATCH_CONCURRENCY = int(os.getenv("AI_BATCH_CONCURRENCY", "5"))
+SCORE_CONCURRENCY = int(os.getenv("AI_SCORE_CONCURRENCY", "10"))
+# 학생 분석은 1명당 LLM 호출이 여러 번(fanout 6회)이므로 동시에 분석할 학생 수를 따로 둠
+ANALYSIS_BATCH_CONCURRENCY = int(os.getenv("AI_ANALYSIS_BATCH_CONCURRENCY", "3"))
+
+# 실행 중인 태스크가 GC 되지 않도록 참조 유지
+_background_tasks = set()
+
+
+def start_background(coro):
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+class BatchProgress:
+    """완료/실패 건수를 세고 batch_runs 행에 반영"""
+
+    def __init__(self, batch_id: int):
+        self.batch_id = batch_id
+        self.completed = 0
+        self.failed = 0
+        self.errors = []
+        self._lock = asyncio.Lock()
+
+    async def _flush(self, **fields):
+        async with self._lock:
+            async with AsyncSessionLocal() as db:
+                await crud.update_batch_run(
+                    db,
+                    self.batch_id,
+                    completed=self.completed,
+                    failed=self.failed,
+                    errors=list(self.errors),
+                    **fields,
+                )
+
+    async def start(self, total: int):
+        await self._flush(status=models.BatchRunStatus.running, total=total)
+
+    async def record(self, ok: bool, error: dict = None):
+        if ok:
+            self.completed += 1
+        else:
+            self.failed += 1
+            self.errors.append(error)
+        await self._flush()
+
+    async def finish(self, status: models.BatchRunStatus):
+        await self._flush(status=status, finished_at=datetime.utcnow())
+
+
+async def run_final_feedback_batch(
+    batch_id: int, assignment_id: int, user_id: int, additional_instructions: str = ""
+):
+    """final_submitted 제출물 전체의 최종 피드백을 생성해 AFeedback에 한 번에 저장"""
+    progress = BatchProgress(batch_id)
+    try:
+        # 1. 과제/교사/제출물을 읽고 학생별 프롬프트 변수 구성
+        targets = []
+        async with AsyncSessionLocal() as db:
+            user = await db.get(models.User, user_id)
+            assignment = await db.get(models.Assignment, assignment_id)
+            submissions = await crud.get_final_submitted_submissions(db, assignment_id)
+            await progress.start(len(submissions))
+
+            for submission in submissions:
+                try:
+                    variables = await build_final_feedback_variables(
+                        {
+                            "studentId": submission.student_id,
+                            "condition": assignment.condition,
+                            "guide": assignment.guide,
+                            "content": submission.revised_content
+                            or submission.content,
+                            "additional_instructions": additional_instructions,
+                        },
+                        db,
+                        user,
+                    )
+                except Exception as e:
+                    await progress.record(
+                        False, {"student_id": submission.student_id, "error": str(e)}
+                    )
+                    continue
+                feedback_id = (
+                    submission.assign_feedback[0].id
+                    if submission.assign_feedback
+                    else None
+                )
+                targets.append((submission, feedback_id, variables))
+
+        # 2. 동시성 제한 하에 LLM 호출
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def generate(submission, variables):
+            async with semaphore:
+                try:
+                    result = await llm_registry.ainvoke("final_feedback", variables)
+                except Exception as e:
+                    await progress.record(
+                        False, {"student_id": submission.student_id, "error": str(e)}
+                    )
+                    return None
+            await progress.record(True)
+            return clean_final_feedback(result)
+
+        results = await asyncio.gather(
+            *[generate(submission, variables) for submission, _, variables in targets]
+        )
+
+        # 3. 한 트랜잭션으로 AFeedback 반영
+        async with AsyncSessionLocal() as db:
+            feedback_ids = [feedback_id for _, feedback_id, _ in targets if feedback_id]
+            stmt = select(models.AFeedback).where(models.AFeedback.id.in_(feedback_ids))
+            feedbacks = {f.id: f for f in (await db.execute(stmt)).scalars().all()}
+
+            for (submission, feedback_id, _), result in zip(targets, results):
+                if result is None:
+                    continue
+                feedback = feedbacks.get(feedback_id)
+                if feedback is None:
+                    db.add(
+                        models.AFeedback(
+                            assign_submission_id=submission.id,
+                            assignment_id=assignment_id,
+                            student_id=submission.student_id,
+                            content=result,
+                        )
+                    )
+                else:
+                    feedback.content = result
+                await student_progress.record_feedback(db, submission)
+            await db.commit()
+
+        await progress.finish(models.BatchRunStatus.completed)
+    except Exception as e:
+        print(f"❌ 최종 피드백 일괄 생성 실패 (batch {batch_id}): {e}")
+        progress.errors.append({"error": str(e)})
+        await progress.finish(models.BatchRunStatus.failed)
+
+
+async def run_class_analysis_batch(
+    batch_id: int, class_id: int, engine: str = None, force: bool = False
+):
+    """학급 학생 전체의 글쓰기 분석을 생성 (학생별로 끝나는 대로 AnalysisResult 저장)
+
+    한 학생의 실패는 errors에 남기고 나머지 학생은 계속 진행한다.
+    지난 분석 이후 제출물이 그대로인 학생은 LLM 호출 없이 완료로 센다 (force면 다시 분석).
+    """
+    progress = BatchProgress(batch_id)
+    try:
+        async with AsyncSessionLocal() as db:
+            students = await crud.get_students_by_class(db, class_id)
+            student_ids = [student.id for student in students]
+        await progress.start(len(student_ids))
+
+        semaphore = asyncio.Semaphore(ANALYSIS_BATCH_CONCURRENCY)
+
+        async def analyze(student_id):
+            async with semaphore:
+                try:
+                    # 학생마다 세션을 따로 써서 한 학생의 오류가 다른 학생 저장에 영향을 주지 않음
+                    async with AsyncSessionLocal() as db:
+                        contents = await crud.get_latest_student_submissions(db, student_id, n=3)
+                        if not any(contents):
+                            raise ValueError("분석할 제출물이 없습니다.")
+                        await run_student_analysis(
+                            db, {"student_id": student_id, "engine": engine, "force": force}
+                        )
+                except Exception as e:
+                    detail = getattr(e, "detail", None) or str(e)
+                    await progress.record(False, {"student_id": student_id, "error": detail})
+                    return
+            await progress.record(True)
+
+        await asyncio.gather(*[analyze(student_id) for student_id in student_ids])
+        await progress.finish(models.BatchRunStatus.completed)
+    except Exception as e:
+        print(f"❌ 학급 분석 일괄 생성 실패 (batch {batch_id}): {e}")
+        progress.errors.append({"error": str(e)})
+        await progress.finish(models.BatchRunStatus.failed)
+
+
+async def score_evaluation(db, evaluation: models.Evaluation, user: models.User) -> dict:
+    """평가의 제출 완료 답안을 한 번에 채점하고 점수를 일괄 저장"""
+    criteria = evaluation.criteria or {}
+    criteria_table = criteria_dict_to_table(criteria)
+    submissions = await crud.get_submitted_eval_submissions(db, evaluation.id)
+    # /ai/score(build_score_variables)와 같은 few-shot 가이드 문자열을 써야 같은 프롬프트가 됨
+    feedback_guide = user.merged_feedback_guide
+    if feedback_guide is None:
+        feedback_guide = merge_feedback_guide(user.feedback_guide)
+
+    semaphore = asyncio.Semaphore(SCORE_CONCURRENCY)
+
+    async def score(submission):
+        async with semaphore:
+            try:
+                result = await llm_registry.ainvoke("score", {
+                    "feedback_guide": feedback_guide,
+                    "item": evaluation.item or "",
+                    "criteria": criteria_table,
+                    "content": submission.content,
+                })
+            except Exception as e:
+                return submission, None, str(e)
+        return submission, result, None
+
+    outcomes = await asyncio.gather(*[score(s) for s in submissions])
+
+    scores, results, invalid, failed = [], [], [], []
+    for submission, result, error in outcomes:
+        if error is not None:
+            failed.append({"student_id": submission.student_id, "error": error})
+            continue
+        level = match_criteria_level(result, criteria)
+        if level is None:
+            invalid.append({"student_id": submission.student_id, "result": result.strip()})
+            continue
+        scores.append({"id": submission.id, "score": level})
+        results.append({
+            "student_id": submission.student_id,
+            "submission_id": submission.id,
+            "score": level,
+        })
+
+    await crud.bulk_update_eval_scores(db, scores)
+    return {
+        "evaluation_id": evaluation.id,
+        "total": len(submissions),
+        "scored": len(results),
+        "results": results,
+        "invalid": invalid,
+        "failed": failed,
+    }
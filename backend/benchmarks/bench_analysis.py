@@ -0,0 +1,150 @@
+"""학생 분석 방식 비교 벤치마크 (fanout vs fanout+rules vs structured)
+
+같은 분석 입력(학년, 지난 분석 요약, 제출물 3개)으로
+- fanout      : 영역별 분석 5회 병렬 호출 + 종합 분석 1회
+- fanout+rules: 맞춤법 영역을 규칙 검사 결과로 작성 (SPELLING_ANALYSIS=rules), LLM 호출 5회
+- structured  : JSON 스키마로 응답 형식을 고정한 호출 1회
+를 번갈아 실행해 분석 1회당 LLM 호출 수, 토큰, 예상 비용, 소요 시간과 결과 형식 일치 여부를 비교한다.
+캐시 효과를 빼기 위해 캐시는 끈다.
+
+실행: cd backend && python -m benchmarks.bench_analysis [반복 횟수]
+기본은 LLM_PROVIDER=fake (호출 수/입력 토큰/오버헤드만 의미 있음). 실제 응답 크기와 지연 시간,
+영역별 결과가 얼마나 비슷한지는 LLM_PROVIDER=record로 한 번 녹화한 뒤 replay로 반복 측정한다.
+"""
+
+import asyncio
+import difflib
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench_analysis.db")
+os.environ.setdefault("LLM_CACHE_MAXSIZE", "0")
+
+from analysis_service import ANALYSIS_DIMENSIONS, ANALYSIS_ENGINES, merge_submission
+from llm_registry import llm_registry
+from telemetry import LLM_COST, LLM_REQUESTS, LLM_TOKENS
+from spell_check import check_submissions, format_findings, spelling_report
+from writing_metrics import compute_metrics, format_metrics
+
+SUBMISSIONS = [
+    "나는 학교에서 휴대폰 사용을 허용해야 한다고 생각한다. 왜냐하면 모르는 것을 바로 찾아볼 수 있기 때문이다. "
+    "하지만 수업 시간에 게임을 하는 친구들이 생길수도 있다. 그래서 규칙을 정해서 사용하면 좋겠다. " * 4,
+    "우리 동네에는 작은 도서관이 있다. 나는 주말마다 그곳에 가서 책을 읽는다. 도서관은 조용하고 "
+    "책 냄새가 좋아서 마음이 편안해 진다. 앞으로 더 많은 친구들이 도서관을 이용했으면 좋겠다. " * 4,
+    "환경을 지키기 위해 우리가 할 수 있는 일은 많다. 첫째, 일회용품을 줄인다. 둘째, 분리수거를 "
+    "잘 한다. 셋째, 가까운 거리는 걸어서 다닌다. 작은 실천이 모이면 지구를 지킬 수 있다. " * 4,
+]
+
+
+def analysis_variables() -> dict:
+    return {
+        "level": "초등학교",
+        "grade": 5,
+        "submissions": merge_submission(SUBMISSIONS),
+        "last_summary": "이전 분석 없음",
+        "metrics": format_metrics(compute_metrics(SUBMISSIONS)),
+        "spelling_findings": format_findings(check_submissions(SUBMISSIONS)),
+    }
+
+
+def counter_total(counter, **match) -> float:
+    names = counter.labelnames
+    return sum(
+        value
+        for key, value in counter._values.items()
+        if all(key[names.index(k)] == v for k, v in match.items())
+    )
+
+
+def snapshot() -> dict:
+    return {
+        "calls": counter_total(LLM_REQUESTS),
+        "prompt": counter_total(LLM_TOKENS, type="prompt"),
+        "completion": counter_total(LLM_TOKENS, type="completion"),
+        "cost": counter_total(LLM_COST),
+    }
+
+
+def check_format(results: dict) -> list:
+    """기존 결과 형식(영역별 문자열 5개 + 종합 3항목)과 다른 점"""
+    problems = []
+    for dimension in ANALYSIS_DIMENSIONS:
+        text = results.get(f"{dimension}_result")
+        if not isinstance(text, str) or not text.strip():
+            problems.append(f"{dimension}_result 비어 있음")
+        elif "###" not in text:
+            problems.append(f"{dimension}_result 제목(###) 없음")
+    comprehensive = results.get("comprehensive_result") or {}
+    for key in ("strength", "weakness", "overall"):
+        if not str(comprehensive.get(key, "")).strip():
+            problems.append(f"comprehensive_result.{key} 비어 있음")
+    return problems
+
+
+async def main(n):
+    await llm_registry.startup()
+    variables = analysis_variables()
+    rules_variables = {
+        **variables,
+        "spelling_report": spelling_report(check_submissions(SUBMISSIONS), SUBMISSIONS),
+    }
+    runs = {
+        "fanout": (ANALYSIS_ENGINES["fanout"], variables),
+        "fanout+rules": (ANALYSIS_ENGINES["fanout"], rules_variables),
+        "structured": (ANALYSIS_ENGINES["structured"], variables),
+    }
+    stats = {engine: {"latency": [], "results": None} for engine in runs}
+    usage = {engine: dict.fromkeys(("calls", "prompt", "completion", "cost"), 0) for engine in runs}
+
+    # 워밍업
+    for analyze, engine_variables in runs.values():
+        await analyze(engine_variables)
+
+    # 시간에 따른 지연 변화가 한쪽에만 몰리지 않도록 번갈아 실행
+    for _ in range(n):
+        for engine, (analyze, engine_variables) in runs.items():
+            before = snapshot()
+            start = time.perf_counter()
+            stats[engine]["results"] = await analyze(engine_variables)
+            stats[engine]["latency"].append(time.perf_counter() - start)
+            after = snapshot()
+            for key in usage[engine]:
+                usage[engine][key] += after[key] - before[key]
+
+    print(f"분석 {n}회씩, 공급자 {os.environ['LLM_PROVIDER']}")
+    print(f"{'engine':<14}{'calls':>7}{'prompt':>9}{'completion':>12}{'cost($)':>10}{'p50(ms)':>10}{'max(ms)':>10}")
+    for engine in runs:
+        latency = stats[engine]["latency"]
+        u = usage[engine]
+        print(
+            f"{engine:<14}{u['calls'] / n:7.1f}{u['prompt'] / n:9.0f}{u['completion'] / n:12.0f}"
+            f"{u['cost'] / n:10.4f}{statistics.median(latency) * 1000:10.1f}{max(latency) * 1000:10.1f}"
+        )
+
+    print("\n결과 형식")
+    for engine in runs:
+        problems = check_format(stats[engine]["results"])
+        print(f"  {engine:<14}{'OK' if not problems else ', '.join(problems)}")
+
+    fanout, structured = stats["fanout"]["results"], stats["structured"]["results"]
+    print("\n영역별 결과 (길이, fanout과의 유사도)")
+    for dimension in ANALYSIS_DIMENSIONS:
+        a, b = fanout[f"{dimension}_result"], structured[f"{dimension}_result"]
+        ratio = difflib.SequenceMatcher(None, a, b).ratio()
+        print(f"  {dimension:<10} fanout {len(a):5d}자  structured {len(b):5d}자  유사도 {ratio:.2f}")
+    for key in ("strength", "weakness", "overall"):
+        a = fanout["comprehensive_result"][key].strip()
+        b = structured["comprehensive_result"][key].strip()
+        ratio = difflib.SequenceMatcher(None, a, b).ratio()
+        print(f"  {key:<10} fanout {len(a):5d}자  structured {len(b):5d}자  유사도 {ratio:.2f}")
+
+    await llm_registry.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5))
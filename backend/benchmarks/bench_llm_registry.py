@@ -0,0 +1,110 @@
+"""요청당 LLM 준비 오버헤드 벤치마크 (기존 방식 vs 레지스트리)
+
+네트워크 없이 httpx.MockTransport로 OpenAI 응답을 흉내 내고,
+- before: 요청마다 ChatOpenAI + 커넥션 풀 + ChatPromptTemplate 생성 (기존 라우터 방식)
+- after : 앱 시작 시 만든 공용 클라이언트/프롬프트를 llm_registry에서 조회
+두 경로의 요청당 소요 시간을 비교한다. 캐시 효과를 빼기 위해 캐시는 끈다.
+
+실행: cd backend && python -m benchmarks.bench_llm_registry [반복 횟수]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import httpx
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
+
+from llm_cache import response_cache
+from llm_registry import llm_registry
+from prompts import MID_FEEDBACK_PROMPT
+
+COMPLETION = {
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "## 질문\n예시 피드백입니다."},
+            "finish_reason": "stop",
+        }
+    ],
+    "usage": {"prompt_tokens": 900, "completion_tokens": 120, "total_tokens": 1020},
+}
+
+VARIABLES = {
+    "grade": "5",
+    "condition": "500자 이상",
+    "guide": "주장과 근거를 나누어 쓰기",
+    "content": "나는 학교에서 휴대폰 사용을 허용해야 한다고 생각한다. " * 20,
+    "feedback_guide": "예시 가이드",
+    "additional_instructions": "",
+}
+
+
+def mock_transport():
+    return httpx.MockTransport(lambda request: httpx.Response(200, json=COMPLETION))
+
+
+async def before(transport):
+    # 기존 라우터와 동일하게 요청마다 클라이언트/프롬프트/체인을 새로 만든다
+    http_client = httpx.AsyncClient(transport=transport)
+    llm = ChatOpenAI(
+        temperature=0.3,
+        model="gpt-4o-mini",
+        verbose=False,
+        http_async_client=http_client,
+    )
+    prompt = ChatPromptTemplate.from_messages(MID_FEEDBACK_PROMPT.messages)
+    chain = prompt | llm | StrOutputParser()
+    result = await chain.ainvoke(VARIABLES)
+    await http_client.aclose()
+    return result
+
+
+async def after():
+    return await llm_registry.ainvoke("mid_feedback", VARIABLES)
+
+
+async def measure(fn, n):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(
+        f"{label:<8} mean={statistics.mean(samples):7.3f}ms "
+        f"p50={statistics.median(samples):7.3f}ms p95={p95:7.3f}ms"
+    )
+
+
+async def main(n):
+    response_cache.maxsize = 0
+    transport = mock_transport()
+    await llm_registry.startup(transport=transport)
+
+    # 워밍업
+    await before(transport)
+    await after()
+
+    report("before", await measure(lambda: before(transport), n))
+    report("after", await measure(after, n))
+    await llm_registry.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
@@ -0,0 +1,176 @@
+"""백엔드 전체 부하 테스트 (fake / cassette LLM 공급자)
+
+OpenAI 대신 LLM_PROVIDER=fake 로컬 모델(기본값)이나 녹화된 cassette(replay)를 붙이고, 임시 SQLite DB에 학생을 만든 뒤
+같은 프로세스에서 띄운 uvicorn 서버(127.0.0.1)에 동시 요청을 보낸다.
+라우터 → 속도 제한 → 학생 컨텍스트 → 프롬프트 → LLM 동시 실행 제한까지 실제 경로를 그대로 거치므로
+API 비용 없이 처리량과 꼬리 지연(p95/p99)을 측정할 수 있다.
+캐시/병합 효과를 빼기 위해 요청마다 글 내용을 다르게 하고 캐시는 끈다.
+
+실행: cd backend && python -m benchmarks.bench_load [요청 수] [동시 사용자 수]
+fake 모델 설정은 FAKE_LLM_* 환경변수로 바꿀 수 있다. (README 참고)
+
+요청 내용은 요청 번호로만 정해지므로, 한 번 LLM_PROVIDER=record로 실제 OpenAI 응답을 녹화해 두면
+이후 LLM_PROVIDER=replay로 같은 부하를 실제 응답 크기와 지연 시간 그대로 반복 측정할 수 있다.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench_load.db")
+os.environ.setdefault("LLM_CACHE_MAXSIZE", "0")
+os.environ.setdefault("AI_RATE_STUDENT_BURST", "1000000")
+os.environ.setdefault("AI_RATE_TEACHER_BURST", "1000000")
+
+import httpx
+import uvicorn
+
+import database
+import models
+from main import app
+from rate_limit import llm_concurrency
+
+STUDENTS = 30
+
+
+async def seed() -> list:
+    async with database.AsyncSessionLocal() as db:
+        teacher = models.User(
+            email="bench@example.com",
+            hashed_password="-",
+            name="부하테스트",
+            school_level=models.SchoolLevel.elementary,
+            feedback_guide={},
+        )
+        db.add(teacher)
+        await db.flush()
+        school_class = models.SchoolClass(
+            name="5학년 1반", school_level=models.SchoolLevel.elementary, user_id=teacher.id
+        )
+        db.add(school_class)
+        await db.flush()
+        students = [
+            models.Student(class_id=school_class.id, number=i + 1, name=f"학생{i + 1}")
+            for i in range(STUDENTS)
+        ]
+        db.add_all(students)
+        await db.commit()
+        return [student.id for student in students]
+
+
+def payload(student_ids, i):
+    return {
+        "student_id": student_ids[i % len(student_ids)],
+        "condition": "500자 이상",
+        "guide": "주장과 근거를 나누어 쓰기",
+        "content": f"({i}) 나는 학교에서 휴대폰 사용을 허용해야 한다고 생각한다. " * 10,
+    }
+
+
+async def mid_feedback(client, body):
+    start = time.perf_counter()
+    response = await client.post("/ai/mid_feedback", json=body)
+    response.raise_for_status()
+    return time.perf_counter() - start, None
+
+
+async def mid_feedback_stream(client, body):
+    start = time.perf_counter()
+    ttft = None
+    async with client.stream("POST", "/ai/mid_feedback/stream", json=body) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if ttft is None and line == "event: token":
+                ttft = time.perf_counter() - start
+            if line.startswith("data:") and '"detail"' in line:
+                raise RuntimeError(json.loads(line[5:])["detail"])
+    return time.perf_counter() - start, ttft
+
+
+async def run(fn, client, student_ids, n, concurrency):
+    latencies, ttfts, errors = [], [], 0
+    queue = iter(range(n))
+
+    async def user():
+        nonlocal errors
+        for i in queue:
+            try:
+                latency, ttft = await fn(client, payload(student_ids, i))
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(latency)
+            if ttft is not None:
+                ttfts.append(ttft)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, ttfts, errors
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+
+
+def report(label, elapsed, latencies, ttfts, errors):
+    if not latencies:
+        print(f"{label:<12} 성공한 요청 없음 (오류 {errors}건)")
+        return
+    line = (
+        f"{label:<12} {len(latencies) / elapsed:7.1f} req/s  "
+        f"p50={statistics.median(latencies) * 1000:7.1f}ms "
+        f"p95={percentile(latencies, 0.95):7.1f}ms p99={percentile(latencies, 0.99):7.1f}ms"
+    )
+    if ttfts:
+        line += f"  ttft p50={statistics.median(ttfts) * 1000:6.1f}ms p95={percentile(ttfts, 0.95):6.1f}ms"
+    print(line + f"  오류={errors}")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def main(n, concurrency):
+    database.engine.echo = False
+    # ASGITransport는 응답 본문을 모아서 돌려주므로 TTFT 측정을 위해 실제 서버를 띄운다
+    port = free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    student_ids = await seed()
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{port}", timeout=None, limits=limits
+    ) as client:
+        # 워밍업 (FAKE_LLM_FAILURE_RATE로 실패할 수 있음)
+        await client.post("/ai/mid_feedback", json=payload(student_ids, -1))
+
+        print(f"요청 {n}건, 동시 사용자 {concurrency}명, LLM 동시 실행 {llm_concurrency.stats()}")
+        report("mid", *await run(mid_feedback, client, student_ids, n, concurrency))
+        report("mid/stream", *await run(mid_feedback_stream, client, student_ids, n, concurrency))
+
+    server.should_exit = True
+    await server_task
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+        )
+    )
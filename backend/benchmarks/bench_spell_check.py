@@ -0,0 +1,63 @@
+"""맞춤법 규칙 검사 처리량 벤치마크 (규칙마다 str.find vs Aho–Corasick)
+
+학급 규모의 글에 대해
+- naive: 사전 규칙마다 글 전체를 str.find로 훑음 (규칙 수 x 글 길이)
+- aho  : spell_check의 오토마톤으로 글을 한 번만 훑음
+두 방식의 사전 검사 처리량과 찾은 위치 수를 비교한다. 문장부호 정규식은 두 방식 모두 같아서 제외한다.
+
+실행: cd backend && python -m benchmarks.bench_spell_check [글 수]
+"""
+
+import statistics
+import sys
+import time
+
+import spell_check
+from benchmarks.bench_writing_metrics import make_essays
+
+TYPOS = ["되요", "할수있", "몇일", "것같", "할때", "금새", "생길수도"]
+
+
+def naive_matches(text: str) -> int:
+    found = 0
+    for wrong, _, _, _ in spell_check._PATTERNS:
+        start = text.find(wrong)
+        while start != -1:
+            found += 1
+            start = text.find(wrong, start + 1)
+    return found
+
+
+def aho_matches(text: str) -> int:
+    return sum(1 for _ in spell_check._dictionary_matches(text))
+
+
+def measure(fn, texts, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(count: int):
+    essays = [
+        essay + " " + " ".join(TYPOS[: i % len(TYPOS) + 1])
+        for i, essay in enumerate(make_essays(count))
+    ]
+    print(f"글 {len(essays)}개, {sum(map(len, essays)):,}자, 사전 규칙 {len(spell_check._PATTERNS)}개 (상태 {len(spell_check._GOTO)}개)")
+    print(f"{'method':<8}{'total(ms)':>11}{'essays/s':>12}")
+    for name, fn in (("naive", naive_matches), ("aho", aho_matches)):
+        seconds = measure(fn, essays)
+        print(f"{name:<8}{seconds * 1000:11.1f}{len(essays) / seconds:12.0f}")
+
+    # naive는 겹치는 표현(예: '할수있'과 '수있')을 모두 세므로 aho 결과 이상이어야 함
+    print(f"찾은 위치: naive {sum(map(naive_matches, essays))}, aho {sum(map(aho_matches, essays))} (겹침 제거 후)")
+    findings = spell_check.check_submissions(essays[:3])
+    print("\n" + spell_check.format_findings(findings))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 600)
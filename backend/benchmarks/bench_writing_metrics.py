@@ -0,0 +1,126 @@
+"""글쓰기 정량 지표 계산 처리량 벤치마크 (글마다 반복 vs NumPy 일괄 계산)
+
+학급 규모(학생 수 x 학생당 제출물 수)의 글을 만들어
+- loop  : 글마다 파이썬으로 문장/문단/어절을 나눠 계산 (같은 정의의 기준 구현)
+- numpy : writing_metrics.compute_metrics로 모든 글을 한 번에 계산
+두 방식의 처리량과 결과 일치 여부, 프롬프트에 넣는 지표 요약의 토큰 수를 비교한다.
+
+실행: cd backend && python -m benchmarks.bench_writing_metrics [학생 수] [학생당 제출물 수]
+"""
+
+import random
+import re
+import statistics
+import sys
+import time
+from collections import Counter
+
+from prompt_budget import count_tokens
+from writing_metrics import (
+    LONG_SENTENCE_CHARS,
+    PUNCTUATION,
+    SENTENCE_ENDERS,
+    WHITESPACE,
+    compute_metrics,
+    format_metrics,
+)
+
+SENTENCES = [
+    "나는 학교에서 휴대폰 사용을 허용해야 한다고 생각한다.",
+    "왜냐하면 모르는 것을 바로 찾아볼 수 있기 때문이다!",
+    "하지만 수업 시간에 게임을 하는 친구들이 생길수도 있다.",
+    "그래서, 규칙을 정해서 사용하면 좋겠다.",
+    "우리 동네에는 작은 도서관이 있다.",
+    "도서관은 조용하고 책 냄새가 좋아서 마음이 편안해 진다...",
+    "환경을 지키기 위해 우리가 할 수 있는 일은 무엇일까?",
+    "첫째, 일회용품을 줄인다. 둘째, 분리수거를 잘 한다",
+    "작은 실천이 모이면 지구를 지킬 수 있다고 나는 굳게 믿고 있으며 친구들과 함께 매일 조금씩 실천해 나가고 싶다.",
+]
+
+
+def make_essays(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    essays = []
+    for _ in range(count):
+        paragraphs = [
+            " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(2, 6)))
+            for _ in range(rng.randint(2, 5))
+        ]
+        essays.append(("\n\n" if rng.random() < 0.5 else "\n").join(paragraphs))
+    return essays
+
+
+_ENDER_RUN = re.compile(f"[{re.escape(SENTENCE_ENDERS)}]+")
+
+
+def reference_metrics(text: str) -> dict:
+    """compute_metrics와 같은 정의를 글 하나씩 파이썬으로 계산"""
+    letters = lambda s: sum(c not in WHITESPACE and c not in PUNCTUATION for c in s)
+    chars = sum(c not in WHITESPACE for c in text)
+    lengths = [n for n in map(letters, _ENDER_RUN.split(text)) if n > 0]
+    sentences = len(lengths)
+    mean = statistics.fmean(lengths) if lengths else 0.0
+    std = statistics.pstdev(lengths) if lengths else 0.0
+    words = text.translate(str.maketrans(PUNCTUATION, " " * len(PUNCTUATION))).split()
+    counts = Counter(words)
+    ratio = lambda a, b: a / b if b else 0.0
+    return {
+        "chars": chars,
+        "sentences": sentences,
+        "avg_sentence_length": round(mean, 1),
+        "sentence_length_std": round(std, 1),
+        "max_sentence_length": max(lengths, default=0),
+        "long_sentence_ratio": round(ratio(sum(n > LONG_SENTENCE_CHARS for n in lengths), sentences), 2),
+        "paragraphs": sum(1 for line in text.split("\n") if line.strip(WHITESPACE)),
+        "punctuation_per_100_chars": round(ratio(sum(c in PUNCTUATION for c in text) * 100, chars), 1),
+        "commas_per_sentence": round(ratio(text.count(","), sentences), 2),
+        "words": len(words),
+        "lexical_diversity": round(ratio(len(counts), len(words)), 2),
+        "repeated_word_ratio": round(ratio(sum(c for c in counts.values() if c > 1), len(words)), 2),
+    }
+
+
+def measure(fn, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(students: int, per_student: int):
+    essays = make_essays(students * per_student)
+    total_chars = sum(map(len, essays))
+    print(f"학생 {students}명 x 제출물 {per_student}개 = 글 {len(essays)}개, {total_chars:,}자")
+
+    loop = measure(lambda: [reference_metrics(t) for t in essays])
+    vectorized = measure(lambda: compute_metrics(essays))
+    print(f"{'method':<8}{'total(ms)':>11}{'essays/s':>12}")
+    for name, seconds in (("loop", loop), ("numpy", vectorized)):
+        print(f"{name:<8}{seconds * 1000:11.1f}{len(essays) / seconds:12.0f}")
+    print(f"numpy / loop 속도 비: {loop / vectorized:.1f}배")
+
+    # 부동소수 반올림 경계에서 0.1 차이가 날 수 있어 허용 오차로 비교
+    mismatches = [
+        (i, key)
+        for i, (a, b) in enumerate(zip(compute_metrics(essays), map(reference_metrics, essays)))
+        for key in a
+        if abs(a[key] - b[key]) > 0.11
+    ]
+    print(f"결과 일치: {'OK' if not mismatches else f'{len(mismatches)}건 불일치 (예: {mismatches[:3]})'}")
+
+    sample = essays[:3]
+    summary = format_metrics(compute_metrics(sample))
+    print(
+        f"\n분석 1회(제출물 3개) 프롬프트: 원문 {sum(map(count_tokens, sample))}토큰, "
+        f"지표 요약 {count_tokens(summary)}토큰"
+    )
+    print(summary)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 30,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+    )
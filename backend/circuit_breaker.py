@@ -0,0 +1,164 @@
+"""LLM 공급자 회로 차단기 (circuit breaker)
+
+모델 프로필(feedback / analysis)별로 최근 호출 결과를 보고
+- closed   : 정상. 최근 호출 중 실패 또는 느린 응답 비율이 임계값을 넘으면 open
+- open     : LLM을 호출하지 않고 바로 LLMUnavailableError (503, 중간 피드백은 기본 안내로 대체)
+- half_open: open 후 일정 시간이 지나면 시험 호출만 통과시켜 성공하면 closed, 실패하면 다시 open
+
+상태는 프로세스 단위이며 /health 에서 확인할 수 있다.
+"""
+
+import math
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from llm_resilience import get_deadline, is_retryable
+
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "10"))
+LLM_BREAKER_ERROR_RATE = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))
+LLM_BREAKER_SLOW_RATE = float(os.getenv("LLM_BREAKER_SLOW_RATE", "0.5"))
+# 프롬프트 제한 시간의 이 비율보다 오래 걸리면 느린 호출로 봄
+LLM_BREAKER_SLOW_RATIO = float(os.getenv("LLM_BREAKER_SLOW_RATIO", "0.8"))
+LLM_BREAKER_OPEN_SECONDS = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))
+LLM_BREAKER_HALF_OPEN_PROBES = int(os.getenv("LLM_BREAKER_HALF_OPEN_PROBES", "1"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class LLMUnavailableError(Exception):
+    """회로 차단기가 열려 LLM 호출을 건너뜀"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("AI 서비스가 일시적으로 불안정합니다. 잠시 후 다시 시도해주세요.")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.opened_at = None
+        self.last_error = None
+        self.rejected = 0
+        self.times_opened = 0
+        self._outcomes = deque(maxlen=LLM_BREAKER_WINDOW)  # (실패 여부, 느림 여부)
+        self._probes = 0
+
+    def _retry_after(self) -> int:
+        if self.state == OPEN:
+            remaining = LLM_BREAKER_OPEN_SECONDS - (time.monotonic() - self.opened_at)
+            return max(1, math.ceil(remaining))
+        return 1
+
+    def _reject(self):
+        self.rejected += 1
+        raise LLMUnavailableError(retry_after=self._retry_after())
+
+    def allow(self) -> bool:
+        """호출 가능 여부 확인 (불가하면 LLMUnavailableError), 시험 호출이면 True"""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < LLM_BREAKER_OPEN_SECONDS:
+                self._reject()
+            self.state = HALF_OPEN
+            self._probes = 0
+            print(f"🟡 LLM 회로 차단기 half-open ({self.name}): 시험 호출 허용")
+        if self.state == HALF_OPEN:
+            if self._probes >= LLM_BREAKER_HALF_OPEN_PROBES:
+                self._reject()
+            self._probes += 1
+            return True
+        return False
+
+    def _open(self, reason: str):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self._outcomes.clear()
+        print(f"🔴 LLM 회로 차단기 open ({self.name}): {reason}")
+
+    def _close(self):
+        self.state = CLOSED
+        self.opened_at = None
+        self._outcomes.clear()
+        print(f"🟢 LLM 회로 차단기 closed ({self.name}): 복구 확인")
+
+    def record(self, probe: bool, failed: bool, slow: bool):
+        if probe:
+            self._probes -= 1
+            if self.state != HALF_OPEN:
+                return
+            if failed or slow:
+                self._open("시험 호출 " + ("실패" if failed else "지연"))
+            elif self._probes == 0:
+                self._close()
+            return
+        if self.state != CLOSED:
+            # 차단 전에 시작된 호출
+            return
+
+        self._outcomes.append((failed, slow))
+        if len(self._outcomes) < LLM_BREAKER_MIN_CALLS:
+            return
+        error_rate = sum(f for f, _ in self._outcomes) / len(self._outcomes)
+        slow_rate = sum(s for _, s in self._outcomes) / len(self._outcomes)
+        if error_rate >= LLM_BREAKER_ERROR_RATE:
+            self._open(f"실패율 {error_rate:.0%}")
+        elif slow_rate >= LLM_BREAKER_SLOW_RATE:
+            self._open(f"지연 비율 {slow_rate:.0%}")
+
+    def release(self, probe: bool):
+        """결과를 판단할 수 없이 끝난 호출 (취소, 요청 오류 등)"""
+        if probe:
+            self._probes -= 1
+
+    @contextmanager
+    def guard(self, prompt_name: str):
+        probe = self.allow()
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            if is_retryable(e):
+                self.last_error = repr(e)
+                self.record(probe, failed=True, slow=False)
+            else:
+                self.release(probe)
+            raise
+        except BaseException:
+            self.release(probe)
+            raise
+        slow = time.monotonic() - started > get_deadline(prompt_name) * LLM_BREAKER_SLOW_RATIO
+        self.record(probe, failed=False, slow=slow)
+
+    def stats(self) -> dict:
+        failures = sum(f for f, _ in self._outcomes)
+        slow = sum(s for _, s in self._outcomes)
+        return {
+            "state": self.state,
+            "recent_calls": len(self._outcomes),
+            "recent_failures": failures,
+            "recent_slow": slow,
+            "retry_after": self._retry_after() if self.state == OPEN else 0,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "last_error": self.last_error,
+        }
+
+
+_breakers = {}
+
+
+def get_breaker(profile: str) -> CircuitBreaker:
+    breaker = _breakers.get(profile)
+    if breaker is None:
+        breaker = _breakers[profile] = CircuitBreaker(profile)
+    return breaker
+
+
+def breaker_stats() -> dict:
+    return {name: breaker.stats() for name, breaker in _breakers.items()}
@@ -1,8 +1,11 @@
 import models, schemas
+import student_context
+import student_progress
 from typing import List, Optional
 import datetime
 import bcrypt
 
+from sqlalchemy import func, update
 from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -83,6 +86,7 @@ async def update_class(
         setattr(school_class, field, value)
     await db.commit()
     await db.refresh(school_class)
+    student_context.invalidate_class(class_id)
     return school_class
 
 
@@ -96,6 +100,7 @@ async def delete_class(db: AsyncSession, class_id: int, user_id: int):
         return False
     await db.delete(school_class)
     await db.commit()
+    student_context.invalidate_class(class_id)
     return True
 
 
@@ -134,6 +139,7 @@ async def delete_student(db: AsyncSession, student: schemas.StudentBase) -> bool
 
     await db.delete(db_student)
     await db.commit()
+    student_context.invalidate_student(db_student.id)
     return True
 
 
@@ -187,7 +193,9 @@ async def get_latest_student_analysis(db: AsyncSession, student_id: int):
     return result.scalar_one_or_none()
 
 
-async def get_latest_student_submissions(db: AsyncSession, student_id: int, n: int = 3):
+async def get_latest_student_submission_rows(
+    db: AsyncSession, student_id: int, n: int = 3
+) -> List[models.ASubmission]:
     stmt = (
         select(models.ASubmission)
         .where(models.ASubmission.student_id == student_id)
@@ -195,7 +203,28 @@ async def get_latest_student_submissions(db: AsyncSession, student_id: int, n: i
         .limit(n)
     )
     result = await db.execute(stmt)
-    submissions = result.scalars().all()
+    return result.scalars().all()
+
+
+async def get_student_submissions_with_content(db: AsyncSession, student_id: int):
+    """학생의 내용이 있는 과제/평가 제출물 전체 (제출 시각 순)"""
+    a_stmt = (
+        select(models.ASubmission)
+        .where(models.ASubmission.student_id == student_id, models.ASubmission.content != "")
+        .order_by(models.ASubmission.submitted_at)
+    )
+    e_stmt = (
+        select(models.ESubmission)
+        .where(models.ESubmission.student_id == student_id, models.ESubmission.content != "")
+        .order_by(models.ESubmission.submitted_at)
+    )
+    a_rows = (await db.execute(a_stmt)).scalars().all()
+    e_rows = (await db.execute(e_stmt)).scalars().all()
+    return a_rows, e_rows
+
+
+async def get_latest_student_submissions(db: AsyncSession, student_id: int, n: int = 3):
+    submissions = await get_latest_student_submission_rows(db, student_id, n)
     # Prefer revised_content if available, else content
     return [s.revised_content if s.revised_content else s.content for s in submissions]
 
@@ -282,6 +311,7 @@ async def delete_assignment(db: AsyncSession, assignment_id: int, user_id: int)
         return False
 
     await db.delete(assignment)
+    await student_progress.invalidate_class_progress(db, assignment.class_id)
     await db.commit()
     return True
 
@@ -368,6 +398,7 @@ async def delete_evaluation(db: AsyncSession, evaluation_id: int, user_id: int)
         return False
 
     await db.delete(evaluation)
+    await student_progress.invalidate_class_progress(db, evaluation.class_id)
     await db.commit()
     return True
 
@@ -397,6 +428,7 @@ async def update_assign_submission(db: AsyncSession, submission_data: dict):
         submission.status = submission_data["status"]
 
     submission.submitted_at = datetime.datetime.now(datetime.timezone.utc)
+    await student_progress.record_assign_submission(db, submission)
 
     await db.commit()
     await db.refresh(submission)
@@ -428,6 +460,7 @@ async def update_eval_submission(db: AsyncSession, submission_data: dict):
         submission.score = submission_data["score"]
 
     submission.submitted_at = datetime.datetime.now(datetime.timezone.utc)
+    await student_progress.record_eval_submissions(db, [submission])
 
     await db.commit()
     await db.refresh(submission)
@@ -524,6 +557,8 @@ async def patch_submission_feedback(
 
     if patch_info.assignment_id and submission:
         submission.status = models.ASubmissionStatus.feedback_done
+    if submission:
+        await student_progress.record_feedback(db, submission)
 
     await db.commit()
     await db.refresh(submission_feedback)
@@ -611,3 +646,113 @@ async def start_evaluation_for_class(
 
     await db.commit()
     return created_count
+
+
+# Batch
+
+
+async def create_batch_run(
+    db: AsyncSession, user_id: int, kind: str, target_id: int
+) -> models.BatchRun:
+    batch_run = models.BatchRun(
+        user_id=user_id,
+        kind=kind,
+        target_id=target_id,
+        status=models.BatchRunStatus.pending,
+        errors=[],
+    )
+    db.add(batch_run)
+    await db.commit()
+    await db.refresh(batch_run)
+    return batch_run
+
+
+async def get_batch_run(
+    db: AsyncSession, batch_id: int, user_id: int
+) -> Optional[models.BatchRun]:
+    stmt = select(models.BatchRun).where(
+        models.BatchRun.id == batch_id, models.BatchRun.user_id == user_id
+    )
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def update_batch_run(db: AsyncSession, batch_id: int, **fields):
+    batch_run = await db.get(models.BatchRun, batch_id)
+    if not batch_run:
+        return None
+    for field, value in fields.items():
+        setattr(batch_run, field, value)
+    await db.commit()
+    return batch_run
+
+
+async def get_final_submitted_submissions(db: AsyncSession, assignment_id: int):
+    stmt = (
+        select(models.ASubmission)
+        .where(
+            models.ASubmission.assignment_id == assignment_id,
+            models.ASubmission.status == models.ASubmissionStatus.final_submitted,
+        )
+        .options(selectinload(models.ASubmission.assign_feedback))
+    )
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+
+async def get_submitted_eval_submissions(db: AsyncSession, evaluation_id: int):
+    stmt = select(models.ESubmission).where(
+        models.ESubmission.evaluation_id == evaluation_id,
+        models.ESubmission.status == models.ESubmissionStatus.submitted,
+    )
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+
+async def bulk_update_eval_scores(db: AsyncSession, scores: List[dict]):
+    # [{"id": submission_id, "score": "상"}, ...] 를 한 번의 UPDATE로 반영
+    if scores:
+        await db.execute(update(models.ESubmission), scores)
+        # 학생 현황의 최근 점수 갱신
+        stmt = select(models.ESubmission).where(
+            models.ESubmission.id.in_([s["id"] for s in scores])
+        ).execution_options(populate_existing=True)
+        submissions = (await db.execute(stmt)).scalars().all()
+        await student_progress.record_eval_submissions(db, submissions)
+    await db.commit()
+
+
+async def get_llm_usage_summary(
+    db: AsyncSession, teacher_id: int, since: datetime.datetime
+) -> List[dict]:
+    """교사별 엔드포인트/모델 단위 LLM 사용량 합계"""
+    stmt = (
+        select(
+            models.LLMUsage.endpoint,
+            models.LLMUsage.model,
+            func.count(models.LLMUsage.id),
+            func.sum(models.LLMUsage.prompt_tokens),
+            func.sum(models.LLMUsage.completion_tokens),
+            func.sum(models.LLMUsage.cost_usd),
+            func.avg(models.LLMUsage.duration_ms),
+        )
+        .where(
+            models.LLMUsage.teacher_id == teacher_id,
+            models.LLMUsage.created_at >= since,
+        )
+        .group_by(models.LLMUsage.endpoint, models.LLMUsage.model)
+        .order_by(func.sum(models.LLMUsage.cost_usd).desc())
+    )
+    result = await db.execute(stmt)
+    return [
+        {
+            "endpoint": endpoint,
+            "model": model,
+            "calls": calls,
+            "prompt_tokens": prompt_tokens or 0,
+            "completion_tokens": completion_tokens or 0,
+            "cost_usd": round(cost or 0, 6),
+            "avg_duration_ms": round(avg_duration or 0),
+        }
+        for endpoint, model, calls, prompt_tokens, completion_tokens, cost, avg_duration in result.all()
+    ]
@@ -0,0 +1,93 @@
+"""거의 바뀌지 않은 글에 대한 중간 피드백 재사용
+
+학생이 몇 글자만 고치고 다시 도움을 요청하면 LLM을 다시 부르지 않고
+같은 학생/과제의 마지막 피드백을 돌려준다 (응답에 reused 표시).
+- 바뀐 정도: 공통 앞/뒷부분을 뺀 나머지 길이 / 글 길이 (O(n))
+- 글 외의 프롬프트 변수(조건, 안내, 학년, 교사 지침)가 바뀌었으면 재사용하지 않음
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+import models
+from database import AsyncSessionLocal
+from telemetry import record_cache_result
+
+# 바뀐 글자 비율이 이 값 이하이면 지난 피드백 재사용 (0이면 비활성화)
+MID_FEEDBACK_REUSE_THRESHOLD = float(os.getenv("MID_FEEDBACK_REUSE_THRESHOLD", "0.03"))
+
+
+def changed_chars(old: str, new: str) -> int:
+    """공통 앞/뒷부분을 뺀 나머지 길이 (바뀐 구간의 대략적인 크기)"""
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    return max(len(old), len(new)) - prefix - suffix
+
+
+def change_ratio(old: str, new: str) -> float:
+    old, new = old.strip(), new.strip()
+    if not old and not new:
+        return 0.0
+    return changed_chars(old, new) / max(len(old), len(new))
+
+
+def context_hash(variables: dict) -> str:
+    context = {k: v for k, v in variables.items() if k != "content"}
+    payload = json.dumps(context, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def _get_last(
+    db: AsyncSession, student_id: int, assignment_id: int
+) -> Optional[models.LastMidFeedback]:
+    stmt = select(models.LastMidFeedback).where(
+        models.LastMidFeedback.student_id == student_id,
+        models.LastMidFeedback.assignment_id == assignment_id,
+    )
+    return (await db.execute(stmt)).scalar_one_or_none()
+
+
+async def find_reusable_mid_feedback(
+    db: AsyncSession, feedback_data: dict, variables: dict
+) -> Optional[str]:
+    """마지막 피드백 때와 글이 거의 같으면 그 피드백 반환"""
+    assignment_id = feedback_data.get("assignment_id")
+    if MID_FEEDBACK_REUSE_THRESHOLD <= 0 or not assignment_id:
+        return None
+    last = await _get_last(db, feedback_data["student_id"], assignment_id)
+    if last is None or last.context_hash != context_hash(variables):
+        return None
+    if change_ratio(last.content, variables["content"]) > MID_FEEDBACK_REUSE_THRESHOLD:
+        return None
+    record_cache_result("mid_feedback", "reused")
+    return last.result
+
+
+async def remember_mid_feedback(feedback_data: dict, variables: dict, result: str):
+    """생성한 중간 피드백과 그때의 글 저장 (스트리밍 응답 중에도 쓰므로 별도 세션)"""
+    assignment_id = feedback_data.get("assignment_id")
+    if MID_FEEDBACK_REUSE_THRESHOLD <= 0 or not assignment_id:
+        return
+    async with AsyncSessionLocal() as db:
+        row = await _get_last(db, feedback_data["student_id"], assignment_id)
+        if row is None:
+            row = models.LastMidFeedback(
+                student_id=feedback_data["student_id"], assignment_id=assignment_id
+            )
+            db.add(row)
+        row.context_hash = context_hash(variables)
+        row.content = variables["content"]
+        row.result = result
+        row.created_at = datetime.utcnow()
+        await db.commit()
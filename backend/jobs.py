@@ -0,0 +1,306 @@
+"""LLM 작업 큐
+
+API는 llm_jobs 테이블에 작업을 넣고 곧바로 작업 id를 돌려준다.
+실제 LLM 호출은 별도 프로세스(worker.py)가 가져가 실행하며,
+실패 시 지수 백오프로 재시도하고 임대(lease)가 만료된 작업은 다시 큐로 돌린다.
+"""
+
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import case, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+import crud, models
+from ai_service import (
+    build_final_feedback_variables,
+    build_mid_feedback_variables,
+    build_score_variables,
+    clean_final_feedback,
+)
+from analysis_service import run_student_analysis
+from batch import run_class_analysis_batch, run_final_feedback_batch, score_evaluation
+from database import AsyncSessionLocal
+from feedback_reuse import find_reusable_mid_feedback, remember_mid_feedback
+from llm_registry import llm_registry
+from speculative import JOB_KIND as SPECULATIVE_JOB_KIND, precompute_mid_feedback
+from student_context import get_owned_student_context
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+
+# 로그인 없이 학생이 요청할 수 있는 작업 (기존 /ai 라우터와 동일한 권한)
+PUBLIC_JOB_KINDS = {"mid_feedback", "score"}
+# 서버가 직접 예약하는 작업 (/jobs API로는 만들 수 없음)
+INTERNAL_JOB_KINDS = {SPECULATIVE_JOB_KIND}
+# 사용자가 기다리는 작업보다 나중에 처리
+LOW_PRIORITY_JOB_KINDS = {SPECULATIVE_JOB_KIND}
+
+JOB_HANDLERS = {}
+
+
+class PermanentJobError(Exception):
+    """재시도해도 결과가 같은 오류 (권한, 잘못된 입력 등)"""
+
+
+def job_handler(kind: str):
+    def decorator(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+
+    return decorator
+
+
+def is_retryable(error: Exception) -> bool:
+    return not isinstance(error, (PermanentJobError, HTTPException, KeyError))
+
+
+# 큐 조작
+
+
+async def enqueue_job(
+    db: AsyncSession, kind: str, payload: dict, user_id: Optional[int] = None
+) -> models.Job:
+    job = models.Job(
+        id=uuid.uuid4().hex,
+        kind=kind,
+        payload=payload,
+        user_id=user_id,
+        status=models.JobStatus.queued,
+        max_attempts=JOB_MAX_ATTEMPTS,
+        run_after=datetime.utcnow(),
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def get_job(db: AsyncSession, job_id: str) -> Optional[models.Job]:
+    return await db.get(models.Job, job_id)
+
+
+async def claim_next_job(db: AsyncSession, worker_id: str) -> Optional[models.Job]:
+    """대기 중인 작업 하나를 임대. 다른 워커가 먼저 가져가면 None"""
+    now = datetime.utcnow()
+    stmt = (
+        select(models.Job.id)
+        .where(
+            models.Job.status == models.JobStatus.queued,
+            models.Job.run_after <= now,
+        )
+        .order_by(
+            case((models.Job.kind.in_(LOW_PRIORITY_JOB_KINDS), 1), else_=0),
+            models.Job.created_at,
+        )
+        .limit(1)
+    )
+    job_id = (await db.execute(stmt)).scalar_one_or_none()
+    if job_id is None:
+        return None
+
+    claimed = await db.execute(
+        update(models.Job)
+        .where(models.Job.id == job_id, models.Job.status == models.JobStatus.queued)
+        .values(
+            status=models.JobStatus.running,
+            worker_id=worker_id,
+            attempts=models.Job.attempts + 1,
+            locked_until=now + timedelta(seconds=JOB_LEASE_SECONDS),
+        )
+    )
+    await db.commit()
+    if claimed.rowcount != 1:
+        return None
+    return await db.get(models.Job, job_id, populate_existing=True)
+
+
+async def extend_lease(db: AsyncSession, job_id: str, worker_id: str) -> bool:
+    """임대 연장. 만료되어 다른 워커에게 넘어갔으면 False"""
+    extended = await db.execute(
+        update(models.Job)
+        .where(
+            models.Job.id == job_id,
+            models.Job.worker_id == worker_id,
+            models.Job.status == models.JobStatus.running,
+        )
+        .values(locked_until=datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS))
+    )
+    await db.commit()
+    return extended.rowcount == 1
+
+
+async def complete_job(db: AsyncSession, job_id: str, result):
+    await db.execute(
+        update(models.Job)
+        .where(models.Job.id == job_id)
+        .values(
+            status=models.JobStatus.succeeded,
+            result=result,
+            error=None,
+            locked_until=None,
+            finished_at=datetime.utcnow(),
+        )
+    )
+    await db.commit()
+
+
+async def fail_job(db: AsyncSession, job_id: str, error: str, retryable: bool = True):
+    """재시도 가능하고 횟수가 남았으면 백오프 후 다시 대기열로, 아니면 실패 처리"""
+    job = await db.get(models.Job, job_id, populate_existing=True)
+    if not job:
+        return
+    job.error = error
+    job.locked_until = None
+    if retryable and job.attempts < job.max_attempts:
+        job.status = models.JobStatus.queued
+        job.run_after = datetime.utcnow() + timedelta(
+            seconds=JOB_RETRY_BASE_SECONDS * (2 ** (job.attempts - 1))
+        )
+    else:
+        job.status = models.JobStatus.failed
+        job.finished_at = datetime.utcnow()
+    await db.commit()
+
+
+async def recover_stale_jobs(db: AsyncSession) -> int:
+    """워커가 죽어 임대가 만료된 running 작업을 다시 대기열로 돌림"""
+    now = datetime.utcnow()
+    stmt = select(models.Job).where(
+        models.Job.status == models.JobStatus.running,
+        models.Job.locked_until < now,
+    )
+    stale = (await db.execute(stmt)).scalars().all()
+    for job in stale:
+        job.locked_until = None
+        job.error = f"worker {job.worker_id} 임대 만료"
+        if job.attempts < job.max_attempts:
+            job.status = models.JobStatus.queued
+            job.run_after = now
+        else:
+            job.status = models.JobStatus.failed
+            job.finished_at = now
+    await db.commit()
+    return len(stale)
+
+
+async def run_job(job: models.Job):
+    handler = JOB_HANDLERS.get(job.kind)
+    if handler is None:
+        raise PermanentJobError(f"알 수 없는 작업 종류: {job.kind}")
+    return await handler(job.payload or {}, job.user_id)
+
+
+# 작업 종류별 처리
+
+
+async def _get_teacher(db: AsyncSession, user_id: Optional[int]) -> models.User:
+    user = await db.get(models.User, user_id) if user_id else None
+    if not user:
+        raise PermanentJobError("교사 정보가 필요한 작업입니다.")
+    return user
+
+
+@job_handler("mid_feedback")
+async def handle_mid_feedback(payload: dict, user_id: Optional[int]):
+    async with AsyncSessionLocal() as db:
+        variables = await build_mid_feedback_variables(payload, db)
+        reused = await find_reusable_mid_feedback(db, payload, variables)
+    if reused is not None:
+        return {"status": "success", "result": reused, "reused": True}
+    result = await llm_registry.ainvoke("mid_feedback", variables)
+    await remember_mid_feedback(payload, variables, result)
+    return {"status": "success", "result": result}
+
+
+@job_handler(SPECULATIVE_JOB_KIND)
+async def handle_speculative_mid_feedback(payload: dict, user_id: Optional[int]):
+    return await precompute_mid_feedback(payload["student_id"], payload["assignment_id"])
+
+
+@job_handler("final_feedback")
+async def handle_final_feedback(payload: dict, user_id: Optional[int]):
+    async with AsyncSessionLocal() as db:
+        user = await _get_teacher(db, user_id)
+        variables = await build_final_feedback_variables(payload, db, user)
+    result = await llm_registry.ainvoke("final_feedback", variables)
+    return {"status": "success", "result": clean_final_feedback(result)}
+
+
+@job_handler("score")
+async def handle_score(payload: dict, user_id: Optional[int]):
+    async with AsyncSessionLocal() as db:
+        variables = await build_score_variables(payload, db)
+    result = await llm_registry.ainvoke("score", variables)
+    return {"result": result.strip()}
+
+
+@job_handler("analysis")
+async def handle_analysis(payload: dict, user_id: Optional[int]):
+    if not payload.get("student_id"):
+        raise PermanentJobError("student_id is required in analysis_source")
+    async with AsyncSessionLocal() as db:
+        user = await _get_teacher(db, user_id)
+        await get_owned_student_context(db, payload["student_id"], user.id)
+        return await run_student_analysis(db, payload)
+
+
+async def _get_batch_run(
+    db: AsyncSession, payload: dict, user: models.User, kind: str, target_id: int
+) -> models.BatchRun:
+    """API가 미리 만든 진행 상황 행(batch_id)을 이어서 쓰고, /jobs로 직접 등록했으면 새로 만듦"""
+    batch_id = payload.get("batch_id")
+    if batch_id is None:
+        return await crud.create_batch_run(db, user.id, kind, target_id)
+    batch_run = await crud.get_batch_run(db, batch_id, user.id)
+    if not batch_run or batch_run.kind != kind or batch_run.target_id != target_id:
+        raise PermanentJobError("일괄 작업을 찾을 수 없습니다.")
+    return batch_run
+
+
+@job_handler("final_feedback_batch")
+async def handle_final_feedback_batch(payload: dict, user_id: Optional[int]):
+    async with AsyncSessionLocal() as db:
+        user = await _get_teacher(db, user_id)
+        assignment = await db.get(models.Assignment, payload.get("assignment_id"))
+        if not assignment or assignment.user_id != user.id:
+            raise PermanentJobError("과제를 찾을 수 없습니다.")
+        batch_run = await _get_batch_run(
+            db, payload, user, "final_feedback", assignment.id
+        )
+    await run_final_feedback_batch(
+        batch_run.id,
+        assignment.id,
+        user.id,
+        payload.get("additional_instructions") or "",
+    )
+    return {"batch_id": batch_run.id}
+
+
+@job_handler("analysis_batch")
+async def handle_analysis_batch(payload: dict, user_id: Optional[int]):
+    async with AsyncSessionLocal() as db:
+        user = await _get_teacher(db, user_id)
+        school_class = await db.get(models.SchoolClass, payload.get("class_id"))
+        if not school_class or school_class.user_id != user.id:
+            raise PermanentJobError("학급을 찾을 수 없습니다.")
+        batch_run = await _get_batch_run(db, payload, user, "analysis", school_class.id)
+    await run_class_analysis_batch(
+        batch_run.id, school_class.id, payload.get("engine"), bool(payload.get("force"))
+    )
+    return {"batch_id": batch_run.id}
+
+
+@job_handler("score_bulk")
+async def handle_score_bulk(payload: dict, user_id: Optional[int]):
+    async with AsyncSessionLocal() as db:
+        user = await _get_teacher(db, user_id)
+        evaluation = await db.get(models.Evaluation, payload.get("evaluation_id"))
+        if not evaluation or evaluation.user_id != user.id:
+            raise PermanentJobError("평가를 찾을 수 없습니다.")
+        return await score_evaluation(db, evaluation, user)
@@ -0,0 +1,79 @@
+"""LLM 응답 캐시 - 렌더링된 프롬프트, 모델, temperature 해시를 키로 사용"""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class LLMResponseCache:
+    """TTL + 크기 제한 LRU 캐시 (히트/미스 카운터 포함)"""
+
+    def __init__(self, maxsize: int = 512, ttl: float = 600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._store: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(messages, model: str, temperature) -> str:
+        # 메시지 타입과 내용만 사용해 바이트 단위로 같은 입력이면 같은 키가 나오도록 함
+        payload = json.dumps(
+            {
+                "model": model,
+                "temperature": temperature,
+                "messages": [[m.type, m.content] for m in messages],
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._store.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._store[key]
+            self.misses += 1
+            return None
+        self._store.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: str):
+        if self.maxsize <= 0:
+            return
+        self._store[key] = (time.monotonic() + self.ttl, value)
+        self._store.move_to_end(key)
+        while len(self._store) > self.maxsize:
+            self._store.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._store.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._store),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+response_cache = LLMResponseCache(
+    maxsize=int(os.getenv("LLM_CACHE_MAXSIZE", "512")),
+    ttl=float(os.getenv("LLM_CACHE_TTL", "600")),
+)
+
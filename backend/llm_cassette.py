@@ -0,0 +1,240 @@
+"""LLM 호출 녹화/재생 (cassette)
+
+- record: 실제 공급자(OpenAI) 호출을 그대로 통과시키면서 프롬프트, 응답, 청크, 토큰 수,
+  첫 토큰 시간/전체 소요 시간을 cassette 파일에 남긴다.
+- replay: 네트워크 없이 cassette에서 같은 프롬프트의 응답을 찾아 녹화된 시간 그대로 돌려준다.
+
+조회 키는 공백/유니코드 정규화한 메시지와 모델 이름의 해시(fingerprint)다.
+파일은 gzip으로 압축한 JSON Lines이며 모아 둔 기록을 gzip 멤버 단위로 이어 붙인다.
+학생 글이 그대로 들어가므로 저장소에 올리지 않는다.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+from typing import Any, AsyncIterator, List, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from telemetry import current_prompt_name
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LLM_CASSETTE = os.getenv("LLM_CASSETTE", os.path.join(BASE_DIR, "db/llm_cassette.jsonl.gz"))
+# 재생 속도 배율 (2이면 녹화된 시간의 절반)
+LLM_CASSETTE_SPEED = float(os.getenv("LLM_CASSETTE_SPEED", "1"))
+CASSETTE_FLUSH_EVERY = 50
+
+WHITESPACE = re.compile(r"\s+")
+
+
+class CassetteMissError(LookupError):
+    """replay 모드에서 녹화되지 않은 프롬프트를 요청함"""
+
+
+def normalize(text: str) -> str:
+    return WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def fingerprint(messages: List[BaseMessage], model: str) -> str:
+    payload = json.dumps(
+        {"model": model, "messages": [[m.type, normalize(str(m.content))] for m in messages]},
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    def __init__(self, path: str):
+        self.path = path
+        self._entries = None
+        self._pending = []
+        self.hits = 0
+        self.misses = 0
+
+    def load(self) -> dict:
+        """fingerprint → 기록 (같은 프롬프트가 여러 번 녹화됐으면 마지막 것 사용)"""
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.path):
+                with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            self._entries[entry["fingerprint"]] = entry
+            print(f"📼 cassette 로드: {len(self._entries)}건 ({self.path})")
+        return self._entries
+
+    def find(self, key: str) -> dict:
+        entry = self.load().get(key)
+        if entry is None:
+            self.misses += 1
+            raise CassetteMissError(f"cassette에 녹화되지 않은 프롬프트입니다: {key[:12]}")
+        self.hits += 1
+        return entry
+
+    def add(self, entry: dict):
+        self._pending.append(entry)
+        if self._entries is not None:
+            self._entries[entry["fingerprint"]] = entry
+        if len(self._pending) >= CASSETTE_FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        entries, self._pending = self._pending, []
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # gzip 멤버를 이어 붙여도 한 파일로 읽힌다
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        print(f"📼 cassette 저장: {len(entries)}건 ({self.path})")
+
+
+cassette = Cassette(LLM_CASSETTE)
+
+
+class RecordingChatModel(BaseChatModel):
+    """실제 모델 호출을 통과시키며 cassette에 기록"""
+
+    inner: BaseChatModel
+    model_name: str
+    temperature: float
+
+    @property
+    def _llm_type(self) -> str:
+        return f"recording-{self.inner._llm_type}"
+
+    def _record(self, messages, content, chunks, usage, started, first_token_at):
+        finished = time.perf_counter()
+        cassette.add({
+            "fingerprint": fingerprint(messages, self.model_name),
+            "prompt": current_prompt_name(),
+            "model": self.model_name,
+            "messages": [[m.type, str(m.content)] for m in messages],
+            "content": content,
+            "chunks": chunks,
+            "usage": dict(usage) if usage else None,
+            "ttft_ms": round((first_token_at - started) * 1000, 1) if first_token_at else None,
+            "duration_ms": round((finished - started) * 1000, 1),
+        })
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        started = time.perf_counter()
+        result = self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        message = result.generations[0].message
+        self._record(messages, message.content, None, message.usage_metadata, started, None)
+        return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        started = time.perf_counter()
+        message = await self.inner.ainvoke(messages, stop=stop, **kwargs)
+        self._record(messages, message.content, None, message.usage_metadata, started, None)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        started = time.perf_counter()
+        first_token_at = None
+        chunks = []
+        usage = None
+        async for chunk in self.inner.astream(messages, stop=stop, **kwargs):
+            if chunk.usage_metadata:
+                usage = chunk.usage_metadata
+            if chunk.content:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                chunks.append(chunk.content)
+            yield ChatGenerationChunk(message=chunk)
+        # 끝까지 받은 스트림만 기록
+        self._record(messages, "".join(chunks), chunks, usage, started, first_token_at)
+
+
+class ReplayChatModel(BaseChatModel):
+    """cassette에 녹화된 응답을 녹화 당시 시간대로 재생"""
+
+    model_name: str
+    temperature: float
+    speed: float = LLM_CASSETTE_SPEED
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette-replay"
+
+    def _find(self, messages: List[BaseMessage]) -> dict:
+        return cassette.find(fingerprint(messages, self.model_name))
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        entry = self._find(messages)
+        time.sleep(entry["duration_ms"] / 1000 / self.speed)
+        message = AIMessage(content=entry["content"], usage_metadata=entry["usage"])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        entry = self._find(messages)
+        await asyncio.sleep(entry["duration_ms"] / 1000 / self.speed)
+        message = AIMessage(content=entry["content"], usage_metadata=entry["usage"])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        entry = self._find(messages)
+        # 스트리밍 없이 녹화된 응답은 단어 단위로 나눠 보냄
+        chunks = entry["chunks"] or re.findall(r"\S+\s*|\s+", entry["content"]) or [""]
+        duration = entry["duration_ms"] / 1000 / self.speed
+        ttft = entry["ttft_ms"] / 1000 / self.speed if entry["ttft_ms"] is not None else 0
+        interval = max(duration - ttft, 0) / len(chunks)
+
+        await asyncio.sleep(ttft)
+        for i, chunk in enumerate(chunks):
+            if i:
+                await asyncio.sleep(interval)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=entry["usage"])
+        )
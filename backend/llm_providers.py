@@ -0,0 +1,220 @@
+"""LLM 공급자 선택
+
+LLM_PROVIDER 환경변수로 채팅 모델 구현을 고른다.
+- openai: ChatOpenAI (기본값)
+- fake  : 네트워크 없이 지연 시간/토큰 속도/실패를 흉내 내는 로컬 모델 (부하 테스트용)
+- record: OpenAI를 호출하면서 요청/응답/소요 시간을 cassette 파일에 녹화 (llm_cassette)
+- replay: 녹화된 cassette를 네트워크 없이 녹화 당시 시간대로 재생
+
+fake 모델은 같은 프롬프트에 항상 같은 응답을 돌려주고, 지연 시간과 실패는 FAKE_LLM_SEED로 정해지는
+순서대로 호출마다 새로 뽑으므로(재시도/헤지 요청은 다른 값을 받음) 결과를 재현할 수 있다.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+from typing import Any, AsyncIterator, List, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.messages.ai import UsageMetadata
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_openai import ChatOpenAI
+from pydantic import PrivateAttr
+
+from llm_cassette import RecordingChatModel, ReplayChatModel
+from llm_resilience import RetryableLLMError
+from prompt_budget import count_tokens
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
+# OpenAI HTTP 요청 1회 제한 시간(초)
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+
+# fake 공급자 설정
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "400"))
+FAKE_LLM_LATENCY_DISTRIBUTION = os.getenv("FAKE_LLM_LATENCY_DISTRIBUTION", "lognormal")
+FAKE_LLM_LATENCY_SIGMA = float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.5"))
+FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "80"))
+FAKE_LLM_COMPLETION_TOKENS = int(os.getenv("FAKE_LLM_COMPLETION_TOKENS", "200"))
+FAKE_LLM_FAILURE_RATE = float(os.getenv("FAKE_LLM_FAILURE_RATE", "0"))
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+# 채점 프롬프트의 평가 기준 표 ("상 | 설명")
+CRITERIA_LINE = re.compile(r"^\s*([^\s|]+)\s*\|", re.MULTILINE)
+
+FAKE_FEEDBACK = (
+    "### 뛰어난 점\n주장이 분명하고 글의 흐름이 자연스럽습니다.\n"
+    "### 아쉬운 점\n근거를 조금 더 구체적으로 제시하면 좋겠습니다.\n"
+    "### 총평\n"
+)
+FAKE_FILLER = "문단마다 중심 문장을 먼저 쓰고 예시를 덧붙여 보세요. "
+
+
+class FakeLLMError(RetryableLLMError):
+    """fake 공급자가 주입한 실패"""
+
+
+class FakeChatModel(BaseChatModel):
+    """지연 시간 분포, 토큰 생성 속도, 실패율을 설정할 수 있는 오프라인 채팅 모델"""
+
+    model_name: str = "gpt-4o-mini"
+    temperature: float = 0.0
+    latency_ms: float = FAKE_LLM_LATENCY_MS
+    latency_distribution: str = FAKE_LLM_LATENCY_DISTRIBUTION
+    latency_sigma: float = FAKE_LLM_LATENCY_SIGMA
+    tokens_per_second: float = FAKE_LLM_TOKENS_PER_SECOND
+    completion_tokens: int = FAKE_LLM_COMPLETION_TOKENS
+    failure_rate: float = FAKE_LLM_FAILURE_RATE
+    seed: int = FAKE_LLM_SEED
+
+    _calls: random.Random = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._calls = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _rng(self, messages: List[BaseMessage]) -> random.Random:
+        digest = hashlib.sha256(
+            "\x00".join(str(m.content) for m in messages).encode("utf-8")
+        ).digest()
+        return random.Random(int.from_bytes(digest[:8], "big") ^ self.seed)
+
+    def _first_token_delay(self, rng: random.Random) -> float:
+        mean = self.latency_ms / 1000
+        if self.latency_distribution == "fixed":
+            return mean
+        if self.latency_distribution == "uniform":
+            return rng.uniform(0, 2 * mean)
+        if self.latency_distribution == "exponential":
+            return rng.expovariate(1 / mean) if mean > 0 else 0
+        # lognormal: 평균이 latency_ms가 되도록 mu 보정, 긴 꼬리 지연 재현
+        mu = math.log(mean) - self.latency_sigma ** 2 / 2 if mean > 0 else 0
+        return rng.lognormvariate(mu, self.latency_sigma) if mean > 0 else 0
+
+    def _text(self, tokens: int) -> str:
+        text = FAKE_FEEDBACK
+        while count_tokens(text, self.model_name) < tokens:
+            text += FAKE_FILLER
+        return text
+
+    def _json(self, schema: dict, tokens: int, top: bool = True):
+        """JSON 스키마에 맞는 응답
+
+        최상위 필드는 각각 tokens, 하위 객체의 필드는 tokens를 나눠 씀
+        (영역별 호출 여러 번을 한 번으로 합친 응답 크기와 비슷하게)
+        """
+        if schema.get("type") == "object":
+            properties = schema.get("properties", {})
+            share = tokens if top else tokens // max(len(properties), 1)
+            return {key: self._json(sub, share, top=False) for key, sub in properties.items()}
+        if schema.get("type") == "array":
+            return [self._json(schema.get("items", {}), tokens, top=False)]
+        return self._text(tokens)
+
+    def _response(
+        self, messages: List[BaseMessage], rng: random.Random, response_format: Optional[dict]
+    ) -> str:
+        if response_format and response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"]["schema"]
+            return json.dumps(self._json(schema, self.completion_tokens), ensure_ascii=False)
+
+        prompt = "\n".join(str(m.content) for m in messages)
+        levels = CRITERIA_LINE.findall(prompt)
+        if "채점" in prompt and levels:
+            return rng.choice(levels)
+        return self._text(self.completion_tokens)
+
+    def _plan(self, messages: List[BaseMessage], response_format: Optional[dict] = None):
+        if self._calls.random() < self.failure_rate:
+            raise FakeLLMError("fake LLM 공급자 실패 (주입)")
+        text = self._response(messages, self._rng(messages), response_format)
+        # 대략 토큰 단위로 쪼개 스트리밍
+        pieces = re.findall(r"\S+\s*|\s+", text) or [text]
+        usage = UsageMetadata(
+            input_tokens=sum(count_tokens(str(m.content), self.model_name) for m in messages),
+            output_tokens=count_tokens(text, self.model_name),
+            total_tokens=0,
+        )
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return self._first_token_delay(self._calls), pieces, usage
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        delay, pieces, usage = self._plan(messages, kwargs.get("response_format"))
+        time.sleep(delay + len(pieces) / self.tokens_per_second)
+        message = AIMessage(content="".join(pieces), usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        delay, pieces, usage = self._plan(messages, kwargs.get("response_format"))
+        await asyncio.sleep(delay + len(pieces) / self.tokens_per_second)
+        message = AIMessage(content="".join(pieces), usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        delay, pieces, usage = self._plan(messages, kwargs.get("response_format"))
+        await asyncio.sleep(delay)
+        for piece in pieces:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            await asyncio.sleep(1 / self.tokens_per_second)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+
+def _openai(profile: dict, http_async_client) -> ChatOpenAI:
+    # 재시도와 전체 제한 시간은 llm_resilience에서 처리
+    return ChatOpenAI(
+        model=profile["model"],
+        temperature=profile["temperature"],
+        http_async_client=http_async_client,
+        stream_usage=True,
+        max_retries=0,
+        timeout=LLM_REQUEST_TIMEOUT,
+        verbose=False,
+    )
+
+
+def create_chat_model(profile: dict, http_async_client=None) -> BaseChatModel:
+    """설정된 공급자로 프로필(model, temperature)에 맞는 채팅 모델 생성"""
+    model = {"model_name": profile["model"], "temperature": profile["temperature"]}
+    if LLM_PROVIDER == "openai":
+        return _openai(profile, http_async_client)
+    if LLM_PROVIDER == "fake":
+        if FAKE_LLM_LATENCY_DISTRIBUTION not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"알 수 없는 지연 시간 분포: {FAKE_LLM_LATENCY_DISTRIBUTION}")
+        return FakeChatModel(**model)
+    if LLM_PROVIDER == "record":
+        return RecordingChatModel(inner=_openai(profile, http_async_client), **model)
+    if LLM_PROVIDER == "replay":
+        return ReplayChatModel(**model)
+    raise ValueError(f"알 수 없는 LLM_PROVIDER: {LLM_PROVIDER}")
@@ -0,0 +1,254 @@
+"""프로세스 공용 LLM 클라이언트 / 프롬프트 레지스트리
+
+앱 시작(lifespan) 시 HTTP 커넥션 풀을 공유하는 채팅 모델(llm_providers)과
+프롬프트별 모델(응답 형식을 붙인 모델)을 한 번만 만들어 두고, 라우터는 프롬프트 이름으로 호출한다.
+프롬프트는 토큰 예산 적용/캐시 키 계산을 위해 먼저 렌더링한 뒤 모델에 넘긴다.
+"""
+
+import asyncio
+import os
+from typing import NamedTuple, Optional
+
+import httpx
+from dotenv import load_dotenv
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from circuit_breaker import get_breaker
+from llm_cache import response_cache
+from llm_cassette import cassette
+from llm_providers import LLM_PROVIDER, create_chat_model
+from llm_resilience import Deadline, hedged, with_retries
+from prompt_budget import count_tokens, fit_prompt
+from prompts import PROMPTS, RESPONSE_FORMATS
+from rate_limit import llm_concurrency
+from singleflight import single_flight
+from telemetry import count_http_attempt, record_cache_result, track_llm_call
+
+load_dotenv()
+
+# 프로필 이름 → 모델 설정
+LLM_PROFILES = {
+    "feedback": {"model": "gpt-4o-mini", "temperature": 0.3},
+    "analysis": {"model": "gpt-4o", "temperature": 0.2},
+}
+
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "50"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+
+
+class PreparedPrompt(NamedTuple):
+    """렌더링을 마친 프롬프트 (캐시 키로 미리 조회한 뒤 같은 값으로 호출할 때 재사용)"""
+
+    profile: str
+    prompt_value: object
+    key: str
+    prompt_tokens: int
+
+
+class LLMRegistry:
+    def __init__(self):
+        self.http_client = None
+        self.clients = {}
+        self.prompts = {}
+        self.models = {}
+
+    @property
+    def started(self) -> bool:
+        return self.http_client is not None
+
+    async def startup(self, transport=None):
+        """커넥션 풀, 클라이언트, 프롬프트별 모델 생성 (transport는 벤치마크/테스트용)"""
+        if self.started:
+            return
+        self.http_client = httpx.AsyncClient(
+            transport=transport,
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+            ),
+            # 재시도 포함 실제 HTTP 요청 수 집계
+            event_hooks={"request": [count_http_attempt]},
+        )
+        for name, profile in LLM_PROFILES.items():
+            self.clients[name] = create_chat_model(profile, self.http_client)
+            get_breaker(name)
+
+        for name, (prompt, profile) in PROMPTS.items():
+            self.prompts[name] = (prompt, profile)
+            self.models[name] = self._model_for(name, profile)
+        print(
+            f"✅ LLM 레지스트리 준비 완료 (공급자 {LLM_PROVIDER}, 프롬프트 {len(self.prompts)}개)"
+        )
+
+    async def shutdown(self):
+        if self.http_client is not None:
+            await self.http_client.aclose()
+        # record 모드에서 아직 저장하지 않은 녹화 기록
+        cassette.flush()
+        self.http_client = None
+        self.clients.clear()
+        self.prompts.clear()
+        self.models.clear()
+
+    def get_llm(self, profile: str) -> BaseChatModel:
+        return self.clients[profile]
+
+    def _model_for(self, name: str, profile: str):
+        """프롬프트에 JSON 스키마 응답 형식이 있으면 붙인 모델"""
+        llm = self.clients[profile]
+        response_format = RESPONSE_FORMATS.get(name)
+        if response_format is None:
+            return llm
+        return llm.bind(response_format=response_format)
+
+    async def prepare(self, name: str, variables: dict) -> PreparedPrompt:
+        """토큰 예산 적용 → 프롬프트 렌더링 → 캐시 키 계산 (LLM은 호출하지 않음)"""
+        if not self.started:
+            await self.startup()
+        prompt, profile = self.prompts[name]
+        llm = self.clients[profile]
+
+        variables, usage = fit_prompt(name, prompt, variables, llm.model_name)
+        prompt_value = await prompt.ainvoke(variables)
+        key = response_cache.make_key(
+            prompt_value.to_messages(), llm.model_name, llm.temperature
+        )
+        return PreparedPrompt(profile, prompt_value, key, usage["total"])
+
+    async def ainvoke(
+        self, name: str, variables: dict, prepared: Optional[PreparedPrompt] = None
+    ) -> str:
+        """등록된 프롬프트를 렌더링해 캐시 확인 후 LLM 호출 (동일 요청은 병합)
+
+        prepared: prepare()로 이미 렌더링한 프롬프트가 있으면 다시 렌더링하지 않음
+        """
+        if prepared is None:
+            prepared = await self.prepare(name, variables)
+        profile, prompt_value, key, prompt_tokens = prepared
+        cached = response_cache.get(key)
+        if cached is not None:
+            record_cache_result(name, "hit")
+            return cached
+
+        if single_flight.in_flight(key) is not None:
+            record_cache_result(name, "coalesced")
+        return await single_flight.do(
+            key, lambda: self._invoke(name, profile, prompt_value, key, prompt_tokens)
+        )
+
+    async def _invoke(
+        self, name: str, profile: str, prompt_value, key: str, prompt_tokens: int
+    ) -> str:
+        llm = self.clients[profile]
+        model = self.models[name]
+        breaker = get_breaker(profile)
+        async with llm_concurrency.slot():
+            with breaker.guard(name), track_llm_call(name, llm.model_name) as call:
+                deadline = Deadline(name)
+                message = await with_retries(
+                    deadline,
+                    lambda: hedged(name, False, lambda: model.ainvoke(prompt_value)),
+                )
+                result = message.content
+                call.set_usage(
+                    message.usage_metadata,
+                    prompt_tokens,
+                    count_tokens(result, llm.model_name),
+                )
+        response_cache.set(key, result)
+        return result
+
+    async def astream(
+        self, name: str, variables: dict, prepared: Optional[PreparedPrompt] = None
+    ):
+        """토큰 단위 스트리밍 - 완료되면 전체 텍스트를 캐시에 저장"""
+        if prepared is None:
+            prepared = await self.prepare(name, variables)
+        profile, prompt_value, key, prompt_tokens = prepared
+        cached = response_cache.get(key)
+        if cached is not None:
+            record_cache_result(name, "hit")
+            yield cached
+            return
+
+        # 같은 요청이 이미 진행 중이면 그 결과를 한 번에 전달
+        if single_flight.in_flight(key) is not None:
+            record_cache_result(name, "coalesced")
+            yield await single_flight.wait(key)
+            return
+
+        llm = self.clients[profile]
+        model = self.models[name]
+        breaker = get_breaker(profile)
+        flight = single_flight.begin(key)
+        chunks = []
+        usage_metadata = None
+        try:
+            async with llm_concurrency.slot():
+                with breaker.guard(name), track_llm_call(name, llm.model_name) as call:
+                    # 첫 토큰이 오기 전까지만 재시도/헤지, 이후에는 남은 제한 시간만 적용
+                    deadline = Deadline(name)
+                    stream, chunk = await with_retries(
+                        deadline,
+                        lambda: hedged(
+                            name, True, lambda: _open_stream(model, prompt_value), _close_stream
+                        ),
+                    )
+                    try:
+                        while chunk is not None:
+                            if chunk.usage_metadata:
+                                usage_metadata = chunk.usage_metadata
+                            if chunk.content:
+                                call.mark_first_token()
+                                chunks.append(chunk.content)
+                                yield chunk.content
+                            chunk = await _next_chunk(stream, deadline)
+                    finally:
+                        await stream.aclose()
+                    call.set_usage(
+                        usage_metadata,
+                        prompt_tokens,
+                        count_tokens("".join(chunks), llm.model_name),
+                    )
+        except BaseException as e:
+            # 클라이언트 연결 종료(GeneratorExit) 등으로 중단되면 기다리던 쪽도 실패 처리
+            error = e if isinstance(e, Exception) else RuntimeError("스트리밍이 중단되었습니다.")
+            single_flight.finish(key, flight, error=error)
+            raise
+        result = "".join(chunks)
+        response_cache.set(key, result)
+        single_flight.finish(key, flight, result=result)
+
+
+async def _open_stream(llm, prompt_value):
+    """내용이 있는 첫 청크까지 받아 (스트림, 첫 청크) 반환"""
+    stream = llm.astream(prompt_value)
+    try:
+        async for chunk in stream:
+            if chunk.content:
+                return stream, chunk
+        return stream, None
+    except BaseException:
+        await stream.aclose()
+        raise
+
+
+async def _close_stream(opened):
+    await opened[0].aclose()
+
+
+async def _next_chunk(stream, deadline: Deadline):
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise deadline.error()
+    try:
+        return await asyncio.wait_for(stream.__anext__(), timeout=remaining)
+    except StopAsyncIteration:
+        return None
+    except asyncio.TimeoutError as e:
+        raise deadline.error() from e
+
+
+llm_registry = LLMRegistry()
@@ -0,0 +1,197 @@
+"""LLM 호출 타임아웃 / 재시도 / 헤지 요청
+
+- 프롬프트(엔드포인트)별 전체 제한 시간: 넘기면 LLMTimeoutError (504)
+- 재시도 가능한 오류(타임아웃, 연결 오류, 429, 5xx)는 지수 백오프 + full jitter로 재시도
+- 헤지 요청: 응답이 최근 지연 시간 백분위수를 넘기면 같은 요청을 하나 더 보내
+  먼저 끝난 쪽을 쓰고 나머지는 취소 (스트리밍은 첫 토큰 기준)
+
+OpenAI SDK의 자체 재시도는 끄고(max_retries=0) 여기서 제한 시간 안에서만 재시도한다.
+"""
+
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Optional
+
+from telemetry import record_hedge
+
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+
+# 헤지 요청을 보낼 프롬프트 (쉼표 구분, 비우면 사용 안 함)
+LLM_HEDGE_PROMPTS = set(
+    filter(None, [p.strip() for p in os.getenv("LLM_HEDGE_PROMPTS", "mid_feedback").split(",")])
+)
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1"))
+# 백분위수를 믿을 수 있을 만큼 표본이 쌓이기 전에는 헤지하지 않음
+LLM_HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+# 프롬프트별 전체 제한 시간(초) (LLM_DEADLINE_<NAME> 환경변수로 변경 가능)
+DEFAULT_DEADLINES = {
+    "mid_feedback": 30,
+    "final_feedback": 90,
+    "score": 30,
+    "comprehensive_analysis": 120,
+}
+DEFAULT_ANALYSIS_DEADLINE = 120
+
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+class RetryableLLMError(Exception):
+    """공급자가 일시적인 실패라고 알린 오류 (재시도 대상)"""
+
+
+class LLMTimeoutError(TimeoutError):
+    """프롬프트별 제한 시간 안에 LLM 응답을 받지 못함"""
+
+    def __init__(self, name: str, deadline: float):
+        super().__init__("AI 응답이 지연되고 있습니다. 잠시 후 다시 시도해주세요.")
+        self.name = name
+        self.deadline = deadline
+
+
+def get_deadline(name: str) -> float:
+    return float(
+        os.getenv(
+            f"LLM_DEADLINE_{name.upper()}",
+            DEFAULT_DEADLINES.get(name, DEFAULT_ANALYSIS_DEADLINE),
+        )
+    )
+
+
+class Deadline:
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = get_deadline(name)
+        self.expires_at = time.monotonic() + self.seconds
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def error(self) -> LLMTimeoutError:
+        return LLMTimeoutError(self.name, self.seconds)
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (TimeoutError, ConnectionError, RetryableLLMError)):
+        return True
+    # openai.APIConnectionError / APITimeoutError
+    if type(error).__name__ in ("APIConnectionError", "APITimeoutError"):
+        return True
+    status = getattr(error, "status_code", None)
+    return status in RETRYABLE_STATUS or (status is not None and status >= 500)
+
+
+def backoff(attempt: int) -> float:
+    """full jitter: 0 ~ min(최대, 기본 * 2^attempt)"""
+    return random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+
+
+async def with_retries(deadline: Deadline, attempt):
+    """attempt()를 제한 시간 안에서 재시도"""
+    for n in range(LLM_MAX_RETRIES + 1):
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise deadline.error()
+        try:
+            return await asyncio.wait_for(attempt(), timeout=remaining)
+        except Exception as e:
+            if isinstance(e, TimeoutError) and deadline.remaining() <= 0:
+                raise deadline.error() from e
+            if not is_retryable(e) or n == LLM_MAX_RETRIES:
+                raise
+            delay = backoff(n)
+            if delay >= deadline.remaining():
+                raise
+            print(f"🔁 LLM 재시도 ({deadline.name}, {n + 1}/{LLM_MAX_RETRIES}, {delay:.2f}초 후): {e!r}")
+            await asyncio.sleep(delay)
+
+
+class LatencyTracker:
+    """프롬프트별 최근 응답 시간 (스트리밍은 첫 토큰까지 시간)"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._samples = {}
+
+    def observe(self, key, seconds: float):
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, key, q: float) -> Optional[float]:
+        samples = self._samples.get(key)
+        if not samples or len(samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+latency_tracker = LatencyTracker()
+
+
+def hedge_delay(name: str, streaming: bool) -> Optional[float]:
+    if name not in LLM_HEDGE_PROMPTS:
+        return None
+    threshold = latency_tracker.percentile((name, streaming), LLM_HEDGE_PERCENTILE)
+    if threshold is None:
+        return None
+    return max(threshold, LLM_HEDGE_MIN_DELAY)
+
+
+async def hedged(name: str, streaming: bool, attempt, discard=None):
+    """attempt()가 임계 시간을 넘기면 한 번 더 보내 먼저 성공한 결과 사용
+
+    discard: 늦게 끝난 쪽 결과 정리 (스트림 닫기 등)
+    """
+    key = (name, streaming)
+
+    async def timed():
+        started = time.monotonic()
+        result = await attempt()
+        latency_tracker.observe(key, time.monotonic() - started)
+        return result
+
+    delay = hedge_delay(name, streaming)
+    if delay is None:
+        return await timed()
+
+    primary = asyncio.ensure_future(timed())
+    tasks = [primary]
+    winner = None
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            tasks.append(asyncio.ensure_future(timed()))
+            record_hedge(name, "sent")
+
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in tasks:
+                if task not in done:
+                    continue
+                if task.exception() is None:
+                    winner = task
+                    if len(tasks) > 1:
+                        record_hedge(name, "primary" if task is primary else "hedge")
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        # 진 쪽은 취소, 동시에 끝났으면 결과 정리
+        for task in tasks:
+            if task is winner:
+                continue
+            if not task.done():
+                task.cancel()
+            elif discard is not None and not task.cancelled() and task.exception() is None:
+                await discard(task.result())
@@ -1,8 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from database import engine
 from models import Base
+from llm_registry import llm_registry
+from rate_limit import LLMOverloadedError
+from llm_resilience import LLMTimeoutError
+from circuit_breaker import LLMUnavailableError, breaker_stats
+from telemetry import TelemetryMiddleware, render_metrics, usage_recorder
 
 from routers import (
     auth,
@@ -13,6 +19,7 @@ from routers import (
     ai,
     analysis,
     evaluation,
+    jobs,
 )
 
 from dotenv import load_dotenv
@@ -32,8 +39,12 @@ async def lifespan(app: FastAPI):
     """앱 생명주기 관리"""
     # 앱 시작 시 실행
     await create_tables()
+    await llm_registry.startup()
+    usage_recorder.start()
     yield
     # 앱 종료 시 실행 (필요한 경우)
+    await usage_recorder.stop()
+    await llm_registry.shutdown()
     print("🔄 앱이 종료됩니다...")
 
 
@@ -46,6 +57,30 @@ app = FastAPI(
 
 import os
 
+@app.exception_handler(LLMOverloadedError)
+async def llm_overloaded_handler(request: Request, exc: LLMOverloadedError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable_handler(request: Request, exc: LLMUnavailableError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(LLMTimeoutError)
+async def llm_timeout_handler(request: Request, exc: LLMTimeoutError):
+    print(f"⏱️ LLM 제한 시간 초과 ({exc.name}, {exc.deadline}초)")
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
 # CORS_ORIGINS 환경변수에서 중복/공백/빈 문자열 제거
 origins = list(
     set(filter(None, [o.strip() for o in os.getenv("CORS_ORIGINS", "").split(",")]))
@@ -59,6 +94,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(TelemetryMiddleware)
 
 # 라우터 등록
 app.include_router(auth.router)
@@ -69,6 +105,7 @@ app.include_router(assignments.router)
 app.include_router(evaluation.router)
 app.include_router(analysis.router)
 app.include_router(ai.router)
+app.include_router(jobs.router)
 
 
 @app.get("/")
@@ -78,7 +115,23 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "message": "API is running normally"}
+    # LLM 회로 차단기가 하나라도 열려 있으면 degraded
+    breakers = breaker_stats()
+    if any(breaker["state"] != "closed" for breaker in breakers.values()):
+        return {
+            "status": "degraded",
+            "message": "AI service is degraded",
+            "llm": breakers,
+        }
+    return {"status": "healthy", "message": "API is running normally", "llm": breakers}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus 수집용 LLM 지표"""
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,55 @@
+"""
+merged_feedback_guide 컬럼 추가 마이그레이션
+- users 테이블에 merged_feedback_guide 컬럼 추가
+- 기존 교사의 feedback_guide를 few-shot 문자열로 변환해 채움
+"""
+
+import asyncio
+import json
+from sqlalchemy import text
+from database import engine
+from prompts import merge_feedback_guide
+
+
+async def migrate_add_merged_feedback_guide():
+    """users 테이블에 merged_feedback_guide 컬럼 추가 및 기존 데이터 채우기"""
+    print("🔄 마이그레이션 시작: merged_feedback_guide 컬럼 추가")
+
+    try:
+        async with engine.begin() as conn:
+            # 1. 컬럼 추가 (이미 있으면 건너뜀)
+            print("🏗️  1/2: 컬럼 추가 중...")
+            columns = await conn.execute(text("PRAGMA table_info(users)"))
+            if "merged_feedback_guide" in [row[1] for row in columns]:
+                print("ℹ️  이미 컬럼이 존재합니다.")
+            else:
+                await conn.execute(
+                    text("ALTER TABLE users ADD COLUMN merged_feedback_guide TEXT")
+                )
+
+            # 2. 기존 가이드 변환
+            print("📥 2/2: 기존 피드백 가이드 변환 중...")
+            users = await conn.execute(text("SELECT id, feedback_guide FROM users"))
+            count = 0
+            for user_id, feedback_guide in users.fetchall():
+                if isinstance(feedback_guide, str):
+                    feedback_guide = json.loads(feedback_guide)
+                await conn.execute(
+                    text(
+                        "UPDATE users SET merged_feedback_guide = :merged WHERE id = :id"
+                    ),
+                    {"merged": merge_feedback_guide(feedback_guide), "id": user_id},
+                )
+                count += 1
+
+        print(f"✅ 마이그레이션 완료: 교사 {count}명의 피드백 가이드를 변환했습니다!")
+        return True
+
+    except Exception as e:
+        print(f"❌ 마이그레이션 실패: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = asyncio.run(migrate_add_merged_feedback_guide())
+    exit(0 if success else 1)
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Text, JSON
+from sqlalchemy import (
+    Column, Integer, String, ForeignKey, DateTime, Enum, Text, JSON, Float, UniqueConstraint
+)
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase, relationship
 from datetime import datetime
@@ -23,6 +25,8 @@ class User(Base):
     school_level = Column(Enum(SchoolLevel), nullable=False)
     name = Column(String, nullable=False)
     feedback_guide = Column(JSON, nullable=True, default=dict)
+    # feedback_guide를 프롬프트용 few-shot 문자열로 미리 변환해 둔 값
+    merged_feedback_guide = Column(Text, nullable=True)
 
     classes = relationship(
         "SchoolClass", back_populates="user", cascade="all, delete-orphan"
@@ -259,3 +263,152 @@ class AnalysisResult(Base):
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
     student = relationship("Student", back_populates="analysis_result")
+
+
+class BatchRunStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class BatchRun(Base):
+    """학급 단위 AI 일괄 처리 진행 상황"""
+
+    __tablename__ = "batch_runs"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    kind = Column(String, nullable=False)
+    target_id = Column(Integer, nullable=False)
+    status = Column(
+        Enum(BatchRunStatus), nullable=False, default=BatchRunStatus.pending
+    )
+    total = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    errors = Column(JSON, nullable=True, default=list)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class Job(Base):
+    """LLM 작업 큐 (worker.py가 처리)"""
+
+    __tablename__ = "llm_jobs"
+    # 순번 id를 노출하면 다른 학생 결과를 조회할 수 있으므로 무작위 문자열 사용
+    id = Column(String, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True
+    )
+    status = Column(
+        Enum(JobStatus), nullable=False, default=JobStatus.queued, index=True
+    )
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    worker_id = Column(String, nullable=True)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class LLMUsage(Base):
+    """LLM 호출 1건의 토큰/비용/지연 시간 기록"""
+
+    __tablename__ = "llm_usage"
+    id = Column(Integer, primary_key=True, index=True)
+    endpoint = Column(String, nullable=False)
+    prompt_name = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    teacher_id = Column(
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True
+    )
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    cost_usd = Column(Float, nullable=False, default=0)
+    duration_ms = Column(Integer, nullable=False, default=0)
+    ttft_ms = Column(Integer, nullable=True)
+    attempts = Column(Integer, nullable=False, default=1)
+    status = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+class PrecomputedMidFeedback(Base):
+    """임시 저장된 초안으로 미리 만들어 둔 중간 피드백 (학생/과제별 최신 1건)"""
+
+    __tablename__ = "precomputed_mid_feedback"
+    __table_args__ = (UniqueConstraint("student_id", "assignment_id"),)
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(
+        Integer, ForeignKey("student.id", ondelete="CASCADE"), nullable=False
+    )
+    assignment_id = Column(
+        Integer, ForeignKey("assignment.id", ondelete="CASCADE"), nullable=False
+    )
+    # 렌더링된 프롬프트 해시 (/ai/mid_feedback 요청과 같으면 그대로 사용)
+    content_hash = Column(String, nullable=False, index=True)
+    content = Column(Text, nullable=False)
+    result = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class LastMidFeedback(Base):
+    """학생/과제별로 마지막으로 생성한 중간 피드백과 그때의 글 (거의 같은 글이면 재사용)"""
+
+    __tablename__ = "last_mid_feedback"
+    __table_args__ = (UniqueConstraint("student_id", "assignment_id"),)
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(
+        Integer, ForeignKey("student.id", ondelete="CASCADE"), nullable=False
+    )
+    assignment_id = Column(
+        Integer, ForeignKey("assignment.id", ondelete="CASCADE"), nullable=False
+    )
+    # 글을 제외한 프롬프트 변수(조건, 안내, 학년 등) 해시 (바뀌면 재사용하지 않음)
+    context_hash = Column(String, nullable=False)
+    content = Column(Text, nullable=False)
+    result = Column(Text, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class StudentProgress(Base):
+    """학생별 진행 현황 요약 (제출/피드백/점수가 바뀔 때마다 해당 제출물만 반영해 갱신)"""
+
+    __tablename__ = "student_progress"
+    student_id = Column(
+        Integer, ForeignKey("student.id", ondelete="CASCADE"), primary_key=True
+    )
+    assignment_count = Column(Integer, nullable=False, default=0)  # 첫 제출 이상 진행한 과제
+    final_submitted_count = Column(Integer, nullable=False, default=0)
+    evaluation_count = Column(Integer, nullable=False, default=0)  # 제출한 평가
+    feedback_count = Column(Integer, nullable=False, default=0)  # 교사 피드백을 받은 과제/평가
+    latest_score = Column(String, nullable=True)
+    recent_scores = Column(JSON, nullable=False, default=list)
+    revision_ratio = Column(Float, nullable=True)  # 수정본이 있는 과제의 평균 수정 비율
+    metrics_trend = Column(JSON, nullable=False, default=list)  # 과제 제출 순 정량 지표
+    # 제출물 id → 요약 (다른 제출물을 다시 읽지 않고 갱신하기 위한 내부 상태)
+    assignments = Column(JSON, nullable=False, default=dict)
+    evaluations = Column(JSON, nullable=False, default=dict)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class RateLimitBucket(Base):
+    """학생/교사별 AI 요청 토큰 버킷 (API/워커 프로세스가 함께 씀)"""
+
+    __tablename__ = "rate_limit_buckets"
+    key = Column(String, primary_key=True)  # "student:1", "teacher:1"
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)  # 마지막 갱신 시각 (time.time())
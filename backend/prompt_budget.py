@@ -0,0 +1,175 @@
+"""토큰 예산 기반 프롬프트 조립
+
+프롬프트 변수(섹션)별 토큰 수를 tiktoken으로 측정하고, 엔드포인트별 예산을 넘으면
+우선순위가 낮은 섹션부터 앞/뒤를 남기고 가운데를 잘라 예산 안으로 맞춘다.
+"""
+
+import os
+from functools import lru_cache
+
+import tiktoken
+
+TRUNCATION_MARKER = "\n…(중략)…\n"
+
+# 프롬프트별 전체 토큰 예산 (PROMPT_BUDGET_<NAME> 환경변수로 변경 가능)
+DEFAULT_BUDGETS = {
+    "mid_feedback": 6000,
+    "final_feedback": 8000,
+    "score": 4000,
+    "grammar_analysis": 12000,
+    "spelling_analysis": 12000,
+    "sentence_analysis": 12000,
+    "structure_analysis": 12000,
+    "vocab_analysis": 12000,
+    "comprehensive_analysis": 8000,
+    "structured_analysis": 12000,
+}
+
+# 섹션 우선순위: 숫자가 클수록 먼저 잘림, 목록에 없는 변수는 자르지 않음
+SECTION_PRIORITIES = {
+    "mid_feedback": {
+        "content": 0,
+        "condition": 1,
+        "guide": 2,
+        "additional_instructions": 3,
+        "feedback_guide": 4,
+    },
+    "final_feedback": {
+        "content": 0,
+        "condition": 1,
+        "guide": 2,
+        "additional_instructions": 3,
+        "feedback_guide": 4,
+    },
+    "score": {"content": 0, "item": 1, "criteria": 1, "feedback_guide": 2},
+    "comprehensive_analysis": {
+        "grammar_result": 0,
+        "spelling_result": 0,
+        "sentence_result": 0,
+        "structure_result": 0,
+        "vocab_result": 0,
+    },
+}
+for _name in ("grammar", "spelling", "sentence", "structure", "vocab", "structured"):
+    SECTION_PRIORITIES[f"{_name}_analysis"] = {
+        "submissions": 0,
+        "last_summary": 1,
+        "metrics": 2,
+    }
+for _name in ("spelling", "structured"):
+    SECTION_PRIORITIES[f"{_name}_analysis"]["spelling_findings"] = 2
+
+# 잘라도 최소한 남겨 둘 토큰 수
+MIN_SECTION_TOKENS = 64
+
+
+def get_budget(name: str) -> int:
+    return int(os.getenv(f"PROMPT_BUDGET_{name.upper()}", DEFAULT_BUDGETS.get(name, 0)))
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # 오프라인 환경 등 인코딩 파일을 받을 수 없으면 추정치 사용
+        print(f"⚠️ tiktoken 인코딩을 불러올 수 없어 토큰 수를 추정합니다: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is None:
+        # 한글 한 글자(3바이트)가 대략 1토큰
+        return max(1, len(text.encode("utf-8")) // 3)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> str:
+    """앞부분 2/3, 뒷부분 1/3을 남기고 가운데를 생략"""
+    total = count_tokens(text, model)
+    if total <= max_tokens:
+        return text
+    # 생략 표시 자체의 토큰도 예산에 포함
+    max_tokens -= count_tokens(TRUNCATION_MARKER, model)
+    if max_tokens <= 0:
+        return ""
+    head = max_tokens * 2 // 3
+    tail = max_tokens - head
+
+    encoding = _get_encoding(model)
+    if encoding is None:
+        ratio = len(text) / total
+        head_chars, tail_chars = int(head * ratio), int(tail * ratio)
+        return text[:head_chars] + TRUNCATION_MARKER + (text[-tail_chars:] if tail_chars else "")
+
+    tokens = encoding.encode(text, disallowed_special=())
+    return (
+        encoding.decode(tokens[:head])
+        + TRUNCATION_MARKER
+        + (encoding.decode(tokens[-tail:]) if tail else "")
+    )
+
+
+_template_tokens = {}
+
+
+def _count_template_tokens(name: str, prompt, model: str) -> int:
+    """변수를 비운 상태의 프롬프트 고정 부분 토큰 수 (프롬프트별 1회 계산)"""
+    if name not in _template_tokens:
+        empty = {var: "" for var in prompt.input_variables}
+        messages = prompt.format_messages(**empty)
+        _template_tokens[name] = sum(count_tokens(m.content, model) for m in messages)
+    return _template_tokens[name]
+
+
+def fit_prompt(name: str, prompt, variables: dict, model: str):
+    """예산을 넘으면 낮은 우선순위 섹션부터 잘라낸 변수와 토큰 사용 내역을 반환"""
+    budget = get_budget(name)
+    priorities = SECTION_PRIORITIES.get(name, {})
+    fitted = dict(variables)
+    sections = {
+        key: count_tokens(str(value), model)
+        for key, value in fitted.items()
+        if key in prompt.input_variables and value is not None
+    }
+    template_tokens = _count_template_tokens(name, prompt, model)
+    total = template_tokens + sum(sections.values())
+    truncated = []
+
+    if budget and total > budget:
+        # 낮은 우선순위(큰 숫자)부터 처리
+        for key in sorted(
+            (k for k in sections if k in priorities),
+            key=lambda k: priorities[k],
+            reverse=True,
+        ):
+            over = total - budget
+            if over <= 0:
+                break
+            keep = max(MIN_SECTION_TOKENS, sections[key] - over)
+            if keep >= sections[key]:
+                continue
+            fitted[key] = truncate_tokens(str(fitted[key]), keep, model)
+            new_tokens = count_tokens(fitted[key], model)
+            total -= sections[key] - new_tokens
+            sections[key] = new_tokens
+            truncated.append(key)
+
+    usage = {
+        "prompt": name,
+        "budget": budget,
+        "template": template_tokens,
+        "sections": sections,
+        "total": total,
+        "truncated": truncated,
+    }
+    print(
+        f"🧮 [{name}] 프롬프트 토큰 {total}/{budget}"
+        + (f" (잘린 섹션: {', '.join(truncated)})" if truncated else "")
+    )
+    return fitted, usage
@@ -0,0 +1,155 @@
+"""AI 요청 속도 제한
+
+- 학생/교사별 토큰 버킷: 초과 시 429 + Retry-After
+  버킷은 rate_limit_buckets 테이블에 두어 uvicorn 워커 여러 개와 작업 워커가 같은 한도를 나눠 쓴다.
+- LLM 동시 호출 상한: 대기 시간을 넘기면 LLMOverloadedError (503)
+  LLM_MAX_IN_FLIGHT는 전체 상한이며, 프로세스마다 LLM_PROCESSES로 나눈 만큼만 동시에 호출한다.
+"""
+
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+import models
+import telemetry
+from database import AsyncSessionLocal
+from student_context import get_student_context
+
+AI_RATE_STUDENT_BURST = int(os.getenv("AI_RATE_STUDENT_BURST", "3"))
+AI_RATE_STUDENT_PER_MINUTE = float(os.getenv("AI_RATE_STUDENT_PER_MINUTE", "0.5"))
+AI_RATE_TEACHER_BURST = int(os.getenv("AI_RATE_TEACHER_BURST", "60"))
+AI_RATE_TEACHER_PER_MINUTE = float(os.getenv("AI_RATE_TEACHER_PER_MINUTE", "60"))
+
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "20"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+# LLM을 호출하는 프로세스 수 (uvicorn --workers 수 + worker.py 수)
+LLM_PROCESSES = max(int(os.getenv("LLM_PROCESSES", "1")), 1)
+
+
+class LLMOverloadedError(Exception):
+    """동시 LLM 호출 상한에 걸려 대기 시간을 넘긴 경우"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("AI 요청이 많아 잠시 후 다시 시도해주세요.")
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """키별 토큰 버킷 (rate_limit_buckets 행 하나가 버킷 하나)"""
+
+    def __init__(self, capacity: int, per_minute: float):
+        self.capacity = capacity
+        self.refill_per_second = per_minute / 60
+
+    def _available(self, now: float):
+        """now 시각까지 채워진 토큰 수 (SQL 식)"""
+        bucket = models.RateLimitBucket
+        return func.min(
+            self.capacity, bucket.tokens + (now - bucket.updated_at) * self.refill_per_second
+        )
+
+    async def try_consume(self, db: AsyncSession, key: str, now: float) -> float:
+        """토큰 1개 차감. 차감했으면 0, 모자라면 기다려야 할 초
+
+        확인과 차감을 UPDATE 한 문장으로 해서 여러 프로세스가 동시에 차감해도 한도를 넘지 않음
+        """
+        bucket = models.RateLimitBucket
+        await db.execute(
+            insert(bucket)
+            .values(key=key, tokens=self.capacity, updated_at=now)
+            .on_conflict_do_nothing(index_elements=[bucket.key])
+        )
+        available = self._available(now)
+        consumed = await db.execute(
+            update(bucket)
+            .where(bucket.key == key, available >= 1)
+            .values(tokens=available - 1, updated_at=now)
+        )
+        if consumed.rowcount == 1:
+            return 0
+        if self.refill_per_second <= 0:
+            return math.inf
+        tokens = (await db.execute(select(available).where(bucket.key == key))).scalar_one()
+        return (1 - tokens) / self.refill_per_second
+
+
+student_limiter = RateLimiter(AI_RATE_STUDENT_BURST, AI_RATE_STUDENT_PER_MINUTE)
+teacher_limiter = RateLimiter(AI_RATE_TEACHER_BURST, AI_RATE_TEACHER_PER_MINUTE)
+
+
+async def check_ai_rate_limit(
+    db: AsyncSession,
+    student_id: Optional[int] = None,
+    teacher_id: Optional[int] = None,
+):
+    """학생 버킷과 담당 교사 버킷을 모두 확인한 뒤 함께 차감 (초과 시 429)"""
+    if teacher_id is None and student_id is not None:
+        teacher_id = (await get_student_context(db, student_id)).teacher_id
+    # 이후 LLM 사용량을 담당 교사 기준으로 기록
+    telemetry.bind(teacher_id=teacher_id)
+
+    buckets = []
+    if student_id is not None:
+        buckets.append((student_limiter, f"student:{student_id}"))
+    if teacher_id is not None:
+        buckets.append((teacher_limiter, f"teacher:{teacher_id}"))
+    if not buckets:
+        return
+
+    now = time.time()
+    # 호출한 쪽 트랜잭션과 섞이지 않도록 별도 세션에서 차감
+    async with AsyncSessionLocal() as limit_db:
+        wait = max([await limiter.try_consume(limit_db, key, now) for limiter, key in buckets])
+        if wait > 0:
+            # 한쪽 버킷만 모자라도 다른 버킷 차감까지 취소
+            await limit_db.rollback()
+            retry_after = str(math.ceil(wait)) if math.isfinite(wait) else "3600"
+            raise HTTPException(
+                status_code=429,
+                detail="AI 요청이 너무 많습니다. 잠시 후 다시 시도해주세요.",
+                headers={"Retry-After": retry_after},
+            )
+        await limit_db.commit()
+
+
+class LLMConcurrencyLimiter:
+    def __init__(self, max_in_flight: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+
+    @asynccontextmanager
+    async def slot(self):
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise LLMOverloadedError(retry_after=math.ceil(self.queue_timeout))
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        # 이 프로세스 기준 값 (전체 상한은 max_in_flight x LLM_PROCESSES)
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "processes": LLM_PROCESSES,
+        }
+
+
+llm_concurrency = LLMConcurrencyLimiter(
+    max(LLM_MAX_IN_FLIGHT // LLM_PROCESSES, 1), LLM_QUEUE_TIMEOUT
+)
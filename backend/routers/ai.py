@@ -1,15 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime, timedelta
 
 from dotenv import load_dotenv
 from routers.auth import get_current_user
 from sqlalchemy.ext.asyncio import AsyncSession
-import crud, database, models
-
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-import os
-from pydantic import SecretStr
+import crud, database, models, schemas
+
+from llm_cache import response_cache
+from llm_registry import llm_registry
+from singleflight import single_flight
+from sse import sse_event, sse_response
+from rate_limit import check_ai_rate_limit
+from llm_resilience import LLMTimeoutError
+from circuit_breaker import LLMUnavailableError
+from speculative import find_precomputed_mid_feedback
+from feedback_reuse import find_reusable_mid_feedback, remember_mid_feedback
+from batch import score_evaluation
+from jobs import enqueue_job
+from ai_service import (
+    build_mid_feedback_variables,
+    build_final_feedback_variables,
+    clean_final_feedback,
+    fallback_mid_feedback,
+    build_score_variables,
+)
 
 
 load_dotenv()
@@ -17,20 +34,8 @@ load_dotenv()
 
 router = APIRouter(prefix="/ai", tags=['ai'])
 
-def merge_feedback_guide(feedback_guide) :
-    result = ""
-    for i in range(1,6) :
-        ex = feedback_guide[str(i)]
-
-        result += (
-            "---------------------------\n"
-            f"student_response : {ex['studentExample']}\n"
-            f"teacher_feedback : {ex['teacherFeedback']}\n"
-            f"teacher_score : {ex['score']}\n"
-        )
-    
-    return result
-
+# 일괄 처리 진행 상황 스트림의 조회 주기(초)
+BATCH_STREAM_INTERVAL = float(os.getenv("BATCH_STREAM_INTERVAL", "1"))
 
 
 @router.post("/mid_feedback")
@@ -38,87 +43,62 @@ async def generate_mid_feedback(
     feedback_data : dict,
     db: AsyncSession = Depends(database.get_db)
     ) :
-    # 1. 학생 → 학급 → 교사 → feedback_guide
-    student = await db.get(models.Student, feedback_data['student_id'])
-    if not student:
-        raise HTTPException(404, '학생을 찾을 수 없습니다.')
-    school_class = await db.get(models.SchoolClass, student.class_id)
-    if not school_class:
-        raise HTTPException(404, '학급을 찾을 수 없습니다.')
-    user = await db.get(models.User, school_class.user_id)
-    if not user:
-        raise HTTPException(404, '교사를 찾을 수 없습니다.')
-    feedback_guide = user.feedback_guide
+    variables = await build_mid_feedback_variables(feedback_data, db)
+    # 미리 생성한 피드백 조회와 LLM 호출이 같은 렌더링 결과(캐시 키)를 사용
+    prepared = await llm_registry.prepare("mid_feedback", variables)
+    precomputed = await find_precomputed_mid_feedback(
+        db, feedback_data['student_id'], prepared.key
+    )
+    if precomputed is not None:
+        await remember_mid_feedback(feedback_data, variables, precomputed)
+        return {"status": "success", "result": precomputed, "precomputed": True}
+    reused = await find_reusable_mid_feedback(db, feedback_data, variables)
+    if reused is not None:
+        return {"status": "success", "result": reused, "reused": True}
+    # 미리 생성/재사용한 피드백은 LLM을 부르지 않으므로 속도 제한은 새로 생성할 때만 차감
+    await check_ai_rate_limit(db, student_id=feedback_data.get('student_id'))
+    try:
+        result = await llm_registry.ainvoke("mid_feedback", variables, prepared=prepared)
+    except LLMUnavailableError:
+        # AI 장애 중에는 기본 안내로 대체 (학생 화면이 멈추지 않도록)
+        return {"status": "degraded", "result": fallback_mid_feedback(feedback_data)}
+    await remember_mid_feedback(feedback_data, variables, result)
     
-    llm = ChatOpenAI(
-        temperature=0.3,
-        model='gpt-4o-mini',
-        verbose=False
+    response = {"status": "success", "result": result}
+    return response
+
+
+@router.post("/mid_feedback/stream")
+async def stream_mid_feedback(
+    feedback_data : dict,
+    db: AsyncSession = Depends(database.get_db)
+    ) :
+    variables = await build_mid_feedback_variables(feedback_data, db)
+    prepared = await llm_registry.prepare("mid_feedback", variables)
+    precomputed = await find_precomputed_mid_feedback(
+        db, feedback_data['student_id'], prepared.key
     )
-    print(feedback_data)
-    grade = await crud.get_grade_by_student_id(
-        db, 
-        feedback_data['student_id']
+    if precomputed is not None:
+        await remember_mid_feedback(feedback_data, variables, precomputed)
+        return sse_response(stored_result_events(precomputed, "precomputed"))
+    reused = await find_reusable_mid_feedback(db, feedback_data, variables)
+    if reused is not None:
+        return sse_response(stored_result_events(reused, "reused"))
+    await check_ai_rate_limit(db, student_id=feedback_data.get('student_id'))
+
+    async def remember(result: str):
+        await remember_mid_feedback(feedback_data, variables, result)
+
+    return sse_response(
+        stream_feedback_events(
+            "mid_feedback",
+            variables,
+            fallback=fallback_mid_feedback(feedback_data),
+            on_done=remember,
+            prepared=prepared,
         )
-    
-    mid_feedback_prompt = ChatPromptTemplate.from_messages([
-        ("system", """
-
-The followings are real teacher feedback examples.
-Imitate the tone and expression style of those examples when writing your own feedback :
-
-{feedback_guide}
-----
-
-You are a helpful writing assistant providing feedback to a grade 5 student who is currently writing their draft.
-Your goal is to guide the student in a warm and supportive way by giving them one big guiding question based on their current draft, writing condition, and teacher guide.
-
-When giving feedback, follow these instructions:
-0. Always write in Korean. And Try to be Familiar. 
-1. Adjust the vocabulary and sentence complexity based on the student's elementary {grade} to ensure the feedback is age-appropriate and easy to understand.
-2. Do not give general praise or multiple comments. Instead, focus on **one main question** that can help the student clearly improve their writing.
-3. Format the output like this:
-
-## [ONE BIG QUESTION]  
-(And below the question, provide 2~3 explanatory sentences that support it.
-Give helpful example that guide the student to clarify the direction of their writing.
-Make sure to reflect the writing condition, guide)
-         
-         """),
-        ("human", """
-Based on the following information, provide detailed feedback on the student's writing.
-
-# Condition: 
-{condition}
-
-# Guide: 
-{guide}
-
-# Student's Writing: 
-{content}
-
-# Additional Instructions: 
-{additional_instructions}
-         """)
-    ])
-
-    chain = (
-    mid_feedback_prompt
-    |llm
-    |StrOutputParser()
     )
 
-    result = await chain.ainvoke({
-        "grade" : grade,
-        "condition" : feedback_data['condition'],
-        "guide" : feedback_data['guide'],
-        "content" : feedback_data['content'],
-        "feedback_guide" : feedback_guide,
-        "additional_instructions" : feedback_data.get('additional_instructions', '')
-    })
-    
-    response = {"status": "success", "result": result}
-    return response
 
 @router.post("/final_feedback")
 async def generate_final_feedback(
@@ -126,81 +106,144 @@ async def generate_final_feedback(
     db: AsyncSession = Depends(database.get_db),
     user=Depends(get_current_user)
     ) :
+    await check_ai_rate_limit(
+        db, student_id=feedback_data.get('studentId'), teacher_id=user.id
+    )
+    variables = await build_final_feedback_variables(feedback_data, db, user)
+    result = await llm_registry.ainvoke("final_feedback", variables)
+    result = clean_final_feedback(result)
 
-    merged_feedback_guide = merge_feedback_guide(user.feedback_guide)
-
-    student_id = feedback_data['studentId']
+    response = {"status": "success", "result": result}
+    return response
 
-    grade = await crud.get_grade_by_student_id(db, student_id)
 
-    llm = ChatOpenAI(
-        temperature=0.3,
-        model='gpt-4o-mini',
-        verbose=False
+@router.post("/final_feedback/stream")
+async def stream_final_feedback(
+    feedback_data : dict,
+    db: AsyncSession = Depends(database.get_db),
+    user=Depends(get_current_user)
+    ) :
+    await check_ai_rate_limit(
+        db, student_id=feedback_data.get('studentId'), teacher_id=user.id
     )
-
-    final_feedback_prompt = ChatPromptTemplate.from_messages([
-        ("system", """
-The followings are real teacher feedback examples.
-Imitate the tone and expression style of those examples when writing your own feedback :
-
-{feedback_guide}
-----
-
-Your goal is to help the student reflect on what they did well and what they could improve next time, based on the writing condition and guide.
-
-When providing final feedback, always follow these rules:
-0. Adjust the vocabulary and sentence complexity based on the student's {school_level} and {grade} to ensure the feedback is age-appropriate and easy to understand.
-1. Always Write in Korean.
-2. Clearly point out one or two things that could be improved, especially based on the writing condition and guide.
-3. Then praise specific parts of the writing that were done well, linking them to the condition or guide.
-4. Comment on how well the student responded to past feedback from “last_feedbacks.”. If There's nothing on "last_feedbacks", Do NOT mention it.
-5. Give one kind and helpful suggestion (feed-forward) the student can try in their next writing.
-6. **DO NOT GIVE ANY MEANINGLESS PRAISES**
-7. Return only Feedbacks - Not other items(score)
-        """),
-        ("human", """
-Based on the following information, write final feedback on the student's writing.
-
-# Condition: 
-{condition}
-
-# Guide: 
-{guide}
-
-# Student's Writing: 
-{content}
-        """)
-    ])
-
-    chain = (
-        final_feedback_prompt
-        | llm
-        | StrOutputParser()
+    variables = await build_final_feedback_variables(feedback_data, db, user)
+    return sse_response(
+        stream_feedback_events("final_feedback", variables, clean_final_feedback)
     )
 
-    result = await chain.ainvoke({
-        "school_level" : user.school_level,
-        "grade" : grade,
-        "condition": feedback_data['condition'],
-        "guide": feedback_data['guide'],
-        "content": feedback_data['content'],
-        "feedback_guide" : merged_feedback_guide,
-        "additional_instructions": feedback_data.get('additional_instructions', '')
-    })
 
-    result = result.replace("teacher_feedback :", "")
+async def stored_result_events(result: str, source: str):
+    """저장해 둔 피드백을 done 이벤트 하나로 전달 (source: precomputed / reused)"""
+    yield sse_event("done", {"status": "success", "result": result, source: True})
 
 
-    response = {"status": "success", "result": result}
-    return response
+async def stream_feedback_events(
+    name: str,
+    variables: dict,
+    postprocess=None,
+    fallback: str = None,
+    on_done=None,
+    prepared=None,
+):
+    """token 이벤트로 토큰을 흘려보내고, 끝나면 done 이벤트로 전체 텍스트 전달
+
+    fallback: 회로 차단기가 열려 있을 때 done 이벤트로 보낼 기본 안내
+    on_done: 생성에 성공하면 전체 텍스트로 호출할 비동기 함수
+    prepared: 이미 렌더링한 프롬프트 (llm_registry.prepare)
+    """
+    chunks = []
+    try:
+        async for chunk in llm_registry.astream(name, variables, prepared=prepared):
+            chunks.append(chunk)
+            yield sse_event("token", {"text": chunk})
+    except LLMUnavailableError as e:
+        if fallback is not None:
+            yield sse_event("done", {"status": "degraded", "result": fallback})
+        else:
+            yield sse_event("error", {"detail": str(e), "retry_after": e.retry_after})
+        return
+    except LLMTimeoutError as e:
+        print(f"⏱️ 스트리밍 제한 시간 초과 ({name})")
+        yield sse_event("error", {"detail": str(e)})
+        return
+    except Exception as e:
+        print(f"❌ 스트리밍 실패 ({name}): {e}")
+        yield sse_event("error", {"detail": "피드백 생성에 실패했습니다."})
+        return
+
+    result = "".join(chunks)
+    if postprocess is not None:
+        result = postprocess(result)
+    if on_done is not None:
+        await on_done(result)
+    yield sse_event("done", {"status": "success", "result": result})
+
+@router.post("/final_feedback/batch", response_model=schemas.BatchRunGet)
+async def start_final_feedback_batch(
+    request: schemas.FinalFeedbackBatchRequest,
+    db: AsyncSession = Depends(database.get_db),
+    user=Depends(get_current_user)
+    ) :
+    assignment = await db.get(models.Assignment, request.assignment_id)
+    if not assignment or assignment.user_id != user.id:
+        raise HTTPException(404, '과제를 찾을 수 없습니다.')
+    await check_ai_rate_limit(db, teacher_id=user.id)
+
+    batch_run = await crud.create_batch_run(
+        db, user.id, "final_feedback", assignment.id
+    )
+    # API 프로세스 안에서 돌리면 재시작 시 진행 상황이 running으로 남으므로 워커 작업으로 실행
+    # (워커가 죽으면 임대가 만료된 뒤 다른 워커가 같은 batch_id로 다시 실행)
+    await enqueue_job(db, "final_feedback_batch", {
+        "batch_id": batch_run.id,
+        "assignment_id": assignment.id,
+        "additional_instructions": request.additional_instructions or '',
+    }, user.id)
+    return batch_run
+
+
+@router.get("/batch/{batch_id}", response_model=schemas.BatchRunGet)
+async def get_batch_progress(
+    batch_id: int,
+    db: AsyncSession = Depends(database.get_db),
+    user=Depends(get_current_user)
+    ) :
+    batch_run = await crud.get_batch_run(db, batch_id, user.id)
+    if not batch_run:
+        raise HTTPException(404, '일괄 작업을 찾을 수 없습니다.')
+    return batch_run
 
-def criteria_dict_to_table(criteria: dict) -> str:
 
-    lines = []
-    for key, value in criteria.items():
-        lines.append(f"{key} | {value}")
-    return "\n".join(lines)
+@router.get("/batch/{batch_id}/stream")
+async def stream_batch_progress(
+    batch_id: int,
+    db: AsyncSession = Depends(database.get_db),
+    user=Depends(get_current_user)
+    ) :
+    batch_run = await crud.get_batch_run(db, batch_id, user.id)
+    if not batch_run:
+        raise HTTPException(404, '일괄 작업을 찾을 수 없습니다.')
+    return sse_response(batch_progress_events(batch_id, user.id))
+
+
+async def batch_progress_events(batch_id: int, user_id: int):
+    """진행 건수가 바뀔 때마다 progress 이벤트, 끝나면 done 이벤트
+
+    진행 상황은 batch_runs 테이블에 있으므로 어느 워커 프로세스에서 실행 중이어도 조회된다.
+    """
+    last = None
+    while True:
+        async with database.AsyncSessionLocal() as db:
+            batch_run = await crud.get_batch_run(db, batch_id, user_id)
+        data = schemas.BatchRunGet.model_validate(batch_run).model_dump(mode="json")
+        current = (data["status"], data["total"], data["completed"], data["failed"])
+        if current != last:
+            yield sse_event("progress", data)
+            last = current
+        if batch_run.status in (models.BatchRunStatus.completed, models.BatchRunStatus.failed):
+            yield sse_event("done", data)
+            return
+        await asyncio.sleep(BATCH_STREAM_INTERVAL)
 
 
 @router.post("/score")
@@ -208,56 +251,46 @@ async def ai_score(
     score_data: dict,
     db: AsyncSession = Depends(database.get_db)
 ):
-    print("채점데이터 :", score_data)
-    # 1. 학생 → 학급 → 교사 → feedback_guide
-    student = await db.get(models.Student, score_data['studentId'])
-    if not student:
-        raise HTTPException(404, '학생을 찾을 수 없습니다.')
-    school_class = await db.get(models.SchoolClass, student.class_id)
-    if not school_class:
-        raise HTTPException(404, '학급을 찾을 수 없습니다.')
-    user = await db.get(models.User, school_class.user_id)
-    if not user:
-        raise HTTPException(404, '교사를 찾을 수 없습니다.')
-    feedback_guide = user.feedback_guide
-
-    criteria = criteria_dict_to_table(score_data['criteria'])
-
-    llm = ChatOpenAI(
-        temperature=0.3,
-        model='gpt-4o-mini',
-        verbose=False
-    )
+    await check_ai_rate_limit(db, student_id=score_data.get('studentId'))
+    variables = await build_score_variables(score_data, db)
+    result = await llm_registry.ainvoke("score", variables)
 
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", '''
-다음은 실제 교사의 평가 예시입니다. 이 스타일을 참고하여 채점하세요:
-{feedback_guide}
-
-당신은 초등학생 글쓰기 평가를 담당하는 AI 채점관입니다.
-아래 평가 문항과 평가 기준을 참고하여, 학생의 답변을 평가 기준 중 **가장 적합한 단계 하나만** 골라 반환하세요.
-
-- 반드시 평가 기준의 단계명(예: "상", "중", "하") 중 하나만 반환하세요.
-- 그 외의 설명, 코멘트, 점수 등은 절대 포함하지 마세요.
-
-평가 문항: {item}
-평가 기준: {criteria}
-        '''),
-        ("human", """
-학생 답변: {content}
-        """)
-    ])
-    chain = (
-        prompt 
-        | llm 
-        | StrOutputParser()
-        )
+    return {"result": result.strip()}
 
-    result = await chain.ainvoke({
-    "feedback_guide": feedback_guide,
-    "item": score_data.get("guide", ""),
-    "criteria": criteria,
-    "content": score_data.get("content", "")        
-    })
 
-    return {"result": result.strip()}
+@router.post("/score/bulk")
+async def ai_score_bulk(
+    request: schemas.ScoreBulkRequest,
+    db: AsyncSession = Depends(database.get_db),
+    user=Depends(get_current_user)
+):
+    evaluation = await db.get(models.Evaluation, request.evaluation_id)
+    if not evaluation or evaluation.user_id != user.id:
+        raise HTTPException(404, '평가를 찾을 수 없습니다.')
+    if not evaluation.criteria:
+        raise HTTPException(400, '평가 기준이 없습니다.')
+    await check_ai_rate_limit(db, teacher_id=user.id)
+
+    return await score_evaluation(db, evaluation, user)
+
+
+@router.get("/cache_stats")
+async def get_cache_stats(user=Depends(get_current_user)):
+    """LLM 응답 캐시 / 요청 병합 통계 (요청을 받은 API 프로세스 기준)"""
+    # 캐시와 병합 상태는 프로세스마다 따로 있어 --workers 2 이면 워커마다 값이 다름
+    return {
+        **response_cache.stats(),
+        "single_flight": single_flight.stats(),
+        "pid": os.getpid(),
+    }
+
+
+@router.get("/usage")
+async def get_llm_usage(
+    days: int = Query(30, ge=1, le=365),
+    db: AsyncSession = Depends(database.get_db),
+    user=Depends(get_current_user)
+):
+    """최근 days일 동안 내 학생/요청에 쓰인 LLM 토큰과 예상 비용"""
+    since = datetime.utcnow() - timedelta(days=days)
+    return await crud.get_llm_usage_summary(db, user.id, since)
@@ -1,32 +1,23 @@
+import asyncio
+
 from fastapi import APIRouter, Depends, Body
 from fastapi.responses import JSONResponse
 from fastapi import Query
 from sqlalchemy.ext.asyncio import AsyncSession
-import crud, schemas, database
+import crud, schemas, database, models
 from typing import List
 from routers.auth import get_current_user
 from datetime import datetime
 from fastapi import HTTPException
-
-
-from langchain_core.runnables import RunnableParallel, RunnablePassthrough
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
-from pydantic import SecretStr
-
-
-def merge_submission(submissions) :
-    result = []
-    for i, s in enumerate(submissions) :
-        result += f"""
-------------------------------------
-{i} student example :
-{s} 
-
-        """
-
-    return result
+from analysis_service import ANALYSIS_ENGINES, find_reused_analysis, run_student_analysis
+from batch import start_background
+from jobs import enqueue_job
+from rate_limit import check_ai_rate_limit
+from sse import sse_event, sse_response
+from llm_resilience import LLMTimeoutError
+from circuit_breaker import LLMUnavailableError
+from student_context import get_owned_student_context
+from writing_metrics import compute_metrics
 
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
@@ -40,286 +31,125 @@ async def get_analysis_result(
     latest = await crud.get_latest_student_analysis(db, student_id)
     return latest
 
+@router.get("/metrics")
+async def get_writing_metrics(
+    student_id: int = Query(..., description="Student ID"),
+    db: AsyncSession = Depends(database.get_db),
+    user=Depends(get_current_user)
+):
+    """학생의 과제/평가 제출물별 정량 지표 (LLM 호출 없이 한 번에 계산)"""
+    await get_owned_student_context(db, student_id, user.id)
+    a_rows, e_rows = await crud.get_student_submissions_with_content(db, student_id)
+    metrics = compute_metrics(
+        [s.revised_content or s.content for s in a_rows] + [s.content for s in e_rows]
+    )
+    return {
+        "assignments": [
+            {"submission_id": s.id, "assignment_id": s.assignment_id, "submitted_at": s.submitted_at, **m}
+            for s, m in zip(a_rows, metrics)
+        ],
+        "evaluations": [
+            {"submission_id": s.id, "evaluation_id": s.evaluation_id, "submitted_at": s.submitted_at, **m}
+            for s, m in zip(e_rows, metrics[len(a_rows):])
+        ],
+    }
+
 @router.post("/")
 async def create_analysis_result(
     analysis_source : schemas.AnalysisCreate,
     db: AsyncSession = Depends(database.get_db),
     user=Depends(get_current_user)
     ): 
-    source = analysis_source.analysis_source
-    student_id = source.get('student_id')
-    if not student_id:
-        raise HTTPException(400, 'student_id is required in analysis_source')
-
-    # 1. 7일 제한 체크
-    # last_result = await crud.get_latest_student_analysis(db, student_id)
-    # from datetime import datetime, timedelta
-    # now = datetime.utcnow()
-    # last_created_at = getattr(last_result, 'created_at', None) if last_result is not None else None
-    # if last_created_at is not None and isinstance(last_created_at, datetime):
-    #     if (now - last_created_at) < timedelta(days=7):
-    #         raise HTTPException(429, detail=f"분석은 7일에 한 번만 가능합니다. (마지막 분석: {last_created_at})")
+    source = await check_analysis_source(db, analysis_source, user)
+    reused = await find_reused_analysis(db, source)
+    if reused is not None:
+        return reused
+    await check_ai_rate_limit(db, student_id=source['student_id'], teacher_id=user.id)
+    return await run_student_analysis(db, source)
 
-    # 2. 지난 분석 요약(압축본) 준비
-    last_result = await crud.get_latest_student_analysis(db, student_id)
-    last_summary = None
-    last_analysis_result = getattr(last_result, 'analysis_result', None) if last_result is not None else None
-    if last_analysis_result is not None and isinstance(last_analysis_result, dict):
-        last_summary = last_analysis_result.get('overall') or str(last_analysis_result)
-    else:
-        last_summary = "이전 분석 없음"
 
-    # 3. 최신 제출물 3개 추출
-    latest_submissions = await crud.get_latest_student_submissions(db, student_id, n=3)
-
-    # 4. 분석 입력 구성
-    analysis_input = {
-        'last_summary': last_summary,
-        'submissions': latest_submissions
-    }
-    level = source.get('level')
-    grade = source.get('grade')
-
-    # 5. 기존 merge_submission 함수 활용
-    submissions_merged = merge_submission(latest_submissions)
-
-    llm = ChatOpenAI(
-        temperature=0.2,
-        model='gpt-4o',
-        verbose=False
-    )
+@router.post("/stream")
+async def stream_analysis_result(
+    analysis_source : schemas.AnalysisCreate,
+    db: AsyncSession = Depends(database.get_db),
+    user=Depends(get_current_user)
+    ):
+    """영역별 분석이 끝나는 대로 SSE로 전달 (결과는 POST /analysis/와 같이 저장)"""
+    source = await check_analysis_source(db, analysis_source, user)
+    # 지난 분석을 재사용하는 요청은 LLM을 부르지 않으므로 속도 제한을 차감하지 않음
+    if await find_reused_analysis(db, source) is None:
+        await check_ai_rate_limit(db, student_id=source['student_id'], teacher_id=user.id)
+    return sse_response(analysis_events(source))
 
-    # 기존 프롬프트들 그대로 사용, 단 submissions=submissions_merged, last_summary 추가
-    grammar_analysis_prompt = ChatPromptTemplate.from_messages([
-        ("system", """
-## Role:
-You are a Korean teaching assistant specializing in grammar analysis.
-## Task:
-- Answer in KOREAN.
-- Provide a comprehensive analysis of the student's grammar based on the submissions and the last_summary.
-- Focus on the following two aspects:
-  1. Overall strengths in grammar usage.
-  2. Main areas for improvement in grammar.
-- Summarize your analysis clearly and concisely, using specific examples if relevant.
-## Format:
-Please answer in the following format:
-### 1. [장점을 한 개의 제목으로]
-- 내용
-### 2. [아쉬운 부분을 한 개의 제목으로]
-- 내용
-    """),
-        ("human",  """
-Analyze the student's grammar competence based on the following information:
-## Student Grade
-{level} - {grade} grade
-## Last Analysis Summary
-{last_summary}
-## Student submissions
-{submissions}
-    """)
-    ])
-    # spelling, sentence, structure, vocab 프롬프트도 동일하게 last_summary 추가
-    spelling_analysis_prompt = ChatPromptTemplate.from_messages([
-        ("system", """
-## Role:
-You are a Korean teaching assistant specializing in spelling and punctuation analysis.
-## Task:
-- Answer in KOREAN.
-- Provide a comprehensive analysis of the student's spelling and punctuation based on the submissions and the last_summary.
-- Focus on the following two aspects:
-  1. Overall strengths in spelling and punctuation.
-  2. Main spelling and punctuation issues.
-- Summarize your analysis clearly and concisely, using specific examples if relevant.
-## Format:
-Please answer in the following format:
-### 1. [장점을 한 개의 제목으로]
-- 내용
-### 2. [아쉬운 부분을 한 개의 제목으로]
-- 내용
-    """),
-        ("human",  """
-Analyze the student's spelling and punctuation competence based on the following information:
-## Student Grade
-{level} - {grade} grade
-## Last Analysis Summary
-{last_summary}
-## Student submissions
-{submissions}
-    """)
-    ])
-    sentence_analysis_prompt = ChatPromptTemplate.from_messages([
-        ("system", """
-## Role:
-You are a Korean teaching assistant specializing in sentence construction and syntax analysis.
-## Task:
-- Answer in KOREAN.
-- Provide a comprehensive analysis of the student's sentence construction based on the submissions and the last_summary.
-- Focus on the following two aspects:
-  1. Overall strengths in sentence construction.
-  2. Main sentence construction issues.
-- Summarize your analysis clearly and concisely, using specific examples if relevant.
-## Format:
-Please answer in the following format:
-### 1. [장점을 한 개의 제목으로]
-- 내용
-### 2. [아쉬운 부분을 한 개의 제목으로]
-- 내용
-    """),
-        ("human",  """
-Analyze the student's sentence construction competence based on the following information:
-## Student Grade
-{level} - {grade} grade
-## Last Analysis Summary
-{last_summary}
-## Student submissions
-{submissions}
-    """)
-    ])
-    structure_analysis_prompt = ChatPromptTemplate.from_messages([
-        ("system", """
-## Role:
-You are a Korean teaching assistant specializing in text structure and organization analysis.
-## Task:
-- Answer in KOREAN.
-- Provide a comprehensive analysis of the student's text structure based on the submissions and the last_summary.
-- Focus on the following two aspects:
-  1. Overall strengths in text structure and organization.
-  2. Main areas for improvement in text structure and organization.
-- Summarize your analysis clearly and concisely, using specific examples if relevant.
-## Format:
-Please answer in the following format:
-### 1. [장점을 한 개의 제목으로]
-- 내용
-### 2. [아쉬운 부분을 한 개의 제목으로]
-- 내용
-    """),
-        ("human",  """
-Analyze the student's text structure competence based on the following information:
-## Student Grade
-{level} - {grade} grade
-## Last Analysis Summary
-{last_summary}
-## Student submissions
-{submissions}
-    """)
-    ])
-    vocab_analysis_prompt = ChatPromptTemplate.from_messages([
-        ("system", """
-## Role:
-You are a Korean teaching assistant specializing in vocabulary usage and word-choice evaluation.
-## Task:
-- Answer in KOREAN.
-- Provide a comprehensive analysis of the student's vocabulary usage based on the submissions and the last_summary.
-- Focus on the following two aspects:
-  1. Overall strengths in vocabulary usage.
-  2. Main areas for improvement in vocabulary usage.
-- Summarize your analysis clearly and concisely, using specific examples if relevant.
-## Format:
-Please answer in the following format:
-### 1. [장점을 한 개의 제목으로]
-- 내용
-### 2. [아쉬운 부분을 한 개의 제목으로]
-- 내용
-    """),
-        ("human",  """
-Analyze the student's vocabulary usage competence based on the following information:
-## Student Grade
-{level} - {grade} grade
-## Last Analysis Summary
-{last_summary}
-## Student submissions
-{submissions}
-    """)
-    ])
 
-    # Define chains for each task
-    grammar_chain = (
-        grammar_analysis_prompt
-        | llm
-        | StrOutputParser()
-    )
-    spelling_chain = (
-        spelling_analysis_prompt
-        | llm
-        | StrOutputParser()
-    )
-    sentence_chain = (
-        sentence_analysis_prompt
-        | llm
-        | StrOutputParser()
-    )
-    structure_chain = (
-        structure_analysis_prompt
-        | llm
-        | StrOutputParser()
-    )
-    vocab_chain = (
-        vocab_analysis_prompt
-        | llm
-        | StrOutputParser()
-    )
-    parallel_analysis_chain = RunnableParallel(
-        grammar_result=grammar_chain,
-        spelling_result=spelling_chain,
-        sentence_result=sentence_chain,
-        structure_result= structure_chain,
-        vocab_result= vocab_chain
-    )
-    # Execute all chains in parallel with their respective inputs
-    results = await parallel_analysis_chain.ainvoke({
-        "level" : level,
-        "grade" : grade,
-        "submissions" : submissions_merged,
-        "last_summary": last_summary
-    })
-    # Generate comprehensive analysis
-    comprehensive_prompt = ChatPromptTemplate.from_messages([
-        ("system", """
-## Role
-You are a Korean teaching assistant.
-## Task
-Based on the following detailed analyses of a student's writing (grammar, spelling, sentence structure, text structure, vocabulary), synthesize the information to provide a comprehensive overall analysis in Korean. Clearly identify the student's strengths and areas for improvement, and conclude with a final summary. This evaluation is for the teacher's reference only; do not address or consider the student directly. Be specific and concise.
-## Format
-Write the analysis in the following three sections, each starting with a "###" heading. For each section, follow the English instruction provided (do not write the actual analysis):
-### 뛰어난 점
-[Summarize the most notable strengths and positive aspects observed in the student's writing.]
-### 아쉬운 점
-[Describe the main weaknesses, areas for improvement, or points that require attention in the student's writing.]
-### 총평
-[Based on the overall evaluation, specify which aspects the student should focus on and recommend effective learning strategies.]
-        """),
-        ("human", """
-# Grammar Analysis
-{grammar_result}
-# Spelling Analysis
-{spelling_result}
-# Sentence Structure Analysis
-{sentence_result}
-# Text Structure Analysis
-{structure_result}
-# Vocabulary Analysis
-{vocab_result}
-        """)
-    ])
-    comprehensive_chain = (
-        comprehensive_prompt 
-        | llm 
-        | StrOutputParser()
-    )
-    comprehensive_result = await comprehensive_chain.ainvoke({
-        "grammar_result": results["grammar_result"],
-        "spelling_result": results["spelling_result"],
-        "sentence_result": results["sentence_result"],
-        "structure_result": results["structure_result"],
-        "vocab_result": results["vocab_result"]
-    })
-    comprehensive_results = comprehensive_result.split("###")
-    comp_dict = {
-        "strength" : comprehensive_results[1].replace("뛰어난 점", ""),
-        "weakness" : comprehensive_results[2].replace("아쉬운 점", ""),
-        "overall" : comprehensive_results[3].replace("총평", "")
-        }
-    results["comprehensive_result"] = comp_dict
-    # 6. DB 저장
-    await crud.create_student_analysis_result(db, student_id, analysis_input, results)
-    return results
\ No newline at end of file
+async def check_analysis_source(db: AsyncSession, analysis_source: schemas.AnalysisCreate, user) -> dict:
+    source = analysis_source.analysis_source
+    student_id = source.get('student_id')
+    if not student_id:
+        raise HTTPException(400, 'student_id is required in analysis_source')
+    await get_owned_student_context(db, student_id, user.id)
+    return source
+
+
+async def analysis_events(source: dict):
+    """영역별 결과는 dimension 이벤트, 종합 결과는 comprehensive 이벤트, 저장 후 done 이벤트
+
+    분석은 별도 태스크에서 실행하므로 클라이언트 연결이 끊겨도 끝까지 진행해 저장한다.
+    제출물이 바뀌지 않아 지난 분석을 재사용하면 done 이벤트만 보낸다.
+    """
+    queue = asyncio.Queue()
+
+    async def on_result(key: str, value):
+        await queue.put((key, value))
+
+    async def analyze():
+        async with database.AsyncSessionLocal() as db:
+            return await run_student_analysis(db, source, on_result)
+
+    task = start_background(analyze())
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    while (item := await queue.get()) is not None:
+        key, value = item
+        if key == "comprehensive_result":
+            yield sse_event("comprehensive", {"result": value})
+        else:
+            yield sse_event("dimension", {"dimension": key.removesuffix("_result"), "result": value})
+
+    try:
+        result = task.result()
+    except HTTPException as e:
+        yield sse_event("error", {"detail": e.detail})
+        return
+    except (LLMUnavailableError, LLMTimeoutError) as e:
+        yield sse_event("error", {"detail": str(e)})
+        return
+    except Exception as e:
+        print(f"❌ 분석 스트리밍 실패 (학생 {source.get('student_id')}): {e}")
+        yield sse_event("error", {"detail": "분석 생성에 실패했습니다."})
+        return
+    yield sse_event("done", {"status": "success", "result": result})
+
+
+@router.post("/batch", response_model=schemas.BatchRunGet)
+async def start_class_analysis_batch(
+    request: schemas.AnalysisBatchRequest,
+    db: AsyncSession = Depends(database.get_db),
+    user=Depends(get_current_user)
+    ):
+    """학급 전체 학생 분석을 워커 작업으로 시작 (진행 상황은 /ai/batch/{id}, /ai/batch/{id}/stream)"""
+    school_class = await db.get(models.SchoolClass, request.class_id)
+    if not school_class or school_class.user_id != user.id:
+        raise HTTPException(404, '학급을 찾을 수 없습니다.')
+    if request.engine and request.engine not in ANALYSIS_ENGINES:
+        raise HTTPException(400, f"알 수 없는 분석 방식입니다: {request.engine}")
+    await check_ai_rate_limit(db, teacher_id=user.id)
+
+    batch_run = await crud.create_batch_run(db, user.id, "analysis", school_class.id)
+    # 최종 피드백 일괄 생성과 같이 워커 작업으로 실행해 API 프로세스가 재시작돼도 이어서 처리
+    await enqueue_job(db, "analysis_batch", {
+        "batch_id": batch_run.id,
+        "class_id": school_class.id,
+        "engine": request.engine,
+        "force": request.force,
+    }, user.id)
+    return batch_run
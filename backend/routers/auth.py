@@ -5,11 +5,14 @@ from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from jose import JWTError, jwt
 import datetime
+from typing import Optional
 import bcrypt
 import os
 from dotenv import load_dotenv
 
 import crud, schemas, database
+import student_context
+from prompts import merge_feedback_guide
 from models import User
 
 load_dotenv()
@@ -20,6 +23,7 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "1440
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
 
 async def get_current_user(
@@ -43,6 +47,16 @@ async def get_current_user(
     return user
 
 
+async def get_optional_user(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(database.get_db),
+) -> Optional[User]:
+    # 학생 페이지처럼 토큰 없이 호출되는 경우 None
+    if not token:
+        return None
+    return await get_current_user(token, db)
+
+
 @router.post("/register", response_model=schemas.UserBase)
 async def register(
     user: schemas.UserCreate, db: AsyncSession = Depends(database.get_db)
@@ -116,5 +130,8 @@ async def update_feedback_guide(
     current_user: User = Depends(get_current_user),
 ):
     current_user.feedback_guide = update.feedback_guide
+    # 프롬프트용 문자열도 같은 트랜잭션에 저장 (다른 프로세스는 학생 컨텍스트 캐시가 만료되면 새 가이드를 읽음)
+    current_user.merged_feedback_guide = merge_feedback_guide(update.feedback_guide)
     await db.commit()
+    student_context.invalidate_teacher(current_user.id)
     return {"message": "피드백 가이드가 성공적으로 업데이트되었습니다."}
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import database, schemas
+import jobs
+from rate_limit import check_ai_rate_limit
+from routers.auth import get_optional_user
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.post("/", response_model=schemas.JobGet, status_code=202)
+async def create_job(
+    job_info: schemas.JobCreate,
+    db: AsyncSession = Depends(database.get_db),
+    user=Depends(get_optional_user),
+):
+    if job_info.kind not in jobs.JOB_HANDLERS or job_info.kind in jobs.INTERNAL_JOB_KINDS:
+        raise HTTPException(status_code=400, detail="알 수 없는 작업 종류입니다.")
+    if job_info.kind not in jobs.PUBLIC_JOB_KINDS and user is None:
+        raise HTTPException(status_code=401, detail="로그인이 필요한 작업입니다.")
+
+    # 큐에 넣는 시점에 동기 엔드포인트와 같은 한도를 적용
+    payload = job_info.payload or {}
+    await check_ai_rate_limit(
+        db,
+        student_id=payload.get("student_id") or payload.get("studentId"),
+        teacher_id=user.id if user else None,
+    )
+
+    return await jobs.enqueue_job(
+        db, job_info.kind, job_info.payload, user.id if user else None
+    )
+
+
+@router.get("/{job_id}", response_model=schemas.JobGet)
+async def get_job(
+    job_id: str,
+    db: AsyncSession = Depends(database.get_db),
+    user=Depends(get_optional_user),
+):
+    job = await jobs.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    # 교사가 만든 작업은 본인만 조회 가능
+    if job.user_id is not None and (user is None or user.id != job.user_id):
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return job
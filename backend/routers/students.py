@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, File, Form, UploadFile, HTTPException
 
 import crud, schemas, database
+from student_context import get_owned_student_context
+from student_progress import get_student_progress
 from typing import List, Annotated
 from routers.auth import get_current_user
 import traceback
@@ -26,6 +28,17 @@ async def list_students_by_class(
         raise HTTPException(status_code=500, detail=f"학생 목록 조회 실패: {str(e)}")
 
 
+@router.get("/{student_id}/progress", response_model=schemas.StudentProgressGet)
+async def get_progress(
+    student_id: int,
+    db: AsyncSession = Depends(database.get_db),
+    user=Depends(get_current_user),
+):
+    """학생 진행 현황 (제출/피드백 수, 최근 점수, 수정 비율, 정량 지표 추이)"""
+    await get_owned_student_context(db, student_id, user.id)
+    return await get_student_progress(db, student_id)
+
+
 @router.post("/", response_model=schemas.StudentBase)
 async def create_student(
     student: schemas.StudentBase,
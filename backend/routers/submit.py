@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import crud, schemas, database
 import models
 from crud import start_assignment_for_class as crud_start_assignment_for_class
+from speculative import schedule_mid_feedback
 from typing import List
 
 import database
@@ -42,7 +43,14 @@ async def update_assign_submission(
         db, 
         submission_info.dict(exclude_unset=True)
         )
-    return {"updated_id": updated.id}
+    updated_id, student_id = updated.id, updated.student_id
+    try:
+        await schedule_mid_feedback(db, updated)
+    except Exception as e:
+        # 미리 생성은 부가 기능이므로 예약에 실패해도 저장은 성공으로 응답
+        await db.rollback()
+        print(f"⚠️ 중간 피드백 미리 생성 예약 실패 (학생 {student_id}): {e}")
+    return {"updated_id": updated_id}
 
 @router.patch("/update_eval_submission")
 async def update_submission(
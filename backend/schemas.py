@@ -226,3 +226,70 @@ class AnalysisGet(AnalysisBase):
     id: int
     class_: Dict[str, Any]
     analysis_results: Dict[str, Any]
+
+
+# Batch
+
+
+class FinalFeedbackBatchRequest(BaseModel):
+    assignment_id: int
+    additional_instructions: Optional[str] = None
+
+
+class AnalysisBatchRequest(BaseModel):
+    class_id: int
+    engine: Optional[str] = None
+    # 제출물이 바뀌지 않은 학생도 다시 분석
+    force: bool = False
+
+
+class ScoreBulkRequest(BaseModel):
+    evaluation_id: int
+
+
+class BatchRunGet(BaseModel):
+    id: int
+    kind: str
+    target_id: int
+    status: str
+    total: int
+    completed: int
+    failed: int
+    errors: List[Dict[str, Any]] = []
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Job
+
+
+class JobCreate(BaseModel):
+    kind: str
+    payload: Dict[str, Any] = {}
+
+
+class JobGet(BaseModel):
+    id: str
+    kind: str
+    status: str
+    attempts: int
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
+
+
+class StudentProgressGet(BaseModel):
+    student_id: int
+    assignment_count: int
+    final_submitted_count: int
+    evaluation_count: int
+    feedback_count: int
+    latest_score: Optional[str] = None
+    recent_scores: List[Dict[str, Any]] = []
+    revision_ratio: Optional[float] = None
+    metrics_trend: List[Dict[str, Any]] = []
+    updated_at: datetime
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,70 @@
+"""동일 요청 병합 (single-flight)
+
+같은 키의 LLM 호출이 이미 진행 중이면 새로 호출하지 않고
+진행 중인 결과를 함께 기다린다. (중복 제출, 여러 탭에서 동시 요청 등)
+"""
+
+import asyncio
+from typing import Optional
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def in_flight(self, key: str) -> Optional[asyncio.Future]:
+        return self._calls.get(key)
+
+    async def do(self, key: str, fn):
+        """key로 진행 중인 호출이 있으면 그 결과를, 없으면 fn()을 실행해 결과를 공유"""
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            self.leaders += 1
+            future.add_done_callback(lambda f: self._forget(key, f))
+        else:
+            self.coalesced += 1
+        # 먼저 요청한 쪽이 연결을 끊어도 공유 호출은 취소되지 않도록 shield
+        return await asyncio.shield(future)
+
+    async def wait(self, key: str):
+        """진행 중인 호출의 결과를 기다림 (스트리밍 후속 요청용)"""
+        self.coalesced += 1
+        return await asyncio.shield(self._calls[key])
+
+    def begin(self, key: str) -> asyncio.Future:
+        """스트리밍처럼 직접 결과를 채워 넣는 호출을 등록"""
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.leaders += 1
+        return future
+
+    def finish(self, key: str, future: asyncio.Future, result=None, error=None):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+            future.exception()  # 기다리는 쪽이 없어도 경고가 남지 않도록
+        else:
+            future.set_result(result)
+
+    def _forget(self, key: str, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            future.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
+
+
+single_flight = SingleFlight()
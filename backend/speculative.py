@@ -0,0 +1,159 @@
+"""중간 피드백 미리 생성 (opt-in)
+
+학생이 초안을 저장하면 llm_jobs에 낮은 우선순위 작업을 예약한다.
+- 같은 학생/과제의 작업은 하나만 두고 저장할 때마다 실행 시각을 뒤로 미룸 (debounce)
+- 실행 시점의 최신 초안이 마지막으로 미리 만든 초안과 충분히 다를 때만 LLM 호출
+- 결과는 렌더링된 프롬프트 해시와 함께 precomputed_mid_feedback 테이블에 저장
+
+/ai/mid_feedback 요청의 프롬프트 해시가 같으면 LLM 없이 저장된 결과를 바로 돌려준다.
+작업은 worker.py가 처리하므로 워커가 떠 있어야 한다.
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+import models
+from ai_service import build_mid_feedback_variables
+from database import AsyncSessionLocal
+from feedback_reuse import changed_chars
+from llm_registry import llm_registry
+from telemetry import record_cache_result
+
+SPECULATIVE_MID_FEEDBACK = os.getenv("SPECULATIVE_MID_FEEDBACK", "false").lower() in (
+    "1", "true", "yes"
+)
+SPECULATIVE_DEBOUNCE_SECONDS = float(os.getenv("SPECULATIVE_DEBOUNCE_SECONDS", "20"))
+# 마지막으로 미리 만든 초안에서 바뀐 글자 수가 이보다 적으면 다시 만들지 않음
+SPECULATIVE_MIN_CHANGED_CHARS = int(os.getenv("SPECULATIVE_MIN_CHANGED_CHARS", "40"))
+
+JOB_KIND = "speculative_mid_feedback"
+
+
+def draft_of(submission: models.ASubmission) -> str:
+    """지금 작성 중인 글 (피드백을 받은 뒤에는 고쳐 쓴 글)"""
+    if submission.status == models.ASubmissionStatus.feedback_done:
+        return submission.revised_content or submission.content or ""
+    return submission.content or ""
+
+
+async def schedule_mid_feedback(db: AsyncSession, submission: models.ASubmission):
+    """초안 저장 시 미리 생성 작업 예약 (이미 있으면 실행 시각만 미룸)"""
+    if not SPECULATIVE_MID_FEEDBACK:
+        return
+    if submission.status in (
+        models.ASubmissionStatus.first_submitted,
+        models.ASubmissionStatus.final_submitted,
+    ):
+        return
+
+    job_id = f"speculative-{submission.student_id}-{submission.assignment_id}"
+    run_after = datetime.utcnow() + timedelta(seconds=SPECULATIVE_DEBOUNCE_SECONDS)
+    # 같은 초안을 동시에 두 번 저장해도 기본 키 충돌 없이 한 문장으로 예약/연기
+    stmt = insert(models.Job).values(
+        id=job_id,
+        kind=JOB_KIND,
+        payload={
+            "student_id": submission.student_id,
+            "assignment_id": submission.assignment_id,
+        },
+        status=models.JobStatus.queued,
+        attempts=0,
+        max_attempts=1,
+        run_after=run_after,
+        created_at=datetime.utcnow(),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.Job.id],
+        set_={
+            "status": stmt.excluded.status,
+            "attempts": 0,
+            "error": None,
+            "result": None,
+            "finished_at": None,
+            "run_after": stmt.excluded.run_after,
+        },
+        # 실행 중인 작업은 시작 시점의 초안을 사용하므로 다음 저장 때 다시 예약
+        where=models.Job.status != models.JobStatus.running,
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+
+async def _get_precomputed(
+    db: AsyncSession, student_id: int, assignment_id: int
+) -> Optional[models.PrecomputedMidFeedback]:
+    stmt = select(models.PrecomputedMidFeedback).where(
+        models.PrecomputedMidFeedback.student_id == student_id,
+        models.PrecomputedMidFeedback.assignment_id == assignment_id,
+    )
+    return (await db.execute(stmt)).scalar_one_or_none()
+
+
+async def precompute_mid_feedback(student_id: int, assignment_id: int) -> dict:
+    """최신 초안으로 중간 피드백 생성 후 저장 (worker 작업)"""
+    async with AsyncSessionLocal() as db:
+        stmt = select(models.ASubmission).where(
+            models.ASubmission.student_id == student_id,
+            models.ASubmission.assignment_id == assignment_id,
+        )
+        submission = (await db.execute(stmt)).scalar_one_or_none()
+        assignment = await db.get(models.Assignment, assignment_id)
+        if submission is None or assignment is None:
+            return {"status": "skipped", "reason": "not_found"}
+
+        draft = draft_of(submission)
+        variables = await build_mid_feedback_variables(
+            {
+                "student_id": student_id,
+                "condition": assignment.condition,
+                "guide": assignment.guide,
+                "content": draft,
+            },
+            db,
+        )
+        prepared = await llm_registry.prepare("mid_feedback", variables)
+        key = prepared.key
+        previous = await _get_precomputed(db, student_id, assignment_id)
+        if previous is not None and (
+            previous.content_hash == key
+            or changed_chars(previous.content, draft) < SPECULATIVE_MIN_CHANGED_CHARS
+        ):
+            return {"status": "skipped", "reason": "unchanged"}
+
+    result = await llm_registry.ainvoke("mid_feedback", variables, prepared=prepared)
+
+    async with AsyncSessionLocal() as db:
+        row = await _get_precomputed(db, student_id, assignment_id)
+        if row is None:
+            row = models.PrecomputedMidFeedback(
+                student_id=student_id, assignment_id=assignment_id
+            )
+            db.add(row)
+        row.content_hash = key
+        row.content = draft
+        row.result = result
+        row.created_at = datetime.utcnow()
+        await db.commit()
+    print(f"🔮 중간 피드백 미리 생성 완료 (학생 {student_id}, 과제 {assignment_id})")
+    return {"status": "precomputed", "content_hash": key}
+
+
+async def find_precomputed_mid_feedback(
+    db: AsyncSession, student_id: int, key: str
+) -> Optional[str]:
+    """요청과 같은 프롬프트(캐시 키 key)로 미리 만든 피드백이 있으면 반환"""
+    if not SPECULATIVE_MID_FEEDBACK:
+        return None
+    stmt = select(models.PrecomputedMidFeedback.result).where(
+        models.PrecomputedMidFeedback.student_id == student_id,
+        models.PrecomputedMidFeedback.content_hash == key,
+    )
+    result = (await db.execute(stmt)).scalar_one_or_none()
+    if result is not None:
+        record_cache_result("mid_feedback", "precomputed")
+    return result
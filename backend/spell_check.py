@@ -0,0 +1,225 @@
+"""규칙 기반 맞춤법/띄어쓰기/문장부호 사전 검사 (LLM 호출 없음)
+
+자주 틀리는 맞춤법·띄어쓰기 표현 사전을 모듈을 불러올 때 Aho–Corasick 오토마톤 하나로 컴파일해
+규칙 수와 관계없이 글 길이에 비례하는 시간에 모든 표현을 한 번에 찾는다.
+- 겹치는 표현은 가장 왼쪽에서 시작하는 가장 긴 표현 하나만 인정
+- 바른 표현이 None인 항목은 예외(예: '할수록')로, 더 짧은 규칙이 잘못 걸리지 않게 막는 용도
+- 틀린 표현 앞의 '^'는 어절 첫머리에서만 찾으라는 뜻 (예: '연구지'의 '구지'는 제외)
+문장부호 규칙은 정규식으로 검사한다.
+"""
+
+import re
+from collections import Counter, deque
+from typing import List
+
+KIND_LABELS = {
+    "spelling": "맞춤법",
+    "spacing": "띄어쓰기",
+    "punctuation": "문장부호",
+}
+
+# 프롬프트에 넣을 서로 다른 오류 표현 최대 개수
+PROMPT_FINDINGS_LIMIT = 20
+CONTEXT_CHARS = 10
+
+# (틀린 표현, 바른 표현)
+SPELLING_RULES = [
+    ("되요", "돼요"), ("되서", "돼서"), ("됬", "됐"), ("됀", "된"),
+    ("않되", "안 되"), ("않돼", "안 돼"), ("않하", "안 하"), ("않좋", "안 좋"), ("안됬", "안 됐"),
+    ("몇일", "며칠"), ("왠만", "웬만"), ("왠일", "웬일"), ("웬지", "왠지"),
+    ("어떻해", "어떡해"), ("금새", "금세"), ("오랫만", "오랜만"), ("희안", "희한"),
+    ("할께", "할게"), ("줄께", "줄게"), ("갈께", "갈게"), ("올께", "올게"), ("볼께", "볼게"),
+    ("일일히", "일일이"), ("곰곰히", "곰곰이"), ("깨끗히", "깨끗이"), ("틈틈히", "틈틈이"),
+    ("^구지", "굳이"), ("역활", "역할"), ("설겆이", "설거지"), ("어의없", "어이없"),
+    ("뵈요", "봬요"), ("할려고", "하려고"), ("갈려고", "가려고"), ("볼려고", "보려고"),
+    ("먹을려고", "먹으려고"), ("잠궜", "잠갔"), ("설레임", "설렘"), ("베게", "베개"),
+    ("육계장", "육개장"), ("어쨋든", "어쨌든"), ("있슴", "있음"), ("없슴", "없음"), ("했슴", "했음"),
+    ("눈꼽", "눈곱"), ("쓸때없", "쓸데없"), ("떡볶기", "떡볶이"),
+    ("무릎쓰", "무릅쓰"), ("내노라", "내로라"), ("되물림", "대물림"), ("바램", "바람"),
+    ("그리고나서", "그러고 나서"),
+]
+
+# 관형형 어미(-ㄹ/-는/-ㄴ) 뒤의 의존 명사(수, 때, 것, 거, 줄)는 띄어 씀
+_L_STEMS = [
+    "할", "갈", "볼", "올", "될", "줄", "알", "살", "쓸", "놀", "잘", "먹을", "읽을",
+    "있을", "없을", "만들", "생길", "받을", "찾을", "도울", "믿을", "들을", "지킬",
+]
+_N_STEMS = [
+    "하는", "있는", "없는", "되는", "보는", "가는", "먹는", "읽는", "쓰는", "사는",
+    "한", "된", "본", "간", "좋은", "같은", "이런", "그런", "저런",
+]
+SPACING_RULES = (
+    [(f"{s}수있", f"{s} 수 있") for s in _L_STEMS]
+    + [(f"{s}수없", f"{s} 수 없") for s in _L_STEMS]
+    + [(f"{s}수도", f"{s} 수도") for s in _L_STEMS]
+    + [(f"{s}수", f"{s} 수") for s in _L_STEMS]
+    + [(f"{s}수록", None) for s in _L_STEMS]
+    + [(f"{s}때", f"{s} 때") for s in _L_STEMS]
+    + [(f"{s}거야", f"{s} 거야") for s in _L_STEMS]
+    + [(f"{s}거다", f"{s} 거다") for s in _L_STEMS]
+    + [(f"{s}것", f"{s} 것") for s in _L_STEMS + _N_STEMS]
+    + [(f"{s}줄", f"{s} 줄") for s in _L_STEMS if s != "줄"]
+    + [
+        ("수있", "수 있"), ("수없", "수 없"), ("수없이", None), ("것같", "것 같"),
+        ("뿐만아니라", "뿐만 아니라"), ("그럴때", "그럴 때"),
+    ]
+)
+
+# (정규식, 바른 표현 또는 None(설명만), 설명)
+PUNCTUATION_RULES = [
+    (re.compile(r"(?<!\.)\.\.(?!\.)"), ".", "마침표 중복"),
+    (re.compile(r"[?!]{3,}"), None, "물음표/느낌표 과다"),
+    (re.compile(r"[ \t]+(?=[.,?!])"), "", "문장부호 앞 띄어쓰기"),
+    (re.compile(r"[,.?!](?=[가-힣A-Za-z])"), None, "문장부호 뒤 띄어쓰기 없음"),
+    (re.compile(r"[가-힣](?=[ \t]*(?:\n|$))"), None, "문장 끝 마침표 없음"),
+]
+
+
+def _compile(rules):
+    """(패턴, 바른 표현, 종류, 어절 첫머리 여부) 목록과 Aho–Corasick 오토마톤"""
+    patterns = []
+    goto, output = [{}], [[]]
+    for kind, pairs in rules:
+        for wrong, correct in pairs:
+            word_start = wrong.startswith("^")
+            wrong = wrong.lstrip("^")
+            node = 0
+            for ch in wrong:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    output.append([])
+                node = nxt
+            output[node].append(len(patterns))
+            patterns.append((wrong, correct, kind, word_start))
+
+    # 실패 링크: 현재 상태 문자열의 가장 긴 진접미사에 해당하는 상태
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        node = queue.popleft()
+        for ch, child in goto[node].items():
+            queue.append(child)
+            f = fail[node]
+            while f and ch not in goto[f]:
+                f = fail[f]
+            fail[child] = goto[f].get(ch, 0)
+            output[child] = output[child] + output[fail[child]]
+    return patterns, goto, fail, output
+
+
+_PATTERNS, _GOTO, _FAIL, _OUTPUT = _compile(
+    [("spelling", SPELLING_RULES), ("spacing", SPACING_RULES)]
+)
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum()
+
+
+def _dictionary_matches(text: str):
+    """사전 표현 전체를 한 번 훑어 찾고, 겹치면 가장 왼쪽의 가장 긴 표현만 남김"""
+    matches = []
+    node = 0
+    for i, ch in enumerate(text):
+        while node and ch not in _GOTO[node]:
+            node = _FAIL[node]
+        node = _GOTO[node].get(ch, 0)
+        for idx in _OUTPUT[node]:
+            start = i - len(_PATTERNS[idx][0]) + 1
+            if _PATTERNS[idx][3] and start > 0 and _is_word_char(text[start - 1]):
+                continue
+            matches.append((start, i + 1, idx))
+
+    matches.sort(key=lambda m: (m[0], m[0] - m[1]))
+    end = 0
+    for start, stop, idx in matches:
+        if start < end:
+            continue
+        end = stop
+        wrong, correct, kind, _ = _PATTERNS[idx]
+        if correct is not None:
+            yield start, stop, kind, wrong, correct, None
+
+
+def _punctuation_matches(text: str):
+    for pattern, correct, note in PUNCTUATION_RULES:
+        for m in pattern.finditer(text):
+            yield m.start(), m.end(), "punctuation", m.group(), correct, note
+
+
+def check_spelling(text: str) -> List[dict]:
+    """글 하나의 규칙 검사 결과 (위치 순)"""
+    text = text or ""
+    findings = []
+    for start, stop, kind, wrong, correct, note in sorted(
+        [*_dictionary_matches(text), *_punctuation_matches(text)], key=lambda m: m[0]
+    ):
+        findings.append({
+            "kind": kind,
+            "wrong": wrong,
+            "correct": correct,
+            "note": note,
+            "start": start,
+            "context": text[max(0, start - CONTEXT_CHARS):stop + CONTEXT_CHARS],
+        })
+    return findings
+
+
+def check_submissions(texts: List[str]) -> List[dict]:
+    """제출물 여러 개 검사 (submission은 merge_submission의 student example 번호)"""
+    return [
+        {"submission": i, **finding}
+        for i, text in enumerate(texts)
+        for finding in check_spelling(text)
+    ]
+
+
+def _grouped(findings: List[dict]):
+    """(종류, 설명)별 건수 - 문장부호는 규칙 설명, 나머지는 '틀린 표현 → 바른 표현'으로 묶음"""
+    counts = Counter(
+        (f["kind"], f["note"] or f"'{f['wrong']}' → '{f['correct']}'") for f in findings
+    )
+    return counts.most_common()
+
+
+def format_findings(findings: List[dict]) -> str:
+    """프롬프트용 요약: 종류별 건수와 자주 나온 오류 표현"""
+    if not findings:
+        return "규칙 검사에서 찾은 오류 없음"
+    kinds = Counter(f["kind"] for f in findings)
+    lines = [", ".join(f"{KIND_LABELS[k]} {kinds[k]}건" for k in KIND_LABELS if kinds[k])]
+    grouped = _grouped(findings)
+    for (kind, description), count in grouped[:PROMPT_FINDINGS_LIMIT]:
+        lines.append(f"- [{KIND_LABELS[kind]}] {description} {count}회")
+    if len(grouped) > PROMPT_FINDINGS_LIMIT:
+        lines.append(f"- 그 밖에 {len(grouped) - PROMPT_FINDINGS_LIMIT}종류")
+    return "\n".join(lines)
+
+
+def spelling_report(findings: List[dict], texts: List[str]) -> str:
+    """맞춤법 영역 분석 결과를 LLM 없이 작성 (영역별 분석과 같은 ### 1./### 2. 형식)"""
+    words = sum(len((t or "").split()) for t in texts)
+    kinds = Counter(f["kind"] for f in findings)
+    clean = [KIND_LABELS[k] for k in KIND_LABELS if not kinds[k]]
+
+    if not findings:
+        strength = "### 1. 맞춤법과 띄어쓰기를 정확하게 지킴\n- 자주 틀리는 맞춤법·띄어쓰기·문장부호 규칙 검사에서 오류가 발견되지 않았습니다."
+    elif len(findings) <= max(1, words // 50):
+        strength = f"### 1. 기본 표기 규칙을 대체로 지킴\n- 어절 {words}개 중 규칙 검사에서 찾은 오류는 {len(findings)}건으로 많지 않습니다."
+    else:
+        strength = "### 1. 자신의 생각을 글로 꾸준히 표현함\n- 제출물마다 충분한 분량의 글을 썼습니다."
+    if clean and findings:
+        strength += f"\n- {', '.join(clean)} 오류는 발견되지 않았습니다."
+
+    if not findings:
+        weakness = "### 2. 세부 표기 점검 필요\n- 규칙 검사로 찾기 어려운 표기(문맥에 따른 띄어쓰기, 어려운 낱말 등)는 직접 확인이 필요합니다."
+    else:
+        top_kind = kinds.most_common(1)[0][0]
+        summary = ", ".join(f"{KIND_LABELS[k]} {kinds[k]}건" for k in KIND_LABELS if kinds[k])
+        weakness = f"### 2. {KIND_LABELS[top_kind]} 오류가 반복됨\n- {summary}"
+        for (kind, description), count in _grouped(findings)[:5]:
+            weakness += f"\n- {description} ({count}회)"
+    return f"{strength}\n{weakness}"
@@ -0,0 +1,21 @@
+"""Server-Sent Events 응답 헬퍼"""
+
+import json
+
+from fastapi.responses import StreamingResponse
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_response(generator) -> StreamingResponse:
+    return StreamingResponse(
+        generator,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # nginx 프록시 버퍼링을 끄지 않으면 토큰이 한꺼번에 전달됨
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -0,0 +1,120 @@
+"""AI 요청에 필요한 학생 컨텍스트 조회
+
+학생 → 학급 → 교사를 한 번의 조인 쿼리로 읽어 불변 객체로 만들고, 학생 id별로 잠시 캐시한다.
+학급/학생/피드백 가이드가 바뀌면 변경을 처리한 프로세스의 캐시는 바로 무효화하고,
+다른 프로세스(uvicorn 워커, worker.py)의 캐시는 STUDENT_CONTEXT_TTL초 안에 만료되어 새로 읽는다.
+"""
+
+import os
+import re
+import time
+from dataclasses import dataclass
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+import models
+from prompts import merge_feedback_guide
+
+# 다른 프로세스의 변경이 반영되기까지 걸리는 최대 시간 (한 요청 안의 중복 조회와 짧은 연속 요청만 흡수)
+STUDENT_CONTEXT_TTL = float(os.getenv("STUDENT_CONTEXT_TTL", "5"))
+
+# grade 컬럼이 제거되어 학급 이름("5학년 1반")에서 학년을 읽음
+GRADE_PATTERN = re.compile(r"(\d+)\s*학년")
+
+
+@dataclass(frozen=True)
+class StudentContext:
+    student_id: int
+    class_id: int
+    class_name: str
+    teacher_id: int
+    school_level: str
+    grade: str
+    feedback_guide: str  # 프롬프트에 바로 넣는 few-shot 문자열
+
+
+def parse_grade(class_name: str) -> str:
+    match = GRADE_PATTERN.search(class_name or "")
+    return match.group(1) if match else ""
+
+
+_cache = {}
+
+
+async def get_student_context(db: AsyncSession, student_id: int) -> StudentContext:
+    """학생 컨텍스트 조회 (없으면 404)"""
+    entry = _cache.get(student_id)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+
+    stmt = (
+        select(
+            models.Student.id,
+            models.SchoolClass.id,
+            models.SchoolClass.name,
+            models.User.id,
+            models.User.school_level,
+            models.User.feedback_guide,
+            models.User.merged_feedback_guide,
+        )
+        .join(models.SchoolClass, models.Student.class_id == models.SchoolClass.id)
+        .join(models.User, models.SchoolClass.user_id == models.User.id)
+        .where(models.Student.id == student_id)
+    )
+    row = (await db.execute(stmt)).one_or_none()
+    if row is None:
+        raise HTTPException(404, '학생을 찾을 수 없습니다.')
+
+    (
+        sid, class_id, class_name, teacher_id, school_level,
+        feedback_guide, merged_feedback_guide,
+    ) = row
+    if merged_feedback_guide is None:
+        # 마이그레이션 전에 저장된 가이드는 즉석에서 변환
+        merged_feedback_guide = merge_feedback_guide(feedback_guide)
+    context = StudentContext(
+        student_id=sid,
+        class_id=class_id,
+        class_name=class_name,
+        teacher_id=teacher_id,
+        school_level=school_level.value,
+        grade=parse_grade(class_name),
+        feedback_guide=merged_feedback_guide,
+    )
+    if STUDENT_CONTEXT_TTL > 0:
+        _cache[student_id] = (time.monotonic() + STUDENT_CONTEXT_TTL, context)
+    return context
+
+
+async def get_owned_student_context(
+    db: AsyncSession, student_id: int, teacher_id: int
+) -> StudentContext:
+    """로그인한 교사의 학생인지까지 확인"""
+    context = await get_student_context(db, student_id)
+    if context.teacher_id != teacher_id:
+        raise HTTPException(404, '학생을 찾을 수 없습니다.')
+    return context
+
+
+def _invalidate(match):
+    for student_id, (_, context) in list(_cache.items()):
+        if match(context):
+            _cache.pop(student_id, None)
+
+
+def invalidate_student(student_id: int):
+    _cache.pop(student_id, None)
+
+
+def invalidate_class(class_id: int):
+    _invalidate(lambda context: context.class_id == class_id)
+
+
+def invalidate_teacher(teacher_id: int):
+    _invalidate(lambda context: context.teacher_id == teacher_id)
+
+
+def clear():
+    _cache.clear()
@@ -0,0 +1,191 @@
+"""학생별 진행 현황 요약 테이블 (student_progress) 증분 갱신
+
+제출물/피드백/점수가 바뀌면 바뀐 제출물 하나의 요약(상태, 수정 비율, 정량 지표, 점수)만 다시 계산해
+학생 행의 제출물 id별 요약에 덮어쓰고, 그 요약들로 집계 컬럼을 다시 만든다.
+다른 제출물은 다시 읽지 않으며, 학생 상세 화면은 student_id 기본 키 조회 한 번으로 현황을 얻는다.
+행이 없는 학생(기능 도입 전 데이터)은 처음 갱신/조회할 때 제출물 전체로 한 번 만든다.
+호출한 쪽의 트랜잭션 안에서 변경만 하고 commit은 호출한 쪽에서 한다.
+"""
+
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+import models
+from feedback_reuse import change_ratio
+from writing_metrics import compute_metrics
+
+RECENT_SCORES = 5
+METRICS_TREND = 10
+TREND_METRICS = ("chars", "sentences", "avg_sentence_length", "lexical_diversity", "repeated_word_ratio")
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.replace(tzinfo=None).isoformat() if value else None
+
+
+def _assignment_entries(submissions, metrics) -> dict:
+    entries = {}
+    for s, m in zip(submissions, metrics):
+        entries[str(s.id)] = {
+            "assignment_id": s.assignment_id,
+            "status": getattr(s.status, "value", s.status),
+            "submitted_at": _iso(s.submitted_at),
+            "revision_ratio": (
+                round(change_ratio(s.content or "", s.revised_content), 3)
+                if s.revised_content else None
+            ),
+            "metrics": {k: m[k] for k in TREND_METRICS} if m["chars"] else None,
+        }
+    return entries
+
+
+def _evaluation_entry(submission: models.ESubmission) -> dict:
+    return {
+        "evaluation_id": submission.evaluation_id,
+        "status": getattr(submission.status, "value", submission.status),
+        "submitted_at": _iso(submission.submitted_at),
+        "score": submission.score or None,
+    }
+
+
+def _refresh(progress: models.StudentProgress):
+    """제출물 id별 요약으로 집계 컬럼 다시 계산"""
+    assignments, evaluations = progress.assignments, progress.evaluations
+    progress.assignment_count = sum(
+        a["status"] != models.ASubmissionStatus.in_progress.value for a in assignments.values()
+    )
+    progress.final_submitted_count = sum(
+        a["status"] == models.ASubmissionStatus.final_submitted.value for a in assignments.values()
+    )
+    progress.evaluation_count = sum(
+        e["status"] == models.ESubmissionStatus.submitted.value for e in evaluations.values()
+    )
+    progress.feedback_count = sum(
+        bool(entry.get("feedback")) for entry in [*assignments.values(), *evaluations.values()]
+    )
+
+    ratios = [a["revision_ratio"] for a in assignments.values() if a["revision_ratio"] is not None]
+    progress.revision_ratio = round(sum(ratios) / len(ratios), 3) if ratios else None
+
+    by_time = lambda item: item[1]["submitted_at"] or ""
+    progress.metrics_trend = [
+        {"submission_id": int(sid), "assignment_id": a["assignment_id"], "submitted_at": a["submitted_at"], **a["metrics"]}
+        for sid, a in sorted(assignments.items(), key=by_time)
+        if a["metrics"]
+    ][-METRICS_TREND:]
+    progress.recent_scores = [
+        {"submission_id": int(sid), "evaluation_id": e["evaluation_id"], "score": e["score"], "submitted_at": e["submitted_at"]}
+        for sid, e in sorted(evaluations.items(), key=by_time)
+        if e["score"]
+    ][-RECENT_SCORES:]
+    progress.latest_score = progress.recent_scores[-1]["score"] if progress.recent_scores else None
+    progress.updated_at = datetime.utcnow()
+
+
+def _put(progress: models.StudentProgress, field: str, submission_id: int, entry: dict, feedback: bool):
+    """제출물 하나의 요약 교체 (JSON 컬럼은 새 객체를 대입해야 저장됨)"""
+    entries = dict(getattr(progress, field) or {})
+    old = entries.get(str(submission_id)) or {}
+    if feedback or old.get("feedback"):
+        entry["feedback"] = True
+    entries[str(submission_id)] = entry
+    setattr(progress, field, entries)
+    _refresh(progress)
+
+
+async def record_assign_submission(
+    db: AsyncSession, submission: models.ASubmission, feedback: bool = False
+):
+    """과제 제출물 하나의 변경 반영"""
+    progress = await db.get(models.StudentProgress, submission.student_id)
+    if progress is None:
+        await _rebuild(db, submission.student_id)
+        return
+    text = submission.revised_content or submission.content or ""
+    (entry,) = _assignment_entries([submission], compute_metrics([text])).values()
+    feedback = feedback or submission.status == models.ASubmissionStatus.feedback_done
+    _put(progress, "assignments", submission.id, entry, feedback)
+
+
+async def record_eval_submissions(
+    db: AsyncSession, submissions: Iterable[models.ESubmission], feedback: bool = False
+):
+    """평가 제출물(답안/점수) 변경 반영 - 일괄 채점처럼 여러 학생이 섞여 있어도 됨"""
+    for submission in submissions:
+        progress = await db.get(models.StudentProgress, submission.student_id)
+        if progress is None:
+            await _rebuild(db, submission.student_id)
+            continue
+        _put(progress, "evaluations", submission.id, _evaluation_entry(submission), feedback)
+
+
+async def record_feedback(db: AsyncSession, submission):
+    """교사 피드백 저장 반영 (과제는 상태도 feedback_done으로 바뀜)"""
+    if isinstance(submission, models.ESubmission):
+        await record_eval_submissions(db, [submission], feedback=True)
+    else:
+        await record_assign_submission(db, submission, feedback=True)
+
+
+async def invalidate_class_progress(db: AsyncSession, class_id: int):
+    """과제/평가 삭제처럼 제출물이 한꺼번에 사라질 때 학급 학생들의 행 삭제 (다음 갱신/조회 때 다시 만듦)"""
+    await db.execute(
+        delete(models.StudentProgress).where(
+            models.StudentProgress.student_id.in_(
+                select(models.Student.id).where(models.Student.class_id == class_id)
+            )
+        )
+    )
+
+
+async def _rebuild(db: AsyncSession, student_id: int) -> models.StudentProgress:
+    """학생의 제출물/피드백 전체로 현황을 새로 만듦 (아직 반영 안 된 변경도 autoflush로 포함)"""
+    a_rows = (await db.execute(
+        select(models.ASubmission).where(models.ASubmission.student_id == student_id)
+    )).scalars().all()
+    e_rows = (await db.execute(
+        select(models.ESubmission).where(models.ESubmission.student_id == student_id)
+    )).scalars().all()
+    a_feedback = set((await db.execute(
+        select(models.AFeedback.assign_submission_id).where(
+            models.AFeedback.student_id == student_id, models.AFeedback.content != ""
+        )
+    )).scalars().all())
+    e_feedback = set((await db.execute(
+        select(models.EFeedback.eval_submission_id).where(
+            models.EFeedback.student_id == student_id, models.EFeedback.content != ""
+        )
+    )).scalars().all())
+
+    assignments = _assignment_entries(
+        a_rows, compute_metrics([s.revised_content or s.content or "" for s in a_rows])
+    )
+    for s in a_rows:
+        if s.id in a_feedback or s.status == models.ASubmissionStatus.feedback_done:
+            assignments[str(s.id)]["feedback"] = True
+    evaluations = {}
+    for s in e_rows:
+        evaluations[str(s.id)] = _evaluation_entry(s)
+        if s.id in e_feedback:
+            evaluations[str(s.id)]["feedback"] = True
+
+    progress = await db.get(models.StudentProgress, student_id)
+    if progress is None:
+        progress = models.StudentProgress(student_id=student_id)
+        db.add(progress)
+    progress.assignments, progress.evaluations = assignments, evaluations
+    _refresh(progress)
+    return progress
+
+
+async def get_student_progress(db: AsyncSession, student_id: int) -> models.StudentProgress:
+    """학생 현황 조회 (기본 키 조회 한 번, 행이 없으면 만들어 저장)"""
+    progress = await db.get(models.StudentProgress, student_id)
+    if progress is None:
+        progress = await _rebuild(db, student_id)
+        await db.commit()
+    return progress
@@ -0,0 +1,314 @@
+"""LLM 호출 계측
+
+- 엔드포인트/모델별 지연 시간, 첫 토큰까지 시간(TTFT), 토큰 수, 비용, 재시도, 오류를
+  Prometheus 텍스트 형식으로 /metrics 에 노출
+- 호출 1건마다 llm_usage 테이블에 기록 (교사별 비용 리포트용, 모아서 일괄 저장)
+
+지표는 프로세스 단위로 집계되므로 uvicorn 워커가 여러 개면 워커별 값이 노출된다.
+교사별 집계는 라벨 수가 너무 많아지지 않도록 llm_usage 테이블에서만 한다.
+"""
+
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+
+from database import AsyncSessionLocal
+import models
+
+USAGE_FLUSH_INTERVAL = float(os.getenv("LLM_USAGE_FLUSH_INTERVAL", "5"))
+USAGE_MAX_BUFFER = 10000
+
+# 1M 토큰당 USD (입력, 출력)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+TTFT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra="") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, value: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # 라벨 → [버킷별 개수, 합계, 개수]
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][i] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, (bucket_counts, total, count) in self._values.items():
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+LLM_REQUESTS = Counter(
+    "llm_requests_total", "LLM 호출 수", ("endpoint", "prompt", "model", "status")
+)
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds", "LLM 호출 소요 시간", ("endpoint", "prompt", "model")
+)
+LLM_TTFT = Histogram(
+    "llm_time_to_first_token_seconds", "스트리밍 첫 토큰까지 걸린 시간",
+    ("endpoint", "prompt", "model"), TTFT_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "LLM 토큰 사용량", ("endpoint", "prompt", "model", "type")
+)
+LLM_COST = Counter("llm_cost_usd_total", "LLM 예상 비용(USD)", ("endpoint", "model"))
+LLM_RETRIES = Counter("llm_retries_total", "LLM HTTP 재시도 수", ("endpoint", "model"))
+LLM_CACHE = Counter(
+    "llm_cache_results_total", "LLM 호출 없이 처리된 요청 수", ("endpoint", "prompt", "result")
+)
+LLM_HEDGES = Counter(
+    "llm_hedged_requests_total", "헤지 요청 수와 승자 (sent/primary/hedge)", ("prompt", "result")
+)
+
+METRICS = (
+    LLM_REQUESTS, LLM_LATENCY, LLM_TTFT, LLM_TOKENS, LLM_COST, LLM_RETRIES, LLM_CACHE, LLM_HEDGES
+)
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# 요청 단위 컨텍스트: 어느 엔드포인트/교사의 호출인지
+
+_endpoint: ContextVar[str] = ContextVar("llm_endpoint", default="unknown")
+_teacher_id: ContextVar[Optional[int]] = ContextVar("llm_teacher_id", default=None)
+_current_call: ContextVar[Optional["LLMCall"]] = ContextVar("llm_current_call", default=None)
+
+
+def bind(endpoint: Optional[str] = None, teacher_id: Optional[int] = None):
+    if endpoint is not None:
+        _endpoint.set(endpoint)
+    if teacher_id is not None:
+        _teacher_id.set(teacher_id)
+
+
+def current_endpoint() -> str:
+    return _endpoint.get()
+
+
+def current_prompt_name() -> Optional[str]:
+    call = _current_call.get()
+    return call.prompt_name if call is not None else None
+
+
+class TelemetryMiddleware:
+    """요청 경로를 LLM 호출의 endpoint 라벨로 사용"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        endpoint = _endpoint.set(scope["path"])
+        teacher = _teacher_id.set(None)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _endpoint.reset(endpoint)
+            _teacher_id.reset(teacher)
+
+
+async def count_http_attempt(request):
+    """httpx 이벤트 훅 - OpenAI SDK 내부 재시도까지 포함한 HTTP 요청 수"""
+    call = _current_call.get()
+    if call is not None:
+        call.attempts += 1
+
+
+def record_cache_result(prompt_name: str, result: str):
+    LLM_CACHE.inc(endpoint=_endpoint.get(), prompt=prompt_name, result=result)
+
+
+def record_hedge(prompt_name: str, result: str):
+    LLM_HEDGES.inc(prompt=prompt_name, result=result)
+
+
+class LLMCall:
+    def __init__(self, prompt_name: str, model: str):
+        self.prompt_name = prompt_name
+        self.model = model
+        self.endpoint = _endpoint.get()
+        self.teacher_id = _teacher_id.get()
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.attempts = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.status = "ok"
+
+    def mark_first_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    def set_usage(self, usage_metadata: Optional[dict], prompt_estimate=0, completion_estimate=0):
+        """provider가 준 토큰 수 사용, 없으면 추정치"""
+        if usage_metadata:
+            self.prompt_tokens = usage_metadata.get("input_tokens", 0)
+            self.completion_tokens = usage_metadata.get("output_tokens", 0)
+        else:
+            self.prompt_tokens = prompt_estimate
+            self.completion_tokens = completion_estimate
+
+    @property
+    def cost_usd(self) -> float:
+        input_price, output_price = MODEL_PRICES.get(self.model, (0, 0))
+        return (self.prompt_tokens * input_price + self.completion_tokens * output_price) / 1_000_000
+
+
+@contextmanager
+def track_llm_call(prompt_name: str, model: str):
+    call = LLMCall(prompt_name, model)
+    token = _current_call.set(call)
+    try:
+        yield call
+    except (asyncio.CancelledError, GeneratorExit):
+        call.status = "cancelled"
+        raise
+    except TimeoutError:
+        call.status = "timeout"
+        raise
+    except BaseException:
+        call.status = "error"
+        raise
+    finally:
+        try:
+            _current_call.reset(token)
+        except ValueError:
+            # 스트리밍이 다른 컨텍스트에서 닫힌 경우
+            _current_call.set(None)
+        _record(call)
+
+
+def _record(call: LLMCall):
+    duration = time.perf_counter() - call.started
+    ttft = call.first_token_at - call.started if call.first_token_at else None
+    labels = {"endpoint": call.endpoint, "prompt": call.prompt_name, "model": call.model}
+
+    LLM_REQUESTS.inc(status=call.status, **labels)
+    LLM_LATENCY.observe(duration, **labels)
+    if ttft is not None:
+        LLM_TTFT.observe(ttft, **labels)
+    LLM_TOKENS.inc(call.prompt_tokens, type="prompt", **labels)
+    LLM_TOKENS.inc(call.completion_tokens, type="completion", **labels)
+    LLM_COST.inc(call.cost_usd, endpoint=call.endpoint, model=call.model)
+    if call.attempts > 1:
+        LLM_RETRIES.inc(call.attempts - 1, endpoint=call.endpoint, model=call.model)
+
+    usage_recorder.add({
+        "endpoint": call.endpoint,
+        "prompt_name": call.prompt_name,
+        "model": call.model,
+        "teacher_id": call.teacher_id,
+        "prompt_tokens": call.prompt_tokens,
+        "completion_tokens": call.completion_tokens,
+        "cost_usd": call.cost_usd,
+        "duration_ms": int(duration * 1000),
+        "ttft_ms": int(ttft * 1000) if ttft is not None else None,
+        "attempts": max(call.attempts, 1),
+        "status": call.status,
+        "created_at": datetime.utcnow(),
+    })
+
+
+class UsageRecorder:
+    """llm_usage 기록을 모아 두었다가 주기적으로 한 번에 저장 (SQLite 쓰기 횟수 절감)"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._rows = []
+        self._task = None
+
+    def add(self, row: dict):
+        self._rows.append(row)
+        if len(self._rows) > USAGE_MAX_BUFFER:
+            del self._rows[: len(self._rows) - USAGE_MAX_BUFFER]
+
+    async def flush(self):
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+        try:
+            async with AsyncSessionLocal() as db:
+                db.add_all([models.LLMUsage(**row) for row in rows])
+                await db.commit()
+        except Exception as e:
+            print(f"⚠️ LLM 사용량 저장 실패 ({len(rows)}건): {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+
+usage_recorder = UsageRecorder(USAGE_FLUSH_INTERVAL)
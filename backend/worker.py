@@ -0,0 +1,117 @@
+"""LLM 작업 워커
+
+API 프로세스와 분리되어 llm_jobs 테이블의 작업을 가져가 실행한다.
+실행: cd backend && python worker.py
+"""
+
+import asyncio
+import os
+import signal
+import socket
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import jobs
+from database import AsyncSessionLocal, engine
+from llm_registry import llm_registry
+from models import Base
+import telemetry
+
+WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+
+
+async def heartbeat(job_id: str, worker_id: str, run: asyncio.Task):
+    """실행 중인 작업의 임대를 주기적으로 연장 (임대를 잃으면 작업 취소)"""
+    while True:
+        await asyncio.sleep(jobs.JOB_LEASE_SECONDS / 3)
+        try:
+            async with AsyncSessionLocal() as db:
+                extended = await jobs.extend_lease(db, job_id, worker_id)
+        except Exception as e:
+            # DB 잠금 같은 일시적 오류로 하트비트가 멈추지 않도록 다음 주기에 다시 시도
+            print(f"⚠️ 작업 임대 연장 실패 {job_id}: {e}")
+            continue
+        if not extended:
+            # 임대가 만료되어 다른 워커가 다시 가져갔으므로 같은 작업을 두 번 실행하지 않음
+            print(f"⚠️ 작업 임대를 잃어 실행을 중단합니다 {job_id}")
+            run.cancel()
+            return
+
+
+async def process(job, worker_id: str):
+    telemetry.bind(endpoint=f"job:{job.kind}", teacher_id=job.user_id)
+    run = asyncio.create_task(jobs.run_job(job))
+    beat = asyncio.create_task(heartbeat(job.id, worker_id, run))
+    try:
+        result = await run
+    except asyncio.CancelledError:
+        if not beat.done():
+            raise
+        # 작업 상태는 새로 임대한 워커가 기록하므로 여기서는 아무것도 쓰지 않음
+    except Exception as e:
+        print(f"❌ 작업 실패 {job.kind} {job.id} (시도 {job.attempts}): {e}")
+        async with AsyncSessionLocal() as db:
+            await jobs.fail_job(db, job.id, str(e), jobs.is_retryable(e))
+    else:
+        async with AsyncSessionLocal() as db:
+            await jobs.complete_job(db, job.id, result)
+        print(f"✅ 작업 완료 {job.kind} {job.id}")
+    finally:
+        beat.cancel()
+
+
+async def run_worker():
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await llm_registry.startup()
+    telemetry.usage_recorder.start()
+
+    async with AsyncSessionLocal() as db:
+        recovered = await jobs.recover_stale_jobs(db)
+    print(f"🚀 워커 시작 {worker_id} (동시 실행 {WORKER_CONCURRENCY}, 복구 {recovered}건)")
+
+    running = set()
+    last_recovery = loop.time()
+    while not stopping.is_set():
+        # 주기적으로 다른 워커가 남긴 만료 작업 복구
+        if loop.time() - last_recovery > jobs.JOB_LEASE_SECONDS:
+            async with AsyncSessionLocal() as db:
+                await jobs.recover_stale_jobs(db)
+            last_recovery = loop.time()
+
+        job = None
+        if len(running) < WORKER_CONCURRENCY:
+            async with AsyncSessionLocal() as db:
+                job = await jobs.claim_next_job(db, worker_id)
+
+        if job is None:
+            try:
+                await asyncio.wait_for(stopping.wait(), timeout=POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        task = asyncio.create_task(process(job, worker_id))
+        running.add(task)
+        task.add_done_callback(running.discard)
+
+    # 종료 시 실행 중인 작업은 끝까지 처리
+    if running:
+        print(f"⏳ 실행 중인 작업 {len(running)}건 완료 대기")
+        await asyncio.gather(*running, return_exceptions=True)
+    await telemetry.usage_recorder.stop()
+    await llm_registry.shutdown()
+    print("🔄 워커가 종료됩니다...")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
@@ -0,0 +1,151 @@
+"""글쓰기 정량 지표 - LLM 없이 NumPy로 여러 글을 한 번에 계산
+
+문장 수/길이 분포, 문장부호 밀도, 반복 어절 비율, 어휘 다양도(TTR), 문단 수를
+글 여러 개(학생 한 명의 제출물, 학급 전체 등)를 이어 붙인 글자 배열에서 한 번에 구한다.
+분석 프롬프트에는 원문 대신 이 숫자들을 짧은 한 줄 요약으로 넣는다.
+- 문장: 종결 부호(. ? ! 연속은 하나로) 또는 글 끝에서 끝남, 길이는 공백/문장부호를 뺀 글자 수
+- 문단: 내용이 있는 줄
+- 어절: 문장부호를 지우고 공백으로 나눈 단위 (조사가 붙은 채로 비교)
+"""
+
+import os
+from typing import List
+
+import numpy as np
+
+# 이 글자 수보다 긴 문장을 긴 문장으로 봄
+LONG_SENTENCE_CHARS = int(os.getenv("LONG_SENTENCE_CHARS", "60"))
+
+SENTENCE_ENDERS = ".?!。"
+PUNCTUATION = SENTENCE_ENDERS + ",;:·…~\"'“”‘’()[]「」『』<>《》-"
+WHITESPACE = " \t\r\n　\xa0"
+
+_ENDER_CODES = np.array([ord(c) for c in SENTENCE_ENDERS], dtype=np.uint32)
+_PUNCT_CODES = np.array([ord(c) for c in PUNCTUATION], dtype=np.uint32)
+_SPACE_CODES = np.array([ord(c) for c in WHITESPACE], dtype=np.uint32)
+
+
+def _ratio(numerator, denominator) -> np.ndarray:
+    numerator = np.asarray(numerator, dtype=np.float64)
+    return np.divide(
+        numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0
+    )
+
+
+def _word_stats(joined: str, letter, is_start, is_end, doc, n: int):
+    """글별 어절 수, 서로 다른 어절 수, 두 번 이상 나온 어절의 출현 수
+
+    어절은 공백/문장부호가 아닌 글자가 이어진 구간
+    """
+    previous = np.insert(letter[:-1], 0, False) & ~is_start
+    following = np.append(letter[1:], False) & ~is_end
+    starts = np.flatnonzero(letter & ~previous)
+    ends = np.flatnonzero(letter & ~following) + 1
+    # 어절 문자열을 id로 바꾸는 부분만 파이썬 (dict 조회가 문자열 배열 정렬보다 빠름)
+    vocab = {}
+    ids = np.fromiter(
+        (vocab.setdefault(joined[a:b], len(vocab)) for a, b in zip(starts.tolist(), ends.tolist())),
+        dtype=np.int64,
+        count=len(starts),
+    )
+    word_doc = doc[starts]
+    # (글, 어절) 쌍마다 한 번씩 세기
+    size = max(len(vocab), 1)
+    unique_pairs, pair_counts = np.unique(word_doc * size + ids, return_counts=True)
+    pair_doc = unique_pairs // size
+    words = np.bincount(word_doc, minlength=n)
+    types = np.bincount(pair_doc, minlength=n)
+    repeated = np.bincount(
+        pair_doc, weights=pair_counts * (pair_counts > 1), minlength=n
+    )
+    return words, types, repeated
+
+
+def compute_metrics(texts: List[str]) -> List[dict]:
+    """글마다 정량 지표 dict 반환 (입력 순서 유지)"""
+    texts = [t or "" for t in texts]
+    n = len(texts)
+    if n == 0:
+        return []
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=n)
+    joined = "".join(texts)
+    codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32)
+    doc = np.repeat(np.arange(n), lengths)
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    nonempty = lengths > 0
+
+    is_start = np.zeros(len(codes), dtype=bool)
+    is_start[starts[nonempty]] = True
+    is_end = np.zeros(len(codes), dtype=bool)
+    is_end[ends[nonempty] - 1] = True
+
+    space = np.isin(codes, _SPACE_CODES)
+    punct = np.isin(codes, _PUNCT_CODES)
+    letter = ~space & ~punct
+    chars = np.bincount(doc[~space], minlength=n)
+    punctuation = np.bincount(doc[punct], minlength=n)
+    commas = np.bincount(doc[codes == ord(",")], minlength=n)
+
+    # 문장: 종결 부호가 이어지는 구간의 마지막 글자나 글 끝에서 끝남
+    ender = np.isin(codes, _ENDER_CODES)
+    next_ender = np.append(ender[1:], False) & ~is_end
+    boundary = (ender & ~next_ender) | is_end
+    sentence_id = np.cumsum(boundary) - boundary
+    sentence_length = np.bincount(sentence_id[letter], minlength=int(boundary.sum()))
+    sentence_doc = doc[boundary]
+    valid = sentence_length > 0
+    sentence_doc, sentence_length = sentence_doc[valid], sentence_length[valid]
+
+    sentences = np.bincount(sentence_doc, minlength=n)
+    length_sum = np.bincount(sentence_doc, weights=sentence_length, minlength=n)
+    square_sum = np.bincount(sentence_doc, weights=sentence_length ** 2, minlength=n)
+    mean = _ratio(length_sum, sentences)
+    std = np.sqrt(np.maximum(_ratio(square_sum, sentences) - mean ** 2, 0))
+    longest = np.zeros(n, dtype=np.int64)
+    np.maximum.at(longest, sentence_doc, sentence_length)
+    long_sentences = np.bincount(
+        sentence_doc[sentence_length > LONG_SENTENCE_CHARS], minlength=n
+    )
+
+    # 문단: 내용이 있는 줄
+    previous = np.insert(codes[:-1], 0, 0)
+    line_start = is_start | (previous == ord("\n"))
+    line_id = np.cumsum(line_start) - 1
+    has_content = np.bincount(line_id[~space], minlength=int(line_start.sum())) > 0
+    paragraphs = np.bincount(doc[line_start][has_content], minlength=n)
+
+    words, types, repeated = _word_stats(joined, letter, is_start, is_end, doc, n)
+
+    columns = {
+        "chars": chars,
+        "sentences": sentences,
+        "avg_sentence_length": np.round(mean, 1),
+        "sentence_length_std": np.round(std, 1),
+        "max_sentence_length": longest,
+        "long_sentence_ratio": np.round(_ratio(long_sentences, sentences), 2),
+        "paragraphs": paragraphs,
+        "punctuation_per_100_chars": np.round(_ratio(punctuation * 100, chars), 1),
+        "commas_per_sentence": np.round(_ratio(commas, sentences), 2),
+        "words": words,
+        "lexical_diversity": np.round(_ratio(types, words), 2),
+        "repeated_word_ratio": np.round(_ratio(repeated, words), 2),
+    }
+    rows = {key: values.tolist() for key, values in columns.items()}
+    return [{key: rows[key][i] for key in columns} for i in range(n)]
+
+
+def format_metrics(metrics: List[dict]) -> str:
+    """프롬프트용 요약 (제출물 번호는 merge_submission의 student example 번호와 같음)"""
+    if not metrics:
+        return "없음"
+    return "\n".join(
+        f"{i} student example : sentences={m['sentences']}, "
+        f"avg_len={m['avg_sentence_length']}, std={m['sentence_length_std']}, "
+        f"max_len={m['max_sentence_length']}, "
+        f"long(>{LONG_SENTENCE_CHARS})={m['long_sentence_ratio']:.0%}, "
+        f"paragraphs={m['paragraphs']}, commas/sentence={m['commas_per_sentence']}, "
+        f"punct/100chars={m['punctuation_per_100_chars']}, "
+        f"TTR={m['lexical_diversity']}, repeated_words={m['repeated_word_ratio']:.0%}"
+        for i, m in enumerate(metrics)
+    )